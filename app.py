@@ -6,11 +6,61 @@
 import aws_cdk as cdk
 from cdk_nag import AwsSolutionsChecks
 from aws_cdk import Aspects
-from wind_farm.wind_farm_stack import WindFarmStack
+from twinmaker_builder.assets import BUCKET_PLACEHOLDER, hash_directory
+from wind_farm.sites import load_sites, site_model_paths, site_name
+from wind_farm.wind_farm_stack import (
+    WindFarmSharedStack,
+    WindFarmStack,
+    context_resources,
+    site_bucket_name,
+)
 
 
-app = cdk.App()
-Aspects.of(app).add(AwsSolutionsChecks(verbose=True))
-WindFarmStack(app, "windfarm-sample")
+def main():
+    app = cdk.App()
+    Aspects.of(app).add(AwsSolutionsChecks(verbose=True))
 
-app.synth()
+    # `cdk synth -c sites_dir=sites` synthesizes a stack per site YAML of the directory
+    sites_dir = app.node.try_get_context("sites_dir")
+    if sites_dir is None:
+        WindFarmStack(app, "windfarm-sample")
+    else:
+        model_paths = site_model_paths(sites_dir)
+        workspace_ids = [f"windfarm-{site_name(p)}" for p in model_paths]
+
+        # The models are parsed and their scenes generated before the constructs are created, in worker
+        # processes with `-c site_workers=<count>`
+        max_workers = int(app.node.try_get_context("site_workers") or 1)
+        if str(app.node.try_get_context("content_addressed")).lower() == "true":
+            # scenes refer to the resources by content-addressed keys, see twinmaker_builder.assets
+            sites = load_sites(
+                model_paths,
+                "wind_farm/base.json",
+                [BUCKET_PLACEHOLDER] * len(model_paths),
+                max_workers=max_workers,
+                asset_keys=hash_directory(context_resources(app.node)),
+            )
+        else:
+            sites = load_sites(
+                model_paths,
+                "wind_farm/base.json",
+                [
+                    site_bucket_name(w, cdk.Aws.ACCOUNT_ID, cdk.Aws.REGION)
+                    for w in workspace_ids
+                ],
+                max_workers=max_workers,
+            )
+
+        shared = WindFarmSharedStack(app, "windfarm-shared")
+        for workspace_id, site in zip(workspace_ids, sites):
+            stack = WindFarmStack(
+                app, workspace_id, workspace_id=workspace_id, site=site, shared=shared
+            )
+            stack.add_dependency(shared)
+
+    app.synth()
+
+
+# worker processes loading the sites import this module again
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Visit and synth time of the wind farm CDK visitor for a generated farm.
+
+Compares the component structures built per turbine, shared per binding and the raw
+emission mode (entities added to the stack by a single CfnInclude).
+
+Usage
+-----
+    python benchmarks/bench_cdk_synth.py [--groups 10] [--turbines 50]
+"""
+
+import argparse
+import sys
+import time
+
+from udq_events import ROOT_DIR
+
+
+def farm_description(groups: int, turbines: int) -> dict:
+    return {
+        "name": "Bench Farm",
+        "component_bindings": {
+            "Turbine": {
+                "TurbineFan": {
+                    "component_type": "com.aws.sample.component.random",
+                    "properties": {
+                        "min": {"double_value": 50},
+                        "max": {"double_value": 150},
+                    },
+                }
+            }
+        },
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "items": [
+                    {"name": f"turbine_{g}_{t}", "type": "Turbine"}
+                    for t in range(turbines)
+                ],
+            }
+            for g in range(groups)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--turbines", type=int, default=50, help="turbines per group")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT_DIR)
+    import aws_cdk as cdk
+    from aws_cdk import aws_iottwinmaker as twinmaker
+
+    from wind_farm.wind_farm import WindFarm
+    from wind_farm.visitors import WindFarmCDKVisitor
+
+    class PerEntityStructuresVisitor(WindFarmCDKVisitor):
+        """Builds the component structures of every turbine, as done before component bindings"""
+
+        def components_for(self, entity):
+            return {
+                "TurbineFan": twinmaker.CfnEntity.ComponentProperty(
+                    component_type_id="com.aws.sample.component.random",
+                    properties={
+                        "min": twinmaker.CfnEntity.PropertyProperty(
+                            value=twinmaker.CfnEntity.DataValueProperty(double_value=50)
+                        ),
+                        "max": twinmaker.CfnEntity.PropertyProperty(
+                            value=twinmaker.CfnEntity.DataValueProperty(
+                                double_value=150
+                            )
+                        ),
+                    },
+                )
+            }
+
+    farm = WindFarm(farm_description(args.groups, args.turbines))
+    entities = 1 + args.groups * (1 + args.turbines)
+    print(f"farm       : {entities:,} entities")
+
+    for label, visitor_class, raw in (
+        ("per-entity", PerEntityStructuresVisitor, False),
+        ("bindings", WindFarmCDKVisitor, False),
+        ("raw", WindFarmCDKVisitor, True),
+    ):
+        # no limit on the number of resources, the benchmark is not deployed
+        app = cdk.App(context={"@aws-cdk/core:stackResourceLimit": 0})
+        stack = cdk.Stack(app, "bench")
+        workspace = twinmaker.CfnWorkspace(
+            stack,
+            "Workspace",
+            workspace_id="bench",
+            role="arn:dummy",
+            s3_location="arn:dummy",
+        )
+        start = time.perf_counter()
+        farm.visit(visitor_class(stack, "WindFarm", workspace, raw=raw))
+        visited = time.perf_counter()
+        app.synth()
+        synthesized = time.perf_counter()
+        print(
+            f"{label:<11}: visit {(visited - start) * 1000:8.0f} ms, "
+            f"synth {(synthesized - visited) * 1000:8.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
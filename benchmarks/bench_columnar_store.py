@@ -0,0 +1,111 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Cold-open and range-query benchmark of the memory-mapped columnar store, compared with the SQLite connector.
+
+Usage
+-----
+    python benchmarks/bench_columnar_store.py [--entities 20] [--points 200000] [--queries 200] [--directory path]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from udq_events import add_lambda_paths, entity_event
+
+COMPONENT_TYPE = "com.aws.sample.component.random"
+START_NS = 1668522782 * 10**9
+SECOND = 10**9
+
+
+def run_queries(reader, args, window, epoch_ns_to_iso8601):
+    rng = random.Random(1)
+    durations = []
+    returned = 0
+    for _ in range(args.queries):
+        first = rng.randrange(max(1, args.points - window))
+        event = entity_event(
+            entity_id=f"turbine_{rng.randrange(args.entities)}",
+            start_time=epoch_ns_to_iso8601(START_NS + first * SECOND),
+            end_time=epoch_ns_to_iso8601(START_NS + (first + window) * SECOND),
+        )
+        event["maxResults"] = None
+        query_start = time.perf_counter()
+        result = reader.process_query(event)
+        durations.append(time.perf_counter() - query_start)
+        returned += sum(len(p["values"]) for p in result["propertyValues"])
+    durations.sort()
+    return (
+        f"p50 {durations[len(durations) // 2] * 1000:.2f} ms, "
+        f"p99 {durations[int(len(durations) * 0.99)] * 1000:.2f} ms, "
+        f"{returned / args.queries:,.0f} points/query"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=20)
+    parser.add_argument("--points", type=int, default=200000, help="points per entity")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--directory", help="store directory, a temporary one by default"
+    )
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.columnar_store import ColumnarStoreReader, ColumnarStoreWriter
+    from udq_utils.sqlite_reader import SQLiteReader
+    from udq_utils.udq_time import epoch_ns_to_iso8601
+
+    directory = args.directory or tempfile.mkdtemp(prefix="udq-columnar-")
+    rng = random.Random(0)
+    sqlite_reader = SQLiteReader()
+
+    start = time.perf_counter()
+    with ColumnarStoreWriter(directory) as writer:
+        for entity in range(args.entities):
+            timestamps = [START_NS + i * SECOND for i in range(args.points)]
+            values = [rng.uniform(50, 150) for _ in range(args.points)]
+            writer.write_series(
+                COMPONENT_TYPE,
+                f"turbine_{entity}",
+                "TurbineFan",
+                "speed",
+                timestamps,
+                values,
+            )
+            sqlite_reader.ingest(
+                COMPONENT_TYPE,
+                (
+                    (f"turbine_{entity}", "TurbineFan", "speed", t, v)
+                    for t, v in zip(timestamps, values)
+                ),
+            )
+    print(f"write      : {time.perf_counter() - start:.2f} s (both stores)")
+
+    start = time.perf_counter()
+    reader = ColumnarStoreReader(directory)
+    reader.process_query(
+        entity_event(
+            entity_id="turbine_0",
+            start_time=epoch_ns_to_iso8601(START_NS),
+            end_time=epoch_ns_to_iso8601(START_NS + 60 * SECOND),
+        )
+    )
+    print(
+        f"cold open  : {(time.perf_counter() - start) * 1000:.2f} ms (manifest, mapping, first query)"
+    )
+
+    for window in (60, 3600, 86400):
+        print(f"range {window:>6} s")
+        print(f"  columnar : {run_queries(reader, args, window, epoch_ns_to_iso8601)}")
+        print(
+            f"  sqlite   : {run_queries(sqlite_reader, args, window, epoch_ns_to_iso8601)}"
+        )
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Size of the GLB models of twinmaker_resources before and after optimization, and optimization time.
+
+Usage
+-----
+    python benchmarks/bench_gltf.py [--no-quantize] [--simplify 0.25]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from udq_events import ROOT_DIR
+
+sys.path.insert(0, ROOT_DIR)
+
+from twinmaker_builder.gltf import GLB, optimize_glb  # noqa: E402
+
+
+def geometry_size(glb: GLB) -> int:
+    """Bytes of the binary chunk that are not images"""
+    images = sum(
+        glb.document["bufferViews"][image["bufferView"]]["byteLength"]
+        for image in glb.document.get("images", [])
+        if "bufferView" in image
+    )
+    return len(glb.binary) - images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--simplify", type=float, help="ratio of triangles kept")
+    args = parser.parse_args()
+
+    resources_dir = os.path.join(ROOT_DIR, "twinmaker_resources")
+    for root, _, files in os.walk(resources_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(".glb"):
+                continue
+            with open(os.path.join(root, name), "rb") as file:
+                data = file.read()
+            start = time.perf_counter()
+            optimized = optimize_glb(data, not args.no_quantize, args.simplify)
+            elapsed = time.perf_counter() - start
+
+            before, after = GLB.parse(data), GLB.parse(optimized)
+            print(
+                f"{name}: {len(data):,} -> {len(optimized):,} bytes, "
+                f"geometry {geometry_size(before):,} -> {geometry_size(after):,} bytes "
+                f"in {elapsed * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Measure cold-start and warm-invoke time of the random component Lambda handler.
+
+A cold start is simulated by a fresh interpreter that imports the handler and serves one event,
+warm invocations reuse the already imported handler.
+
+Usage
+-----
+    python benchmarks/bench_lambda_handler.py [--cold-starts 10] [--invocations 10000]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from udq_events import add_lambda_paths, entity_event, LAMBDA_CODE_DIR, UDQ_UTILS_DIR
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path[:0] = [{udq_utils_dir!r}, {lambda_code_dir!r}]
+from handler import lambda_handler
+imported = time.perf_counter()
+lambda_handler(json.loads(sys.argv[1]), None)
+done = time.perf_counter()
+print(json.dumps({{"import": imported - start, "first_invoke": done - imported}}))
+"""
+
+
+def cold_starts(count):
+    script = COLD_START_SCRIPT.format(
+        udq_utils_dir=UDQ_UTILS_DIR, lambda_code_dir=LAMBDA_CODE_DIR
+    )
+    event = json.dumps(entity_event())
+    samples = []
+    for _ in range(count):
+        output = subprocess.check_output([sys.executable, "-c", script, event])
+        samples.append(json.loads(output))
+    return samples
+
+
+def warm_invokes(count):
+    add_lambda_paths()
+    from handler import lambda_handler
+
+    event = entity_event()
+    lambda_handler(event, None)
+
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        lambda_handler(event, None)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold-starts", type=int, default=10)
+    parser.add_argument("--invocations", type=int, default=10000)
+    args = parser.parse_args()
+
+    samples = cold_starts(args.cold_starts)
+    imports = [s["import"] * 1000 for s in samples]
+    first = [s["first_invoke"] * 1000 for s in samples]
+    print(f"cold start ({args.cold_starts} runs)")
+    print(f"  handler import : median {statistics.median(imports):.2f} ms")
+    print(f"  first invoke   : median {statistics.median(first):.3f} ms")
+
+    durations = [d * 1_000_000 for d in warm_invokes(args.invocations)]
+    print(f"warm invoke ({args.invocations} runs)")
+    print(f"  median {statistics.median(durations):.1f} us")
+    print(f"  mean   {statistics.mean(durations):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Comparison of two versions of a generated wind farm model, subtree digests versus field by field.
+
+Usage
+-----
+    python benchmarks/bench_model_diff.py [--groups 100] [--turbines 1000] [--changes 10]
+"""
+
+import argparse
+import copy
+import random
+import sys
+import time
+
+from udq_events import ROOT_DIR
+
+
+def farm_description(groups: int, turbines: int) -> dict:
+    return {
+        "name": "Bench Farm",
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "shape": "rectangle",
+                "width": 10,
+                "model": {"position": {"x": g * 100, "y": 0, "z": 0}},
+                "items": [
+                    {
+                        "name": f"turbine_{g}_{t}",
+                        "type": "Turbine",
+                        "device_code": f"0x{g:03x}{t:04x}",
+                    }
+                    for t in range(turbines)
+                ],
+            }
+            for g in range(groups)
+        ],
+    }
+
+
+def field_by_field(old_root, new_root, object_fields):
+    """Index both models by URN and compare the fields of every object"""
+
+    def index(root):
+        objects = {}
+        pending = [root]
+        while pending:
+            obj = pending.pop()
+            parent_urn = obj.parent.urn.fqn if obj.parent else None
+            objects[obj.urn.fqn] = (parent_urn, object_fields(obj))
+            pending.extend(obj.items)
+        return objects
+
+    old, new = index(old_root), index(new_root)
+    return sum(1 for urn, entry in new.items() if old.get(urn) != entry) + sum(
+        1 for urn in old if urn not in new
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--turbines", type=int, default=1000, help="turbines per group")
+    parser.add_argument("--changes", type=int, default=10)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT_DIR)
+    from twinmaker_builder.diff import diff_models, object_fields
+    from wind_farm.wind_farm import WindFarm
+
+    description = farm_description(args.groups, args.turbines)
+    new_description = copy.deepcopy(description)
+    rng = random.Random(42)
+    for _ in range(args.changes):
+        group = rng.choice(new_description["items"])
+        rng.choice(group["items"])["device_code"] = "changed"
+
+    old, new = WindFarm(description), WindFarm(new_description)
+    print(f"model         : {1 + args.groups * (1 + args.turbines):,} objects")
+
+    start = time.perf_counter()
+    differences = field_by_field(old, new, object_fields)
+    print(
+        f"field by field: {(time.perf_counter() - start) * 1000:8.0f} ms, "
+        f"{differences} differences"
+    )
+
+    start = time.perf_counter()
+    diff = diff_models(old, new)
+    print(f"digests       : {(time.perf_counter() - start) * 1000:8.0f} ms, {diff}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Lookups in a generated wind farm model, ModelIndex queries versus walks of the hierarchy.
+
+Usage
+-----
+    python benchmarks/bench_model_index.py [--groups 50] [--turbines 1000] [--lookups 1000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from udq_events import ROOT_DIR
+
+
+def farm_description(groups: int, turbines: int) -> dict:
+    return {
+        "name": "Bench Farm",
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "items": [
+                    {
+                        "name": f"turbine_{g}_{t}",
+                        "type": "Turbine",
+                        "device_code": f"0x{g:03x}{t:04x}",
+                    }
+                    for t in range(turbines)
+                ],
+            }
+            for g in range(groups)
+        ],
+    }
+
+
+def walk(root):
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        yield obj
+        pending.extend(obj.items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--turbines", type=int, default=1000, help="turbines per group")
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT_DIR)
+    from wind_farm.wind_farm import WindFarm
+
+    farm = WindFarm(farm_description(args.groups, args.turbines))
+    rng = random.Random(42)
+    codes = [
+        f"0x{rng.randrange(args.groups):03x}{rng.randrange(args.turbines):04x}"
+        for _ in range(args.lookups)
+    ]
+    print(f"model : {1 + args.groups * (1 + args.turbines):,} objects")
+
+    start = time.perf_counter()
+    for code in codes[:10]:
+        [obj for obj in walk(farm) if getattr(obj, "device_code", None) == code]
+    elapsed = (time.perf_counter() - start) / 10
+    print(f"walk  : {elapsed * 1e6:10.1f} us per device_code lookup")
+
+    start = time.perf_counter()
+    farm.query(device_code=codes[0])
+    print(
+        f"build : {(time.perf_counter() - start) * 1000:10.1f} ms (URN, type and device_code indexes)"
+    )
+
+    start = time.perf_counter()
+    for code in codes:
+        farm.query(device_code=code)
+    elapsed = (time.perf_counter() - start) / len(codes)
+    print(f"index : {elapsed * 1e6:10.1f} us per device_code lookup")
+
+    group = farm.items[len(farm.items) // 2]
+    start = time.perf_counter()
+    for _ in range(100):
+        farm.query(type="Turbine", within=group)
+    elapsed = (time.perf_counter() - start) / 100
+    print(
+        f"index : {elapsed * 1e6:10.1f} us per subtree selection of {len(group.items)} turbines"
+    )
+
+    start = time.perf_counter()
+    positions = [turbine.index for turbine in group.items]
+    elapsed = (time.perf_counter() - start) / len(positions)
+    print(f"index : {elapsed * 1e6:10.3f} us per position in parent")
+
+
+if __name__ == "__main__":
+    main()
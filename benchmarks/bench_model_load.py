@@ -0,0 +1,136 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Load time and memory of a generated wind farm model, slotted schema classes versus dict-based classes,
+and of the same model described with templates (expanded on first access).
+
+Usage
+-----
+    python benchmarks/bench_model_load.py [--groups 100] [--turbines 1000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from udq_events import ROOT_DIR
+
+sys.path.insert(0, ROOT_DIR)
+
+from twinmaker_builder import TwinMakerObject, TwinMakerRoot  # noqa: E402
+from wind_farm.wind_farm import WindFarm  # noqa: E402
+
+
+# The wind farm classes as they were declared before field schemas: the root looks them up in this module
+class LegacyFarm(TwinMakerRoot):
+    pass
+
+
+class TurbineGroup(TwinMakerObject):
+    def __init__(self, description: dict, parent=None) -> None:
+        super().__init__(
+            description, parent=parent, fields=["shape", "width", "diameter"]
+        )
+
+
+class Turbine(TwinMakerObject):
+    def __init__(self, description: dict, parent=None) -> None:
+        super().__init__(description, parent=parent, fields=["device_code"])
+
+
+def farm_description(groups: int, turbines: int) -> dict:
+    return {
+        "name": "Bench Farm",
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "shape": "rectangle",
+                "width": 10,
+                "items": [
+                    {
+                        "name": f"turbine_{g}_{t}",
+                        "type": "Turbine",
+                        "device_code": f"0x{g:03x}{t:04x}",
+                    }
+                    for t in range(turbines)
+                ],
+            }
+            for g in range(groups)
+        ],
+    }
+
+
+def templated_description(groups: int, turbines: int) -> dict:
+    return {
+        "name": "Bench Farm",
+        "parameters": {"groups": groups, "turbines": turbines, "spacing": 300},
+        "items": [
+            {
+                "type": "TurbineGroup",
+                "repeat": {"index": "g", "count": "${groups}"},
+                "name": "group${g}",
+                "shape": "rectangle",
+                "width": 10,
+                "items": [
+                    {
+                        "type": "Turbine",
+                        "repeat": {"index": "t", "count": "${turbines}"},
+                        "name": "turbine_${g}_${t}",
+                        "device_code": "0x${g:03x}${t:04x}",
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def count_objects(farm) -> int:
+    count = 0
+    pending = [farm]
+    while pending:
+        obj = pending.pop()
+        count += 1
+        pending.extend(obj.items)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--turbines", type=int, default=1000, help="turbines per group")
+    args = parser.parse_args()
+
+    description = farm_description(args.groups, args.turbines)
+    print(f"model  : {1 + args.groups * (1 + args.turbines):,} objects")
+
+    for label, klass in (("dict", LegacyFarm), ("slots", WindFarm)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        farm = klass(description)
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<7}: load {elapsed * 1000:6.0f} ms, {size / 2**20:6.1f} MiB")
+        del farm
+
+    description = templated_description(args.groups, args.turbines)
+    tracemalloc.start()
+    start = time.perf_counter()
+    farm = WindFarm(description)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    print(f"{'template':<7}: load {elapsed * 1000:6.0f} ms, {size / 2**20:6.1f} MiB")
+    start = time.perf_counter()
+    count = count_objects(farm)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{'':<7}  expansion of {count:,} objects {elapsed * 1000:6.0f} ms, {size / 2**20:6.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Parsing and scene generation of several wind farm sites, in this process versus in worker processes.
+
+Usage
+-----
+    python benchmarks/bench_multi_site.py [--sites 4] [--turbines 20000] [--workers 0]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+from udq_events import ROOT_DIR
+
+sys.path.insert(0, ROOT_DIR)
+
+from wind_farm.sites import load_sites, site_model_paths  # noqa: E402
+
+
+def site_description(site: int, turbines: int) -> dict:
+    return {
+        "name": f"Site {site}",
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "items": [
+                    {
+                        "name": f"turbine_{g}_{t}",
+                        "type": "Turbine",
+                        "device_code": f"0x{g:03x}{t:04x}",
+                    }
+                    for t in range(100)
+                ],
+            }
+            for g in range(turbines // 100)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=4)
+    parser.add_argument("--turbines", type=int, default=20000, help="turbines per site")
+    parser.add_argument("--workers", type=int, default=0, help="0 for one per site")
+    args = parser.parse_args()
+
+    base_file = os.path.join(ROOT_DIR, "wind_farm", "base.json")
+    with tempfile.TemporaryDirectory() as sites_dir:
+        for site in range(args.sites):
+            with open(os.path.join(sites_dir, f"site{site}.yaml"), "w") as file:
+                yaml.safe_dump(site_description(site, args.turbines), file)
+        model_paths = site_model_paths(sites_dir)
+        bucket_names = [f"bucket-{site}" for site in range(args.sites)]
+        print(f"model  : {args.sites} sites of {args.turbines:,} turbines")
+
+        for label, workers in (("serial", 1), ("workers", args.workers or None)):
+            start = time.perf_counter()
+            sites = load_sites(model_paths, base_file, bucket_names, workers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<7}: {elapsed * 1000:6.0f} ms for {len(sites)} sites")
+
+
+if __name__ == "__main__":
+    main()
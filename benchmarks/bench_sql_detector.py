@@ -0,0 +1,81 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Measure SQLDetector.detectInjection throughput.
+
+"uncached" reproduces the original behaviour (both queries parsed on every call), "detectInjection"
+uses the cached sample context and the lexical pre-check, "query template" renders the statement through
+udq_utils.query_template.
+
+Usage
+-----
+    python benchmarks/bench_sql_detector.py [--seconds 2]
+"""
+
+import argparse
+import time
+
+from udq_events import add_lambda_paths
+
+SAMPLE_QUERY = (
+    "SELECT measure_name, time, measure_value::double FROM telemetry "
+    "WHERE entity_id = 'abc' AND component_name = 'abc' "
+    "AND time > from_iso8601_timestamp('2022-11-15T14:33:02Z') ORDER BY time ASC"
+)
+QUERIES = {
+    "literal substitution": SAMPLE_QUERY.replace(
+        "entity_id = 'abc'", "entity_id = 'urn:ngsi-ld:Turbine:turbine_rect_1'"
+    ),
+    "numeric change": SAMPLE_QUERY.replace("ORDER BY time ASC", "ORDER BY time DESC"),
+}
+
+
+def rate(fn, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            fn()
+        count += 50
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.sql_detector import SQLDetector
+
+    detector = SQLDetector()
+
+    def uncached(query):
+        if detector.getQueryContext(SAMPLE_QUERY) != detector.getQueryContext(query):
+            raise Exception("injection")
+
+    for name, query in QUERIES.items():
+        before = rate(lambda: uncached(query), args.seconds)
+        after = rate(
+            lambda: detector.detectInjection(SAMPLE_QUERY, query), args.seconds
+        )
+        print(f"{name}")
+        print(f"  uncached        : {before:,.0f} detections/s")
+        print(f"  detectInjection : {after:,.0f} detections/s ({after / before:.1f}x)")
+
+    from udq_utils.query_template import QueryTemplate
+
+    template = QueryTemplate(
+        "history",
+        SAMPLE_QUERY.replace("entity_id = 'abc'", "entity_id = {entity_id:str}"),
+    )
+    rendered = rate(
+        lambda: template.render(entity_id="urn:ngsi-ld:Turbine:turbine_rect_1"),
+        args.seconds,
+    )
+    print("query template")
+    print(f"  render + check  : {rendered:,.0f} statements/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Bulk-ingest and range-query benchmark of the SQLite reference connector.
+
+Usage
+-----
+    python benchmarks/bench_sqlite_reader.py [--entities 100] [--points 10000] [--queries 500] [--database path]
+"""
+
+import argparse
+import random
+import time
+
+from udq_events import add_lambda_paths, entity_event
+
+COMPONENT_TYPE = "com.aws.sample.component.random"
+START_NS = 1668522782 * 10**9
+SECOND = 10**9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=100)
+    parser.add_argument("--points", type=int, default=10000, help="points per entity")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--database", default=":memory:")
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.sqlite_reader import SQLiteReader
+    from udq_utils.udq_time import epoch_ns_to_iso8601
+
+    reader = SQLiteReader(args.database)
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    for entity in range(args.entities):
+        reader.ingest(
+            COMPONENT_TYPE,
+            (
+                (
+                    f"turbine_{entity}",
+                    "TurbineFan",
+                    "speed",
+                    START_NS + i * SECOND,
+                    rng.uniform(50, 150),
+                )
+                for i in range(args.points)
+            ),
+        )
+    elapsed = time.perf_counter() - start
+    total = args.entities * args.points
+    print(
+        f"ingest     : {total:,} points in {elapsed:.2f} s ({total / elapsed:,.0f} points/s)"
+    )
+
+    for window in (60, 3600, args.points):
+        durations = []
+        returned = 0
+        for _ in range(args.queries):
+            first = rng.randrange(max(1, args.points - window))
+            event = entity_event(
+                entity_id=f"turbine_{rng.randrange(args.entities)}",
+                start_time=epoch_ns_to_iso8601(START_NS + first * SECOND),
+                end_time=epoch_ns_to_iso8601(START_NS + (first + window) * SECOND),
+            )
+            event["maxResults"] = None
+            query_start = time.perf_counter()
+            result = reader.process_query(event)
+            durations.append(time.perf_counter() - query_start)
+            returned += sum(len(p["values"]) for p in result["propertyValues"])
+        durations.sort()
+        print(
+            f"range {window:>6} s: p50 {durations[len(durations) // 2] * 1000:.2f} ms, "
+            f"p99 {durations[int(len(durations) * 0.99)] * 1000:.2f} ms, "
+            f"{returned / args.queries:,.0f} points/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Response size and duration of a long-window UDQ query, raw versus downsampled.
+
+Usage
+-----
+    python benchmarks/bench_udq_aggregation.py [--days 30] [--interval 1] [--target 1000]
+"""
+
+import argparse
+import json
+import random
+import time
+from array import array
+
+from udq_events import add_lambda_paths, entity_event
+
+START_NS = 1668522782 * 10**9
+SECOND = 10**9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument(
+        "--interval", type=int, default=1, help="seconds between points"
+    )
+    parser.add_argument("--target", type=int, default=1000, help="points per series")
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.udq import (
+        SingleEntityReader,
+        IoTTwinMakerDataSeries,
+        IoTTwinMakerUdqResponse,
+    )
+    from udq_utils.udq_models import IoTTwinMakerReference, EntityComponentPropertyRef
+    from udq_utils.udq_time import epoch_ns_to_iso8601
+
+    count = args.days * 86400 // args.interval
+    rng = random.Random(0)
+    timestamps = array(
+        "q",
+        range(
+            START_NS, START_NS + count * args.interval * SECOND, args.interval * SECOND
+        ),
+    )
+    values = array("d", (rng.uniform(50, 150) for _ in range(count)))
+    reference = IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine_0", "TurbineFan", "speed")
+    )
+
+    class SeriesReader(SingleEntityReader):
+        def entity_query(self, request):
+            return IoTTwinMakerUdqResponse(
+                [],
+                series=[
+                    IoTTwinMakerDataSeries(
+                        reference, memoryview(timestamps), memoryview(values)
+                    )
+                ],
+            )
+
+    event = entity_event(
+        entity_id="turbine_0",
+        start_time=epoch_ns_to_iso8601(START_NS),
+        end_time=epoch_ns_to_iso8601(START_NS + count * args.interval * SECOND),
+    )
+    event["maxResults"] = None
+    print(f"series     : {count:,} points over {args.days} days")
+
+    for label, target, method in [("raw", None, "avg")] + [
+        (method, args.target, method) for method in ("avg", "max", "last", "lttb")
+    ]:
+        reader = SeriesReader()
+        reader.downsample_target_points = target
+        reader.downsample_method = method
+        start = time.perf_counter()
+        pages = 0
+        size = 0
+        token = None
+        while True:
+            if token:
+                event["nextToken"] = token
+            result = reader.process_query(event)
+            size += len(json.dumps(result))
+            pages += 1
+            token = result["nextToken"]
+            if not token:
+                event.pop("nextToken", None)
+                break
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<10} : {elapsed * 1000:9.1f} ms, {pages:>4} page(s), {size / 1024 / 1024:8.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
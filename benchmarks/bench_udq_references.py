@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Grouping of UDQ rows by property reference, interned references versus per-row reference objects.
+
+Usage
+-----
+    python benchmarks/bench_udq_references.py [--rows 100000] [--properties 20]
+"""
+
+import argparse
+import json
+import time
+
+from udq_events import add_lambda_paths
+
+
+class PlainExternalIdRef:
+    """A reference as it was implemented before interning: a new object per row, hashed through json.dumps"""
+
+    def __init__(self, external_id_property, property_name):
+        self.external_id_property = external_id_property
+        self.property_name = property_name
+
+    def __hash__(self):
+        return hash((json.dumps(self.external_id_property), self.property_name))
+
+    def __eq__(self, other):
+        return (self.external_id_property, self.property_name) == (
+            other.external_id_property,
+            other.property_name,
+        )
+
+    def serialize(self):
+        return {
+            "externalIdProperty": self.external_id_property,
+            "propertyName": self.property_name,
+        }
+
+
+def group(rows, make_reference):
+    groups = {}
+    for asset, property_name, value in rows:
+        ref = make_reference({"telemetryAssetId": asset}, property_name)
+        values = groups.get(ref)
+        if values is None:
+            values = groups[ref] = []
+        values.append(value)
+    return [{"ref": ref.serialize(), "values": v} for ref, v in groups.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--properties", type=int, default=20)
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.udq_models import IoTTwinMakerReference, ExternalIdPropertyRef
+
+    rows = [
+        (f"asset_{i % args.properties}", "speed", float(i)) for i in range(args.rows)
+    ]
+
+    def interned(external_id_property, property_name):
+        return IoTTwinMakerReference(
+            eip=ExternalIdPropertyRef(external_id_property, property_name)
+        )
+
+    for label, make_reference in (
+        ("per-row objects", PlainExternalIdRef),
+        ("interned", interned),
+    ):
+        best = None
+        for _ in range(5):
+            start = time.perf_counter()
+            group(rows, make_reference)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(
+            f"{label:<16}: {best * 1000:8.1f} ms for {args.rows:,} rows ({args.rows / best:,.0f} rows/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Measure the cost of parsing a UDQ event into a request object.
+
+Usage
+-----
+    python benchmarks/bench_udq_request.py [--events 100000]
+"""
+
+import argparse
+import time
+
+from udq_events import add_lambda_paths, entity_event
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    from udq_utils.udq_models import IoTTwinMakerUdqRequest
+
+    event = entity_event()
+
+    def parse_only():
+        IoTTwinMakerUdqRequest.parse(event)
+
+    def parse_and_read():
+        # what a typical reader consumes from the request
+        request = IoTTwinMakerUdqRequest.parse(event)
+        request.property_definitions["min"].value
+        request.property_definitions["max"].value
+        request.start_time_ns
+        request.end_time_ns
+
+    for name, fn in (("parse", parse_only), ("parse + reader fields", parse_and_read)):
+        start = time.perf_counter()
+        for _ in range(args.events):
+            fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22}: {elapsed / args.events * 1_000_000:.2f} us/event")
+
+
+if __name__ == "__main__":
+    main()
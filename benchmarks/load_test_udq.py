@@ -0,0 +1,115 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local load test of the random component Lambda handler.
+
+Realistic UDQ events are generated (entity requests, varying windows, pagination and property filters)
+and `lambda_handler` is driven concurrently from a thread or a process pool. The report gives the
+p50/p95/p99 latency and throughput of the successful invocations, errors per type and peak RSS, which
+helps sizing the memory and timeout of the function.
+
+Usage
+-----
+    python benchmarks/load_test_udq.py [--events 20000] [--pool thread|process|both] [--workers 8]
+        [--component-type-ratio 0.0]
+"""
+
+import argparse
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from udq_events import add_lambda_paths, generate_events
+
+
+def _init_worker():
+    add_lambda_paths()
+
+
+def _invoke(event):
+    """Invoke the handler once, return the latency in seconds and the error type (if any)"""
+    from handler import lambda_handler
+
+    start = time.perf_counter()
+    try:
+        lambda_handler(event, None)
+        error = None
+    except Exception as e:
+        error = type(e).__name__
+    return time.perf_counter() - start, error
+
+
+def percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is expressed in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run(pool_name, events, workers):
+    if pool_name == "thread":
+        _init_worker()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        chunksize = 1
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        chunksize = max(1, len(events) // (workers * 16))
+
+    with executor:
+        start = time.perf_counter()
+        results = list(executor.map(_invoke, events, chunksize=chunksize))
+        elapsed = time.perf_counter() - start
+
+    # failed invocations (often faster) are left out of the latency and throughput figures
+    latencies = sorted(latency * 1000 for latency, error in results if not error)
+    errors = Counter(error for _, error in results if error)
+
+    print(f"{pool_name} pool, {workers} workers, {len(events)} events")
+    print(f"  throughput : {len(latencies) / elapsed:,.0f} successful invocations/s")
+    print(
+        "  latency    : p50 {:.3f} ms, p95 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms".format(
+            percentile(latencies, 0.50),
+            percentile(latencies, 0.95),
+            percentile(latencies, 0.99),
+            latencies[-1] if latencies else 0.0,
+        )
+    )
+    print(f"  errors     : {dict(errors) if errors else 'none'}")
+    who = resource.RUSAGE_SELF if pool_name == "thread" else resource.RUSAGE_CHILDREN
+    print(f"  peak RSS   : {peak_rss_mb(who):.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--pool", choices=["thread", "process", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--component-type-ratio",
+        type=float,
+        default=0.0,
+        help="share of component-type requests, for readers supporting them",
+    )
+    args = parser.parse_args()
+
+    add_lambda_paths()
+    events = generate_events(
+        args.events, seed=args.seed, component_type_ratio=args.component_type_ratio
+    )
+
+    pools = ["thread", "process"] if args.pool == "both" else [args.pool]
+    for pool_name in pools:
+        run(pool_name, events, args.workers)
+
+
+if __name__ == "__main__":
+    main()
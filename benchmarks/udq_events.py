@@ -0,0 +1,131 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Helpers shared by the UDQ benchmarks: locating the Lambda code and building TwinMaker UDQ events."""
+
+import random
+import sys
+import time
+from os import path
+
+ROOT_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+LAMBDA_CODE_DIR = path.join(ROOT_DIR, "wind_farm", "random_component", "lambda_code")
+UDQ_UTILS_DIR = path.join(ROOT_DIR, "wind_farm", "random_component", "udq_helper_utils")
+
+
+def add_lambda_paths():
+    """Mimic the Lambda runtime: the function code and the udq_utils layer are both importable"""
+    for directory in (UDQ_UTILS_DIR, LAMBDA_CODE_DIR):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+
+
+def double_property(value=None, time_series=False):
+    definition = {
+        "definition": {
+            "dataType": {"type": "DOUBLE"},
+            "isTimeSeries": time_series,
+            "isRequiredInEntity": not time_series,
+            "isExternalId": False,
+            "isStoredExternally": time_series,
+            "isImported": False,
+            "isFinal": False,
+            "isInherited": True,
+        }
+    }
+    if value is not None:
+        definition["value"] = {"doubleValue": str(value)}
+    return definition
+
+
+def entity_event(
+    entity_id="urn:ngsi-ld:Turbine:turbine_rect_1",
+    start_time="2022-11-15T14:33:02Z",
+    end_time="2022-11-15T14:33:02Z",
+    start_epoch=1668522782,
+    end_epoch=1668522782,
+):
+    """A single-entity UDQ event for the random component, as sent by IoT TwinMaker"""
+    return {
+        "workspaceId": "windfarm-sample",
+        "entityId": entity_id,
+        "componentName": "TurbineFan",
+        "selectedProperties": ["speed"],
+        "startTime": start_time,
+        "endTime": end_time,
+        "startDateTime": start_epoch,
+        "endDateTime": end_epoch,
+        "properties": {
+            "speed": double_property(time_series=True),
+            "min": double_property(50),
+            "max": double_property(150),
+        },
+        "maxResults": 100,
+        "orderByTime": "ASCENDING",
+    }
+
+
+# query windows sent by dashboards and scene viewers, from a single point to a month of data
+WINDOWS_SECONDS = [
+    0,
+    60,
+    15 * 60,
+    3600,
+    6 * 3600,
+    24 * 3600,
+    7 * 24 * 3600,
+    30 * 24 * 3600,
+]
+
+FILTER_OPERATORS = ["EQUAL", "GREATER_THAN", "LESS_THAN"]
+
+
+def generate_events(count, seed=0, entities=100, component_type_ratio=0.0):
+    """Generate realistic UDQ events for the random component
+
+    The mix contains single-entity requests, with varying time windows, orderings, paginated follow-up
+    calls and property filters, and component-type requests when component_type_ratio is set (the
+    RandomReader of the random component does not support them). The generation is deterministic for
+    a given seed.
+    """
+    from udq_utils.udq_models import UdqPaginationToken
+
+    rng = random.Random(seed)
+    base_epoch = 1668522782
+    events = []
+    for _ in range(count):
+        end_epoch = base_epoch + rng.randint(0, 90 * 24 * 3600)
+        start_epoch = end_epoch - rng.choice(WINDOWS_SECONDS)
+        event = entity_event(
+            entity_id=f"urn:ngsi-ld:Turbine:turbine_{rng.randrange(entities)}",
+            start_time=_iso8601(start_epoch),
+            end_time=_iso8601(end_epoch),
+            start_epoch=start_epoch,
+            end_epoch=end_epoch,
+        )
+        event["maxResults"] = rng.choice([None, 10, 100, 250])
+        event["orderByTime"] = rng.choice(["ASCENDING", "DESCENDING"])
+
+        if rng.random() < component_type_ratio:
+            del event["entityId"]
+            del event["componentName"]
+            event["componentTypeId"] = "com.aws.sample.component.random"
+
+        if rng.random() < 0.2:
+            event["nextToken"] = UdqPaginationToken(None, rng.randint(1, 10)).encode()
+
+        if rng.random() < 0.2:
+            event["propertyFilters"] = [
+                {
+                    "propertyName": "speed",
+                    "operator": rng.choice(FILTER_OPERATORS),
+                    "value": {"doubleValue": str(rng.randint(50, 150))},
+                }
+            ]
+
+        events.append({k: v for k, v in event.items() if v is not None})
+    return events
+
+
+def _iso8601(epoch_seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch_seconds))
@@ -17,6 +17,7 @@ class DummyStack(Stack):
         scope: Construct,
         construct_id: str,
         filename: str,
+        raw: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -32,5 +33,5 @@ class DummyStack(Stack):
 
         farm = TwinMakerRoot.load_from_yaml(filename, WindFarm)
 
-        visitor = WindFarmCDKVisitor(self, "WindFarm", self.workspace)
+        visitor = WindFarmCDKVisitor(self, "WindFarm", self.workspace, raw=raw)
         farm.visit(visitor)
@@ -0,0 +1,63 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+
+import pytest
+
+from twinmaker_builder.assets import (
+    BUCKET_PLACEHOLDER,
+    bytes_key,
+    hash_directory,
+    render_scene,
+    stage_directory,
+)
+from wind_farm.sites import load_site
+
+
+@pytest.fixture()
+def resources(tmp_path):
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "small.glb").write_bytes(b"small model")
+    (tmp_path / "models" / "large.glb").write_bytes(bytes(range(256)) * 100)
+    (tmp_path / "textures.bin").write_bytes(b"small model")
+    return tmp_path
+
+
+def test_keys_are_content_addressed(resources):
+    asset_keys = hash_directory(str(resources))
+    assert asset_keys["models/small.glb"] == bytes_key(b"small model", ".glb")
+    assert asset_keys["textures.bin"] == bytes_key(b"small model", ".bin")
+    assert list(asset_keys) == ["textures.bin", "models/large.glb", "models/small.glb"]
+
+
+def test_directory_is_staged_under_its_keys(resources, tmp_path_factory):
+    staging_dir = tmp_path_factory.mktemp("staging")
+    (staging_dir / "stale.glb").write_bytes(b"removed")
+    asset_keys = stage_directory(str(resources), str(staging_dir))
+    assert asset_keys == hash_directory(str(resources))
+    # files with the same content share a key
+    staged = sorted(
+        str(p.relative_to(staging_dir)) for p in staging_dir.rglob("*") if p.is_file()
+    )
+    assert staged == sorted(set(asset_keys.values()))
+    large = staging_dir / asset_keys["models/large.glb"]
+    assert large.read_bytes() == bytes(range(256)) * 100
+
+
+def test_scene_refers_to_content_addressed_keys(resources):
+    (resources / "models" / "animated_wind_turbine.glb").write_bytes(b"turbine")
+    asset_keys = hash_directory(str(resources))
+    site = load_site(
+        "tests/unit/farm.yaml", "tests/unit/base.json", BUCKET_PLACEHOLDER, asset_keys
+    )
+    scene_key = site.scene_key()
+    assert scene_key.startswith("cas/") and scene_key.endswith(".json")
+
+    uris = {
+        component["uri"]
+        for node in json.loads(render_scene(site.scene_content, "my-bucket"))["nodes"]
+        for component in node["components"]
+        if "uri" in component
+    }
+    assert uris == {f"s3://my-bucket/{bytes_key(b'turbine', '.glb')}"}
@@ -1,11 +1,16 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+import re
+
 import pytest
 
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
+from twinmaker_builder.cfn import make_logical_id
+
 from .dummy_stack import DummyStack
 
 
@@ -55,3 +60,73 @@ def test_turbine(stack):
             "Components": {},
         },
     )
+
+
+def test_turbine_components_are_bound_from_the_model(stack):
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties(
+        "AWS::IoTTwinMaker::Entity",
+        {
+            "EntityName": "turbine_rect_1",
+            "Components": {
+                "TurbineFan": {
+                    "ComponentTypeId": "com.aws.sample.component.random",
+                    "Properties": {
+                        "min": {"Value": {"DoubleValue": 50}},
+                        "max": {"Value": {"DoubleValue": 150}},
+                    },
+                }
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IoTTwinMaker::Entity",
+        {
+            "EntityName": "turbine5",
+            "Components": {
+                "TurbineFan": {
+                    "Properties": {
+                        "min": {"Value": {"DoubleValue": 50}},
+                        "max": {"Value": {"DoubleValue": 200}},
+                    },
+                }
+            },
+        },
+    )
+
+
+def test_component_structures_are_shared_per_signature():
+    app = core.App()
+    stack = DummyStack(app, "test", filename="tests/unit/farm.yaml")
+    visitor = stack.node.find_child("WindFarm")
+    # one structure for the default bindings, one for the turbine overriding max
+    assert len(visitor._components_by_signature) == 2
+
+
+def entities_of(stack):
+    resources = assertions.Template.from_stack(stack).find_resources(
+        "AWS::IoTTwinMaker::Entity"
+    )
+    return {
+        logical_id: (resource["Properties"], sorted(resource.get("DependsOn", [])))
+        for logical_id, resource in resources.items()
+    }
+
+
+def test_raw_mode_emits_the_same_entities(stack):
+    app = core.App()
+    raw_stack = DummyStack(app, "test", filename="tests/unit/farm.yaml", raw=True)
+    expected = entities_of(stack)
+    assert len(expected) > 1
+    assert entities_of(raw_stack) == expected
+    # the included template is kept with the synthesized ones
+    assert [f for f in os.listdir(app.outdir) if f.endswith(".entities.json")]
+
+
+def test_logical_id():
+    assert make_logical_id(["WindFarm"]) == "WindFarm"
+    logical_id = make_logical_id(["WindFarm", "Turbine turbine1"])
+    assert re.fullmatch("WindFarmTurbineturbine1[0-9A-F]{8}", logical_id)
+    # the "Resource" ID is hidden from the human part
+    assert re.fullmatch("Bucket[0-9A-F]{8}", make_logical_id(["Bucket", "Resource"]))
@@ -0,0 +1,197 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.columnar_store import (  # noqa: E402
+    ColumnarStoreReader,
+    ColumnarStoreWriter,
+)
+from udq_utils.sqlite_reader import SQLiteReader  # noqa: E402
+from udq_utils.udq_models import IoTTwinMakerUdqRequest  # noqa: E402
+
+COMPONENT_TYPE = "com.aws.sample.component.random"
+START_NS = 1668522782 * 10**9
+SECOND = 10**9
+
+
+@pytest.fixture()
+def reader(tmp_path):
+    with ColumnarStoreWriter(str(tmp_path)) as writer:
+        for turbine in range(2):
+            # written out of order on purpose, the writer sorts by time
+            timestamps = [START_NS + i * SECOND for i in reversed(range(10))]
+            writer.write_series(
+                COMPONENT_TYPE,
+                f"urn:ngsi-ld:Turbine:turbine{turbine}",
+                "TurbineFan",
+                "speed",
+                timestamps,
+                [float(i) for i in reversed(range(10))],
+            )
+    reader = ColumnarStoreReader(str(tmp_path))
+    yield reader
+    reader.close()
+
+
+def make_event(entity_id=None, **extra):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "selectedProperties": ["speed"],
+        "properties": {"speed": {"definition": {"dataType": {"type": "DOUBLE"}}}},
+        # the point at the start time is excluded, the one at the end time included
+        "startTime": "2022-11-15T14:33:02Z",
+        "endTime": "2022-11-15T14:33:06Z",
+    }
+    if entity_id:
+        event["entityId"] = entity_id
+        event["componentName"] = "TurbineFan"
+    else:
+        event["componentTypeId"] = COMPONENT_TYPE
+    event.update(extra)
+    return event
+
+
+def values_of(result):
+    return [
+        [(v["time"], float(v["value"]["doubleValue"])) for v in p["values"]]
+        for p in result["propertyValues"]
+    ]
+
+
+def test_entity_query_range(reader):
+    result = reader.process_query(make_event("urn:ngsi-ld:Turbine:turbine1"))
+    assert values_of(result) == [
+        [
+            ("2022-11-15T14:33:03.000Z", 1.0),
+            ("2022-11-15T14:33:04.000Z", 2.0),
+            ("2022-11-15T14:33:05.000Z", 3.0),
+            ("2022-11-15T14:33:06.000Z", 4.0),
+        ]
+    ]
+    assert result["nextToken"] is None
+
+
+def test_descending_order_and_filters(reader):
+    event = make_event(
+        "urn:ngsi-ld:Turbine:turbine0",
+        orderByTime="DESCENDING",
+        propertyFilters=[
+            {
+                "propertyName": "speed",
+                "operator": "NOT_EQUAL",
+                "value": {"doubleValue": "3"},
+            }
+        ],
+    )
+    assert [v for _, v in values_of(reader.process_query(event))[0]] == [4.0, 2.0, 1.0]
+
+
+def test_component_type_query_is_paginated_by_the_framework(reader):
+    pages, token = [], None
+    while True:
+        event = make_event(maxResults=3)
+        if token:
+            event["nextToken"] = token
+        result = reader.process_query(event)
+        pages.append(sum(len(p["values"]) for p in result["propertyValues"]))
+        token = result["nextToken"]
+        if not token:
+            break
+    assert pages == [3, 3, 2]
+
+
+def test_start_time_is_exclusive_for_every_reader(reader):
+    sqlite_reader = SQLiteReader()
+    sqlite_reader.ingest(
+        COMPONENT_TYPE,
+        [
+            (
+                "urn:ngsi-ld:Turbine:turbine0",
+                "TurbineFan",
+                "speed",
+                START_NS + i * SECOND,
+                float(i),
+            )
+            for i in range(10)
+        ],
+    )
+    # a point stored exactly at the start time
+    event = make_event(
+        "urn:ngsi-ld:Turbine:turbine0",
+        startTime="2022-11-15T14:33:03Z",
+        endTime="2022-11-15T14:33:04Z",
+    )
+    for udq_reader in (reader, sqlite_reader):
+        assert values_of(udq_reader.process_query(dict(event))) == [
+            [("2022-11-15T14:33:04.000Z", 2.0)]
+        ]
+    sqlite_reader.close()
+
+
+def test_unknown_entity(reader):
+    assert reader.process_query(make_event("unknown"))["propertyValues"] == []
+
+
+def test_response_size_limit_resumes_inside_a_series(reader, monkeypatch):
+    monkeypatch.setattr(ColumnarStoreReader, "max_response_bytes", 400)
+    points, token = [], None
+    while True:
+        event = make_event("urn:ngsi-ld:Turbine:turbine0")
+        if token:
+            event["nextToken"] = token
+        result = reader.process_query(event)
+        assert result["propertyValues"]
+        points.extend(values_of(result)[0])
+        token = result["nextToken"]
+        if not token:
+            break
+    assert [v for _, v in points] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_close_while_a_response_is_referenced(reader):
+    request = IoTTwinMakerUdqRequest.parse(make_event("urn:ngsi-ld:Turbine:turbine1"))
+    response = reader.entity_query(request)
+
+    reader.close()
+    # the mapping outlives the reader until the response is released
+    assert list(response.series[0].values) == [1.0, 2.0, 3.0, 4.0]
+    del response
+
+
+def test_value_types_by_component_type(tmp_path):
+    with ColumnarStoreWriter(str(tmp_path)) as writer:
+        writer.write_series(
+            "com.example.counter",
+            "counter",
+            "Main",
+            "value",
+            [START_NS + 2 * SECOND],
+            [3],
+            "q",
+        )
+        writer.write_series(
+            "com.example.gauge",
+            "gauge",
+            "Main",
+            "value",
+            [START_NS + 2 * SECOND],
+            [0.5],
+        )
+    reader = ColumnarStoreReader(str(tmp_path))
+    for entity_id, expected in (("counter", [3]), ("gauge", [0.5])):
+        event = make_event(
+            entity_id,
+            componentName="Main",
+            selectedProperties=["value"],
+            properties={"value": {"definition": {"dataType": {"type": "DOUBLE"}}}},
+        )
+        request = IoTTwinMakerUdqRequest.parse(event)
+        series = reader.entity_query(request).series
+        assert list(series[0].values) == expected
+    reader.close()
@@ -39,3 +39,21 @@ def test_farm_has_turbine(farm):
     turbine = group.items[0]
     assert turbine.device_code == "0x01"
     assert turbine.parent.shape == "rectangle"
+
+
+def test_component_bindings(farm):
+    turbine = farm.items[0].items[0]
+    assert turbine.root is farm
+    binding = turbine.component_bindings()["TurbineFan"]
+    assert binding.component_type_id == "com.aws.sample.component.random"
+    assert binding.properties == {
+        "min": {"double_value": 50},
+        "max": {"double_value": 150},
+    }
+
+    overridden = farm.items[1].items[2].component_bindings()["TurbineFan"]
+    assert overridden.properties["max"] == {"double_value": 200}
+    assert overridden.signature != binding.signature
+
+    # groups have no bindings
+    assert farm.items[0].component_bindings() == {}
@@ -0,0 +1,298 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import struct
+
+import pytest
+
+from twinmaker_builder import gltf
+from twinmaker_builder.gltf import GLB, optimize_glb, optimize_resources
+
+TURBINE = "twinmaker_resources/models/animated_wind_turbine.glb"
+
+
+def grid_model(size=10, meshes=1, extensions=None) -> bytes:
+    """A GLB with size x size quads in the [0, 20] x [0, 20] square, two texture coordinate sets
+    (the material uses the first one), 32 bits indices and an accessor nothing refers to"""
+    positions, normals, uvs, indices = [], [], [], []
+    for y in range(size + 1):
+        for x in range(size + 1):
+            positions += [x * 20 / size, y * 20 / size, 1.0]
+            normals += [0.0, 0.0, 1.0]
+            uvs += [x / size, y / size]
+    for y in range(size):
+        for x in range(size):
+            a = y * (size + 1) + x
+            indices += [a, a + 1, a + size + 2, a, a + size + 2, a + size + 1]
+
+    chunks = [
+        (struct.pack(f"<{len(positions)}f", *positions), "VEC3", 5126),
+        (struct.pack(f"<{len(normals)}f", *normals), "VEC3", 5126),
+        (struct.pack(f"<{len(uvs)}f", *uvs), "VEC2", 5126),
+        (struct.pack(f"<{len(uvs)}f", *uvs), "VEC2", 5126),
+        (struct.pack(f"<{len(indices)}I", *indices), "SCALAR", 5125),
+        (struct.pack("<3f", 0, 0, 0), "VEC3", 5126),
+    ]
+    binary = b""
+    views, accessors = [], []
+    for data, accessor_type, component_type in chunks:
+        views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": len(data)})
+        count = len(data) // (4 * gltf._COMPONENTS[accessor_type])
+        accessors.append(
+            {
+                "bufferView": len(views) - 1,
+                "componentType": component_type,
+                "count": count,
+                "type": accessor_type,
+            }
+        )
+        binary += data
+    accessors[0]["min"] = [0.0, 0.0, 1.0]
+    accessors[0]["max"] = [20.0, 20.0, 1.0]
+    primitive = {
+        "attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2, "TEXCOORD_1": 3},
+        "indices": 4,
+        "material": 0,
+    }
+    document = {
+        "asset": {"version": "2.0", "extras": {"license": "CC-BY-4.0"}},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(meshes))}],
+        "nodes": [{"mesh": m, "translation": [m * 30, 0, 0]} for m in range(meshes)],
+        "meshes": [{"primitives": [dict(primitive)]} for _ in range(meshes)],
+        "materials": [{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}}],
+        "textures": [{"source": 0}],
+        "images": [{"uri": "texture.png"}],
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    if extensions:
+        document["extensionsUsed"] = extensions
+    return GLB(document, binary).to_bytes()
+
+
+def test_glb_round_trip():
+    data = grid_model()
+    glb = GLB.parse(data)
+    assert glb.to_bytes() == data
+    assert glb.read_accessor(0)[-1] == (20.0, 20.0, 1.0)
+
+    with pytest.raises(Exception, match="glTF 2.0"):
+        GLB.parse(b"PNG0" + data[4:])
+
+
+def test_unused_data_is_stripped():
+    optimized = GLB.parse(optimize_glb(grid_model(), quantize=False))
+    document = optimized.document
+    primitive = document["meshes"][0]["primitives"][0]
+
+    assert set(primitive["attributes"]) == {"POSITION", "NORMAL", "TEXCOORD_0"}
+    assert len(document["accessors"]) == 4
+    # 121 vertices: 16 bits indices
+    indices = document["accessors"][primitive["indices"]]
+    assert indices["componentType"] == 5123
+    assert document["bufferViews"][indices["bufferView"]]["target"] == 34963
+    # the attribution of the model is kept
+    assert document["asset"]["extras"] == {"license": "CC-BY-4.0"}
+
+
+def test_quantized_positions_are_restored_by_the_node_transform():
+    original = GLB.parse(grid_model())
+    optimized = GLB.parse(optimize_glb(grid_model()))
+    document = optimized.document
+    assert "KHR_mesh_quantization" in document["extensionsRequired"]
+
+    # the mesh moved to a child node holding the dequantization transform
+    parent = document["nodes"][0]
+    assert "mesh" not in parent and parent["translation"] == [0, 0, 0]
+    node = document["nodes"][parent["children"][0]]
+    assert node["mesh"] == 0
+
+    attributes = document["meshes"][0]["primitives"][0]["attributes"]
+    position = document["accessors"][attributes["POSITION"]]
+    assert (position["componentType"], position["normalized"]) == (5122, True)
+    # vertex attributes aligned on 4 bytes
+    assert document["bufferViews"][position["bufferView"]]["byteStride"] == 8
+    assert document["accessors"][attributes["NORMAL"]]["componentType"] == 5120
+
+    scale = node["scale"][0]
+    for restored, expected in zip(
+        optimized.read_accessor(attributes["POSITION"]), original.read_accessor(0)
+    ):
+        for r, e, t in zip(restored, expected, node["translation"]):
+            assert r * scale + t == pytest.approx(e, abs=scale / 32767)
+    for restored, expected in zip(
+        optimized.read_accessor(attributes["TEXCOORD_0"]), original.read_accessor(2)
+    ):
+        assert restored == pytest.approx(expected, abs=1 / 65535)
+
+
+def test_identical_buffers_are_stored_once():
+    document = GLB.parse(optimize_glb(grid_model(meshes=3))).document
+    assert len(document["accessors"]) == 4
+    assert len(document["bufferViews"]) == 4
+    assert len(document["nodes"]) == 6
+
+
+def test_models_with_unsupported_extensions_are_left_as_is():
+    data = grid_model(extensions=["KHR_draco_mesh_compression"])
+    assert optimize_glb(data) == data
+
+
+def test_simplified_variant():
+    original = GLB.parse(grid_model(size=20))
+    simplified = GLB.parse(optimize_glb(grid_model(size=20), simplify=0.25))
+    primitive = simplified.document["meshes"][0]["primitives"][0]
+    triangles = simplified.document["accessors"][primitive["indices"]]["count"] // 3
+
+    assert 0 < triangles <= original.document["accessors"][4]["count"] // 3 * 0.25
+    indices = simplified.read_accessor(primitive["indices"])
+    vertex_count = simplified.document["accessors"][
+        primitive["attributes"]["POSITION"]
+    ]["count"]
+    assert {i for (i,) in indices} == set(range(vertex_count))
+
+
+def test_turbine_model_is_lighter():
+    with open(TURBINE, "rb") as file:
+        data = file.read()
+    original = GLB.parse(data)
+    optimized = GLB.parse(optimize_glb(data))
+
+    assert len(optimized.binary) < len(original.binary) - 100_000
+    assert optimized.document["asset"] == original.document["asset"]
+    assert len(optimized.document["animations"]) == 1
+    assert len(optimized.document["images"]) == len(original.document["images"])
+
+
+def test_optimize_resources(tmp_path, monkeypatch):
+    source = tmp_path / "resources"
+    (source / "models").mkdir(parents=True)
+    (source / "models" / "grid.glb").write_bytes(grid_model())
+    (source / "notes.txt").write_text("as is")
+    destination = tmp_path / "build"
+    (destination / "models").mkdir(parents=True)
+    (destination / "models" / "removed.glb").write_bytes(b"stale")
+    cache = tmp_path / "cache"
+
+    produced = optimize_resources(
+        str(source), str(destination), str(cache), lod_ratios=[0.5]
+    )
+    assert set(produced) == {"models/grid.glb", "models/grid.lod1.glb", "notes.txt"}
+    assert not (destination / "models" / "removed.glb").exists()
+    assert (destination / "notes.txt").read_text() == "as is"
+    optimized = (destination / "models" / "grid.glb").read_bytes()
+    assert optimized == optimize_glb(grid_model())
+
+    # models are optimized again only when they change
+    calls = []
+    monkeypatch.setattr(
+        gltf, "optimize_glb", lambda data, *args: calls.append(args) or data
+    )
+    optimize_resources(str(source), str(destination), str(cache), lod_ratios=[0.5])
+    assert calls == []
+    assert (destination / "models" / "grid.glb").read_bytes() == optimized
+
+    (source / "models" / "grid.glb").write_bytes(grid_model(size=4))
+    optimize_resources(str(source), str(destination), str(cache))
+    assert calls == [(True, None)]
+    assert not (destination / "models" / "grid.lod1.glb").exists()
+
+
+def add_accessor(
+    glb: GLB, values: list, accessor_type="VEC3", component_type=5126, normalized=False
+) -> int:
+    """Append an accessor (float by default) to a model, return its index"""
+    data = struct.pack(f"<{len(values)}{gltf._FORMATS[component_type]}", *values)
+    glb.binary += b"\0" * (-len(glb.binary) % 4)
+    glb.document["bufferViews"].append(
+        {"buffer": 0, "byteOffset": len(glb.binary), "byteLength": len(data)}
+    )
+    glb.binary += data
+    glb.document["buffers"][0]["byteLength"] = len(glb.binary)
+    accessor = {
+        "bufferView": len(glb.document["bufferViews"]) - 1,
+        "componentType": component_type,
+        "count": len(values) // gltf._COMPONENTS[accessor_type],
+        "type": accessor_type,
+    }
+    if normalized:
+        accessor["normalized"] = True
+    glb.document["accessors"].append(accessor)
+    return len(glb.document["accessors"]) - 1
+
+
+def test_skinned_and_colored_attributes_keep_their_types():
+    glb = GLB.parse(grid_model())
+    vertices = 11 * 11
+    attributes = glb.document["meshes"][0]["primitives"][0]["attributes"]
+    attributes["JOINTS_0"] = add_accessor(
+        glb, [i % 4 for i in range(vertices * 4)], "VEC4", 5121
+    )
+    attributes["WEIGHTS_0"] = add_accessor(
+        glb, [255, 0, 0, 0] * vertices, "VEC4", 5121, normalized=True
+    )
+    attributes["COLOR_0"] = add_accessor(
+        glb, [65535, 32768, 0, 65535] * vertices, "VEC4", 5123, normalized=True
+    )
+    glb.document["skins"] = [{"joints": [0]}]
+    glb.document["nodes"][0]["skin"] = 0
+
+    optimized = GLB.parse(optimize_glb(glb.to_bytes()))
+    accessors = optimized.document["accessors"]
+    attributes = optimized.document["meshes"][0]["primitives"][0]["attributes"]
+    types = {
+        name: (
+            accessors[attributes[name]]["componentType"],
+            accessors[attributes[name]].get("normalized", False),
+        )
+        for name in ("JOINTS_0", "WEIGHTS_0", "COLOR_0")
+    }
+    assert types == {
+        "JOINTS_0": (5121, False),
+        "WEIGHTS_0": (5121, True),
+        "COLOR_0": (5123, True),
+    }
+    assert optimized.read_accessor(attributes["JOINTS_0"])[:2] == [(0, 1, 2, 3)] * 2
+    assert optimized.read_accessor(attributes["COLOR_0"])[0] == (
+        1.0,
+        32768 / 65535,
+        0.0,
+        1.0,
+    )
+    assert len(optimized.binary) < len(glb.binary)
+
+
+@pytest.mark.parametrize("simplify", [None, 0.25])
+def test_morph_targets_are_rewritten(simplify):
+    glb = GLB.parse(grid_model(size=20))
+    # every vertex moves up by its index
+    displacements = [c for i in range(21 * 21) for c in (0.0, 0.0, float(i))]
+    target = add_accessor(glb, displacements)
+    glb.document["meshes"][0]["primitives"][0]["targets"] = [{"POSITION": target}]
+    glb.document["meshes"][0]["weights"] = [0.5]
+
+    optimized = GLB.parse(optimize_glb(glb.to_bytes(), simplify=simplify))
+    primitive = optimized.document["meshes"][0]["primitives"][0]
+    # not quantized, the displacement of each vertex stays with it
+    assert "KHR_mesh_quantization" not in optimized.document.get("extensionsUsed", [])
+    positions = optimized.read_accessor(primitive["attributes"]["POSITION"])
+    moved = optimized.read_accessor(primitive["targets"][0]["POSITION"])
+    assert len(moved) == len(positions)
+    for (x, y, _), (_, _, dz) in zip(positions, moved):
+        assert dz == round(y) * 21 + round(x)
+    assert "min" in optimized.document["accessors"][primitive["targets"][0]["POSITION"]]
+
+
+def test_empty_accessors():
+    glb = GLB.parse(grid_model())
+    glb.document["meshes"].append(
+        {"primitives": [{"attributes": {"POSITION": add_accessor(glb, [])}}]}
+    )
+    glb.document["nodes"].append({"mesh": 1})
+
+    optimized = GLB.parse(optimize_glb(glb.to_bytes(), simplify=0.5))
+    primitive = optimized.document["meshes"][1]["primitives"][0]
+    assert optimized.read_accessor(primitive["attributes"]["POSITION"]) == []
+    assert optimized.document["nodes"][1] == {"mesh": 1}
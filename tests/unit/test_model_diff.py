@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import copy
+
+import pytest
+import yaml
+
+from twinmaker_builder.diff import diff_models, index_model
+from wind_farm.wind_farm import WindFarm
+
+
+@pytest.fixture()
+def description():
+    with open("tests/unit/farm.yaml") as file:
+        return yaml.safe_load(file)
+
+
+def diff_with(description, change):
+    new_description = copy.deepcopy(description)
+    change(new_description)
+    return diff_models(WindFarm(description), WindFarm(new_description))
+
+
+def test_same_model_has_no_difference(description):
+    diff = diff_with(description, lambda d: None)
+    assert diff.is_empty()
+    assert diff.updated_objects() == []
+
+
+def test_changed_field(description):
+    def change(d):
+        d["items"][0]["items"][1]["device_code"] = "0x42"
+
+    diff = diff_with(description, change)
+    assert [c.new.name for c in diff.changed] == ["turbine_rect_2"]
+    assert diff.changed[0].fields == {"device_code": ("0x02", "0x42")}
+    assert not (diff.added or diff.removed or diff.moved)
+
+
+def test_changed_component_bindings(description):
+    def change(d):
+        d["component_bindings"]["Turbine"]["TurbineFan"]["properties"]["min"] = {
+            "double_value": 0
+        }
+
+    diff = diff_with(description, change)
+    # every turbine is bound to the declaration, groups are not
+    assert len(diff.changed) == 5
+    old, new = diff.changed[0].fields["component_bindings"]
+    assert old["TurbineFan"]["properties"]["min"] == {"double_value": 50}
+    assert new["TurbineFan"]["properties"]["min"] == {"double_value": 0}
+
+
+def test_added_removed_and_moved(description):
+    def change(d):
+        group1, group2 = d["items"]
+        group2["items"].append(group1["items"].pop())
+        del group2["items"][0]
+        group1["items"].append({"name": "turbine6", "type": "Turbine"})
+
+    diff = diff_with(description, change)
+    assert [o.name for o in diff.added] == ["turbine6"]
+    assert [o.name for o in diff.removed] == ["turbine3"]
+    assert [(m.obj.name, m.old_parent_urn, m.new_parent_urn) for m in diff.moved] == [
+        (
+            "turbine_rect_2",
+            "urn:ngsi-ld:TurbineGroup:group1",
+            "urn:ngsi-ld:TurbineGroup:group2",
+        )
+    ]
+    assert diff.changed == []
+    assert [o.name for o in diff.updated_objects()] == ["turbine6", "turbine_rect_2"]
+
+
+def test_removed_subtree_lists_parents_first(description):
+    diff = diff_with(description, lambda d: d["items"].pop())
+    assert [o.name for o in diff.removed] == [
+        "group2",
+        "turbine3",
+        "turbine4",
+        "turbine5",
+    ]
+
+
+def test_index_is_keyed_by_urn_parents_first(description):
+    index = index_model(WindFarm(description))
+    urns = list(index)
+    assert urns[0] == "urn:ngsi-ld:WindFarm:ACMEWindFarm"
+    assert urns.index("urn:ngsi-ld:TurbineGroup:group2") < urns.index(
+        "urn:ngsi-ld:Turbine:turbine3"
+    )
+    assert index["urn:ngsi-ld:Turbine:turbine3"].parent_urn == (
+        "urn:ngsi-ld:TurbineGroup:group2"
+    )
+
+
+def test_duplicate_urn(description):
+    description["items"][1]["items"][0]["name"] = "turbine_rect_1"
+    with pytest.raises(Exception, match="Duplicate URN"):
+        index_model(WindFarm(description))
@@ -0,0 +1,72 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from wind_farm.wind_farm import Turbine, TurbineGroup, WindFarm
+
+
+@pytest.fixture()
+def farm():
+    return WindFarm.load_from_yaml("tests/unit/farm.yaml", WindFarm)
+
+
+def names(objects):
+    return [obj.name for obj in objects]
+
+
+def test_find_by_urn(farm):
+    turbine = farm.find("urn:ngsi-ld:Turbine:turbine4")
+    assert turbine.name == "turbine4"
+    assert turbine.parent.name == "group2"
+    assert farm.find("urn:ngsi-ld:Turbine:unknown") is None
+
+
+def test_query_by_type(farm):
+    assert names(farm.query(type=TurbineGroup)) == ["group1", "group2"]
+    assert len(farm.query(type="Turbine")) == 5
+    assert farm.query(type="Unknown") == []
+
+
+def test_query_by_field(farm):
+    assert names(farm.query(device_code="0x03")) == ["turbine3"]
+    assert names(farm.query(type=Turbine, name="turbine_rect_2")) == ["turbine_rect_2"]
+    assert names(farm.query(shape="circle")) == ["group2"]
+    # unhashable values are compared one by one
+    assert names(farm.query(model={"position": {"x": 0, "y": 0, "z": 15}})) == [
+        "group1"
+    ]
+
+
+def test_query_within_subtree(farm):
+    group2 = farm.items[1]
+    assert names(farm.query(type=Turbine, within=group2)) == [
+        "turbine3",
+        "turbine4",
+        "turbine5",
+    ]
+    assert farm.query(device_code="0x01", within=group2) == []
+    assert names(farm.query(parent=group2)) == ["turbine3", "turbine4", "turbine5"]
+    assert names(farm.model_index.subtree(farm.items[0])) == [
+        "group1",
+        "turbine_rect_1",
+        "turbine_rect_2",
+    ]
+
+
+def test_reindex_after_changes(farm):
+    group1 = farm.items[0]
+    assert len(farm.query(type=Turbine, within=group1)) == 2
+    group1.items.append(Turbine({"name": "turbine6"}, parent=group1))
+    farm.reindex()
+    assert len(farm.query(type=Turbine, within=group1)) == 3
+
+
+def test_index_in_parent(farm):
+    group2 = farm.items[1]
+    assert [turbine.index for turbine in group2.items] == [0, 1, 2]
+    # still right once the items change
+    group2.items.reverse()
+    assert [turbine.name for turbine in group2.items if turbine.index == 0] == [
+        "turbine5"
+    ]
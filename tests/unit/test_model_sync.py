@@ -0,0 +1,279 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import threading
+
+import pytest
+
+from twinmaker_builder.sync import SyncReport, TokenBucket, TwinMakerSync
+from wind_farm.wind_farm import WindFarm
+
+
+class ClientError(Exception):
+    """Mimics botocore.exceptions.ClientError"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeTwinMakerClient:
+    """In-memory stand-in of the boto3 iottwinmaker client, enforcing the parent-child constraints"""
+
+    def __init__(self):
+        self.entities = {}
+        self.calls = []
+        # entity_id -> error codes raised by the next calls on that entity
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def _record(self, method, entity_id):
+        with self._lock:
+            self.calls.append((method, entity_id))
+            failures = self.failures.get(entity_id)
+            if failures:
+                raise ClientError(failures.pop(0))
+
+    def create_entity(self, workspaceId, entityId, entityName, components, **kwargs):
+        self._record("create_entity", entityId)
+        if entityId in self.entities:
+            raise ClientError("ConflictException")
+        parent = kwargs.get("parentEntityId")
+        if parent and parent not in self.entities:
+            raise ClientError("ValidationException")
+        self.entities[entityId] = {
+            "entityName": entityName,
+            "parentEntityId": parent or "$ROOT",
+            "components": {
+                name: {
+                    "componentTypeId": c["componentTypeId"],
+                    "properties": {p: v["value"] for p, v in c["properties"].items()},
+                }
+                for name, c in components.items()
+            },
+        }
+        return {"entityId": entityId, "state": "CREATING"}
+
+    def update_entity(self, workspaceId, entityId, componentUpdates, **kwargs):
+        self._record("update_entity", entityId)
+        entity = self.entities[entityId]
+        entity["entityName"] = kwargs.get("entityName", entity["entityName"])
+        parent_update = kwargs.get("parentEntityUpdate")
+        if parent_update:
+            entity["parentEntityId"] = parent_update.get("parentEntityId", "$ROOT")
+        for name, update in componentUpdates.items():
+            if update["updateType"] == "DELETE":
+                del entity["components"][name]
+                continue
+            component = entity["components"].setdefault(
+                name, {"componentTypeId": update["componentTypeId"], "properties": {}}
+            )
+            for property_name, property_update in update["propertyUpdates"].items():
+                if property_update["updateType"] == "RESET_VALUE":
+                    component["properties"].pop(property_name, None)
+                else:
+                    component["properties"][property_name] = property_update["value"]
+        return {"state": "UPDATING"}
+
+    def delete_entity(self, workspaceId, entityId, isRecursive):
+        self._record("delete_entity", entityId)
+        if entityId not in self.entities:
+            raise ClientError("ResourceNotFoundException")
+        if any(e["parentEntityId"] == entityId for e in self.entities.values()):
+            raise ClientError("ValidationException")
+        del self.entities[entityId]
+        return {"state": "DELETING"}
+
+    def get_entity(self, workspaceId, entityId):
+        self._record("get_entity", entityId)
+        return dict(self.entities[entityId], entityId=entityId)
+
+    def list_entities(self, workspaceId, nextToken=None):
+        self._record("list_entities", None)
+        return {
+            "entitySummaries": [
+                {"entityId": entity_id, "parentEntityId": e["parentEntityId"]}
+                for entity_id, e in self.entities.items()
+            ]
+        }
+
+
+def farm(change=None):
+    description = {
+        "name": "ACME WindFarm",
+        "component_bindings": {
+            "Turbine": {
+                "TurbineFan": {
+                    "component_type": "com.aws.sample.component.random",
+                    "properties": {
+                        "min": {"double_value": 50},
+                        "max": {"double_value": 150},
+                    },
+                }
+            }
+        },
+        "items": [
+            {
+                "name": f"group{g}",
+                "type": "TurbineGroup",
+                "items": [
+                    {"name": f"turbine{g}{t}", "type": "Turbine"} for t in range(3)
+                ],
+            }
+            for g in range(2)
+        ],
+    }
+    if change:
+        change(description)
+    return WindFarm(description)
+
+
+@pytest.fixture()
+def client():
+    return FakeTwinMakerClient()
+
+
+def make_sync(client, tmp_path, **kwargs):
+    return TwinMakerSync(
+        client,
+        "windfarm-sample",
+        state_file=str(tmp_path / "state.json"),
+        sleep=lambda seconds: None,
+        **kwargs,
+    )
+
+
+def test_initial_sync_creates_parents_first(client, tmp_path):
+    report = make_sync(client, tmp_path).sync(farm())
+    assert report.created == 9
+    assert len(client.entities) == 9
+    turbine = client.entities["urn:ngsi-ld:Turbine:turbine01"]
+    assert turbine["parentEntityId"] == "urn:ngsi-ld:TurbineGroup:group0"
+    assert turbine["components"]["TurbineFan"]["properties"]["max"] == {
+        "doubleValue": 150
+    }
+
+    with open(tmp_path / "state.json") as file:
+        state = json.load(file)
+    assert state["workspace_id"] == "windfarm-sample"
+    assert len(state["entities"]) == 9
+
+
+def test_unchanged_model_makes_no_call(client, tmp_path):
+    make_sync(client, tmp_path).sync(farm())
+    client.calls.clear()
+    report = make_sync(client, tmp_path).sync(farm())
+    assert client.calls == []
+    assert report.unchanged == 9
+
+
+def test_updates_moves_and_deletes(client, tmp_path):
+    make_sync(client, tmp_path).sync(farm())
+
+    def change(description):
+        bindings = description["component_bindings"]["Turbine"]["TurbineFan"]
+        bindings["properties"]["max"] = {"double_value": 200}
+        group0, group1 = description["items"]
+        # move turbine10 to group0 and remove group1
+        group0["items"].append(group1["items"][0])
+        del description["items"][1]
+
+    client.calls.clear()
+    report = make_sync(client, tmp_path).sync(farm(change))
+    assert (report.updated, report.deleted) == (4, 3)
+
+    moved = client.entities["urn:ngsi-ld:Turbine:turbine10"]
+    assert moved["parentEntityId"] == "urn:ngsi-ld:TurbineGroup:group0"
+    assert moved["components"]["TurbineFan"]["properties"]["max"] == {
+        "doubleValue": 200
+    }
+    assert "urn:ngsi-ld:TurbineGroup:group1" not in client.entities
+    # children are deleted before their parent
+    deletes = [
+        entity_id for method, entity_id in client.calls if method == "delete_entity"
+    ]
+    assert deletes[-1] == "urn:ngsi-ld:TurbineGroup:group1"
+
+
+def test_throttling_is_retried(client, tmp_path):
+    client.failures["urn:ngsi-ld:Turbine:turbine02"] = ["ThrottlingException"] * 2
+    report = make_sync(client, tmp_path).sync(farm())
+    assert report.created == 9
+    assert report.retries == 2
+
+
+def test_interrupted_sync_resumes(client, tmp_path):
+    client.failures["urn:ngsi-ld:TurbineGroup:group1"] = ["AccessDeniedException"]
+    with pytest.raises(Exception, match="1 operations failed"):
+        make_sync(client, tmp_path).sync(farm())
+    # the failing level completed, the next ones were not started
+    assert len(client.entities) == 2
+
+    client.calls.clear()
+    report = make_sync(client, tmp_path).sync(farm())
+    assert (report.created, report.unchanged) == (7, 2)
+    assert len(client.entities) == 9
+
+
+def test_killed_sync_resumes(client, tmp_path):
+    make_sync(client, tmp_path).sync(farm(lambda d: d["items"].pop()))
+    # a run killed before its last save: the state only records the first entities it applied
+    with open(tmp_path / "state.json") as file:
+        state = json.load(file)
+    state["entities"] = dict(list(state["entities"].items())[:2])
+    with open(tmp_path / "state.json", "w") as file:
+        json.dump(state, file)
+
+    client.calls.clear()
+    report = make_sync(client, tmp_path).sync(farm())
+    # entities already there are updated, without retrying the conflicts
+    assert (report.created, report.updated, report.retries) == (4, 3, 0)
+    creates = [e for method, e in client.calls if method == "create_entity"]
+    assert len(creates) == len(set(creates)) == 7
+    assert len(client.entities) == 9
+
+
+def test_state_is_saved_within_a_level(client, tmp_path, monkeypatch):
+    sync = make_sync(client, tmp_path, max_workers=1, checkpoint_every=2)
+    saves = []
+    monkeypatch.setattr(sync, "_save_state", lambda applied: saves.append(len(applied)))
+    sync.sync(farm())
+    # checkpoints every two operations of a level, then the save at the end of the level
+    assert saves == [1, 3, 3, 5, 7, 9, 9]
+
+
+def test_move_to_the_root(client, tmp_path):
+    make_sync(client, tmp_path).sync(farm())
+    sync = make_sync(client, tmp_path)
+    sync._report = SyncReport()
+    entity_id = "urn:ngsi-ld:Turbine:turbine00"
+    entity = dict(sync.desired_entities(farm())[entity_id], parent=None)
+    sync._update(entity_id, entity, {"components": None, "parent": None})
+    assert client.entities[entity_id]["parentEntityId"] == "$ROOT"
+
+
+def test_sync_without_state_lists_the_workspace(client, tmp_path):
+    make_sync(client, tmp_path).sync(farm())
+    (tmp_path / "state.json").unlink()
+
+    sync = TwinMakerSync(client, "windfarm-sample", sleep=lambda seconds: None)
+    report = sync.sync(farm(lambda d: d["items"].pop()))
+    # existing entities are read and updated, those not in the model are deleted
+    assert (report.created, report.updated, report.deleted) == (0, 5, 4)
+    assert len(client.entities) == 5
+
+
+def test_token_bucket():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+    # two tokens from the burst, then one every 100 ms
+    assert sleeps == pytest.approx([0.1, 0.1])
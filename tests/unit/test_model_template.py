@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+import yaml
+
+from twinmaker_builder import ModelValidationError
+from twinmaker_builder.template import substitute
+from wind_farm.wind_farm import Turbine, WindFarm
+
+FARM = """
+name: Farm
+parameters: {spacing: 300, groups: 2}
+models:
+  turbine: {uri: turbine.glb, rotation: {x: 0, y: 90, z: 0}}
+items:
+- type: TurbineGroup
+  repeat: {index: g, count: "${groups}"}
+  name: group${g}
+  shape: rectangle
+  items:
+  - type: Turbine
+    repeat: {index: t, start: 1, count: 3}
+    name: turbine_${g}_${t}
+    device_code: "0x${g:02x}${t:04x}"
+    model:
+      use: turbine
+      position: {x: "${t * spacing}", y: "${g * 1000}", z: 0}
+- name: substation
+  type: TurbineGroup
+  model: turbine
+"""
+
+
+@pytest.fixture()
+def description():
+    return yaml.safe_load(FARM)
+
+
+def test_substitute():
+    assert substitute({"name": "t_${i:03d}", "x": "${i * 1.5}"}, {"i": 2}) == {
+        "name": "t_002",
+        "x": 3.0,
+    }
+    unchanged = {"name": "turbine", "model": {"position": {"x": 1}}}
+    assert substitute(unchanged, {"i": 2}) is unchanged
+
+
+@pytest.mark.parametrize(
+    "expression", ["${9**9**9}", "${__import__('os')}", "${i.real}"]
+)
+def test_unsupported_expressions(expression):
+    with pytest.raises(ModelValidationError, match="unsupported"):
+        substitute({"x": expression}, {"i": 2})
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["${'x' * 9999999999}", "${9999999999 * name}", "${(name + name) * i}"],
+)
+def test_repetitions_are_capped(expression):
+    with pytest.raises(ModelValidationError, match="repetition longer than"):
+        substitute({"x": expression}, {"i": 10**9, "name": "turbine"})
+    assert substitute({"x": "${'-' * 3}${name * 2}"}, {"name": "ab"}) == {
+        "x": "---abab"
+    }
+
+
+def test_templates_are_expanded_on_first_access(description):
+    farm = WindFarm(description)
+    assert farm._items == []
+
+    assert [group.name for group in farm.items] == ["group0", "group1", "substation"]
+    group1 = farm.items[1]
+    assert group1._items == []
+    turbine = group1.items[2]
+    assert type(turbine) == Turbine
+    assert (turbine.name, turbine.device_code, turbine.index) == (
+        "turbine_1_3",
+        "0x010003",
+        2,
+    )
+    assert turbine.model == {
+        "uri": "turbine.glb",
+        "rotation": {"x": 0, "y": 90, "z": 0},
+        "position": {"x": 900, "y": 1000, "z": 0},
+    }
+    assert farm.items[2].model is farm.models["turbine"]
+    assert len(farm.query(type=Turbine)) == 6
+
+
+def test_templates_are_validated_on_load(description):
+    turbines = description["items"][0]["items"][0]
+    turbines["device_code"] = "${t}"
+    turbines["model"]["position"]["z"] = "${height}"
+    with pytest.raises(ModelValidationError) as error:
+        WindFarm(description)
+    assert error.value.errors == [
+        "Farm/group0/turbine_${g}_${t}: unknown variable in expression 'height': name 'height' is not defined",
+    ]
+
+    del turbines["model"]
+    with pytest.raises(ModelValidationError) as error:
+        WindFarm(description)
+    assert error.value.errors == [
+        "Farm/group0/turbine_0_1: field 'device_code' expects str, got int 1",
+    ]
+
+
+def test_expansion_errors_are_raised_on_access(description):
+    groups = description["items"][0]
+    groups["repeat"] = {"index": "shape", "values": ["circle", "triangle"]}
+    groups["name"] = "group_${shape}"
+    groups["shape"] = "${shape}"
+    groups["items"] = []
+    farm = WindFarm(description)
+
+    for _ in range(2):
+        with pytest.raises(ModelValidationError) as error:
+            farm.items
+        assert error.value.errors == [
+            "Farm/group_triangle: field 'shape' must be one of ['rectangle', 'circle'], got 'triangle'",
+        ]
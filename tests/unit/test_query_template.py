@@ -0,0 +1,118 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.query_template import QueryTemplate, QueryTemplateRegistry  # noqa: E402
+from udq_utils.sql_detector import SQLDetector  # noqa: E402
+
+HISTORY = (
+    "SELECT time, value FROM {table:ident} WHERE entity_id = {entity_id:str} "
+    "AND property_name IN ({properties:str[]}) AND time > {start:timestamp} "
+    "AND value > {threshold:float} LIMIT {limit:int}"
+)
+
+
+@pytest.fixture()
+def registry():
+    registry = QueryTemplateRegistry()
+    registry.register("history", HISTORY)
+    return registry
+
+
+def make_values(**overrides):
+    values = {
+        "table": "telemetry",
+        "entity_id": "urn:ngsi-ld:Turbine:turbine_rect_1",
+        "properties": ["speed", "rpm"],
+        "start": "2022-11-15T14:33:02Z",
+        "threshold": 1.5,
+        "limit": 100,
+    }
+    values.update(overrides)
+    return values
+
+
+def render(registry, **overrides):
+    return registry.render("history", **make_values(**overrides))
+
+
+def test_values_are_bound_by_type(registry):
+    assert render(registry) == (
+        "SELECT time, value FROM telemetry WHERE entity_id = 'urn:ngsi-ld:Turbine:turbine_rect_1' "
+        "AND property_name IN ('speed', 'rpm') AND time > '2022-11-15T14:33:02.000Z' "
+        "AND value > 1.5 LIMIT 100"
+    )
+
+
+def test_quotes_are_escaped(registry):
+    query = render(registry, entity_id="abc' OR 1=1 --")
+    assert "'abc'' OR 1=1 --'" in query
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"entity_id": "O'Brien"},
+        {"threshold": -2.5e-12},
+        {"limit": -1},
+        {"properties": ["a"] * 5},
+        {"start": 1668522782 * 10**9},
+    ],
+)
+def test_rendered_queries_keep_the_template_shape(registry, overrides):
+    template = registry.get("history")
+    query = render(registry, **overrides)
+    _, signature, _ = template._bind(make_values(**overrides))
+    plan = template.plan(signature)
+    assert tuple(SQLDetector().getQueryContext(query)) == plan.token_context
+
+
+def test_plans_are_cached_per_signature(registry):
+    template = registry.get("history")
+    render(registry)
+    render(registry, entity_id="other")
+    assert template.plan.cache_info().currsize == 1
+    render(registry, properties=["speed"])
+    assert template.plan.cache_info().currsize == 2
+    assert template.plan.cache_info().maxsize == 256
+
+
+def test_list_plans_ignore_the_signs_of_the_items():
+    template = QueryTemplate(
+        "q", "SELECT * FROM t WHERE a = {a:str} AND b IN ({b:int[]})"
+    )
+    template.render(a="x", b=[1, 2, 3])
+    # an untrusted value checks the statement against the plan shared with the positive items
+    assert "-2" in template.render(a="x\ny", b=[1, -2, 3])
+    assert template.plan.cache_info().currsize == 1
+
+
+def test_untrusted_values_are_checked(registry):
+    # a backslash may escape the closing quote for some engines, the statement is parsed and rejected
+    with pytest.raises(Exception):
+        render(registry, entity_id="abc\\")
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"table": "telemetry; DROP TABLE users"},
+        {"limit": "ten"},
+        {"threshold": float("nan")},
+    ],
+)
+def test_invalid_values(registry, overrides):
+    with pytest.raises(Exception):
+        render(registry, **overrides)
+
+
+def test_missing_value():
+    template = QueryTemplate("q", "SELECT * FROM t WHERE a = {a:str}")
+    with pytest.raises(Exception):
+        template.render()
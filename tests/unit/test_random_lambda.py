@@ -131,3 +131,52 @@ def test_lambda_handler(twinmaker_event):
     val = value["values"][0]
     # The value is random but constant for the same input event
     assert float(val["value"]["doubleValue"]) == 53.0
+
+
+def test_lambda_handler_applies_property_filters(twinmaker_event):
+    twinmaker_event["propertyFilters"] = [
+        {
+            "propertyName": "speed",
+            "operator": "GREATER_THAN",
+            "value": {"doubleValue": "100"},
+        }
+    ]
+
+    data = lambda_handler(twinmaker_event, "")
+
+    # the random value (53.0) does not pass the filter
+    assert data["propertyValues"] == []
+
+
+def test_lambda_handler_reads_every_selected_property(twinmaker_event):
+    twinmaker_event["selectedProperties"] = ["speed", "min"]
+
+    data = lambda_handler(twinmaker_event, "")
+
+    assert [
+        v["entityPropertyReference"]["propertyName"] for v in data["propertyValues"]
+    ] == [
+        "speed",
+        "min",
+    ]
+    # each property has its own generator, adding one does not change the others
+    assert float(data["propertyValues"][0]["values"][0]["value"]["doubleValue"]) == 53.0
+
+
+def test_lambda_handler_values_follow_the_property_type(twinmaker_event):
+    twinmaker_event["properties"]["speed"]["definition"]["dataType"]["type"] = "INTEGER"
+
+    data = lambda_handler(twinmaker_event, "")
+
+    assert data["propertyValues"][0]["values"][0]["value"] == {"integerValue": "53"}
+
+
+def test_lambda_handler_skips_debug_statistics(twinmaker_event, monkeypatch, caplog):
+    from wind_farm.random_component.lambda_code import handler
+
+    def stats():
+        raise AssertionError("stats() computed with debug logging disabled")
+
+    monkeypatch.setattr(handler.RANDOM_READER.result_cache, "stats", stats)
+    caplog.set_level(handler.logging.INFO, logger=handler.LOGGER.name)
+    lambda_handler(twinmaker_event, None)
@@ -0,0 +1,85 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from twinmaker_builder import Field, ModelValidationError, TwinMakerObject
+from wind_farm.wind_farm import Turbine, TurbineGroup, WindFarm
+
+
+def test_fields_are_slots():
+    farm = WindFarm.load_from_yaml("tests/unit/farm.yaml", WindFarm)
+    group = farm.items[0]
+    assert type(group) == TurbineGroup
+    assert not hasattr(group, "__dict__")
+    assert (group.shape, group.width, group.diameter) == ("rectangle", 2, None)
+    assert not hasattr(group.items[0], "__dict__")
+
+
+def test_all_errors_are_reported_at_once():
+    description = {
+        "name": "Farm",
+        "items": [
+            {
+                "name": "group1",
+                "type": "TurbineGroup",
+                "shape": "triangle",
+                "width": "2",
+                "items": [{"name": "turbine1", "type": "Turbine", "device_code": 1}],
+            },
+            {
+                "name": "group2",
+                "type": "TurbineGroup",
+                "diameter": 10,
+                "items": [{"type": "Turbine"}],
+            },
+        ],
+    }
+    with pytest.raises(ModelValidationError) as error:
+        WindFarm(description)
+    assert error.value.errors == [
+        "Farm/group1: field 'shape' must be one of ['rectangle', 'circle'], got 'triangle'",
+        "Farm/group1: field 'width' expects int, got str '2'",
+        "Farm/group1/turbine1: field 'device_code' expects str, got int 1",
+        "Farm/group2/None: an item needs a name or an id",
+    ]
+
+
+class Sensor(TwinMakerObject):
+    code = Field(str, required=True)
+    threshold = Field(float, default=0.5)
+    enabled = Field(bool, default=True)
+    tags = Field(list, default=[])
+
+
+class LegacySensor(TwinMakerObject):
+    def __init__(self, description: dict, parent=None) -> None:
+        super().__init__(description, parent=parent, fields=["code"])
+
+
+class SlottedLegacySensor(Sensor):
+    __slots__ = ()
+
+    def __init__(self, description: dict, parent=None) -> None:
+        super().__init__(description, parent=parent, fields=["code"])
+
+
+def test_field_types_and_defaults():
+    sensor = Sensor({"name": "s1", "code": "A", "threshold": 2})
+    assert (sensor.threshold, sensor.enabled, sensor.tags) == (2, True, [])
+    # mutable defaults are not shared
+    assert Sensor({"name": "s2", "code": "B"}).tags is not sensor.tags
+
+    with pytest.raises(ModelValidationError, match="missing required field 'code'"):
+        Sensor({"name": "s3"})
+    with pytest.raises(ModelValidationError, match="expects float or int, got bool"):
+        Sensor({"name": "s4", "code": "C", "threshold": True})
+
+
+def test_classes_without_schema_keep_their_attributes():
+    sensor = LegacySensor({"name": "s1", "code": "A"})
+    assert sensor.code == "A"
+    assert Turbine._schema.keys() == {"device_code"}
+    assert LegacySensor._schema == {}
+    # legacy field lists on slotted classes
+    assert SlottedLegacySensor({"name": "s2", "code": "B"}).code == "B"
@@ -0,0 +1,48 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import shutil
+
+import pytest
+
+from wind_farm.sites import load_site, load_sites, site_model_paths, site_name
+from wind_farm.wind_farm import Turbine
+
+
+def test_site_model_paths(tmp_path):
+    for name in ("south.yaml", "north.yml", "readme.md"):
+        (tmp_path / name).write_text("")
+    paths = site_model_paths(str(tmp_path))
+    assert [site_name(p) for p in paths] == ["north", "south"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_load_sites(tmp_path, max_workers):
+    for name in ("north", "south"):
+        shutil.copy("tests/unit/farm.yaml", tmp_path / f"{name}.yaml")
+    paths = site_model_paths(str(tmp_path))
+
+    sites = load_sites(
+        paths, "tests/unit/base.json", ["north-bucket", "south-bucket"], max_workers
+    )
+
+    assert [site.model_path for site in sites] == paths
+    for site, bucket_name in zip(sites, ["north-bucket", "south-bucket"]):
+        expected = load_site(site.model_path, "tests/unit/base.json", bucket_name)
+        assert site.scene_content == expected.scene_content
+        assert (
+            bucket_name
+            in json.loads(site.scene_content)["nodes"][2]["components"][0]["uri"]
+        )
+
+        farm = site.farm
+        assert [obj.urn.fqn for obj in farm.model_index.objects] == [
+            obj.urn.fqn for obj in expected.farm.model_index.objects
+        ]
+        turbine = farm.find("urn:ngsi-ld:Turbine:turbine3")
+        assert turbine.parent.parent is farm
+        assert type(turbine) == Turbine
+        assert turbine.component_bindings()["TurbineFan"].component_type_id == (
+            "com.aws.sample.component.random"
+        )
@@ -0,0 +1,71 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.sql_detector import SQLDetector  # noqa: E402
+
+SAMPLE_QUERY = "SELECT * FROM users WHERE userId = 'abc' AND time > 10"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        SAMPLE_QUERY,
+        "SELECT * FROM users WHERE userId = 'abc_ef-gh' AND time > 10",
+        "SELECT * FROM users WHERE userId = '' AND time > 10",
+        "SELECT * FROM users WHERE userId = 'abc' AND time > 12345",
+    ],
+)
+def test_safe_queries(query):
+    SQLDetector().detectInjection(SAMPLE_QUERY, query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM users WHERE userId = 'abc' OR 1=1 AND time > 10",
+        "SELECT * FROM users WHERE userId = 'a' OR 'x'='x' AND time > 10",
+        "SELECT * FROM users WHERE userId = 'abc'; DROP TABLE users; --' AND time > 10",
+    ],
+)
+def test_injected_queries(query):
+    with pytest.raises(Exception):
+        SQLDetector().detectInjection(SAMPLE_QUERY, query)
+
+
+def test_lexical_pre_check():
+    assert SQLDetector.isSafeLiteralSubstitution(
+        SAMPLE_QUERY, SAMPLE_QUERY.replace("'abc'", "'turbine 1: ok'")
+    )
+    # differences outside of a string literal always go through the full parse
+    assert not SQLDetector.isSafeLiteralSubstitution(
+        SAMPLE_QUERY, SAMPLE_QUERY.replace("10", "11")
+    )
+    # quotes inside the substituted value are never trusted
+    assert not SQLDetector.isSafeLiteralSubstitution(
+        SAMPLE_QUERY, SAMPLE_QUERY.replace("'abc'", "'ab''c'")
+    )
+
+
+def test_sample_context_is_cached():
+    detector = SQLDetector()
+    context = detector.getSampleQueryContext(SAMPLE_QUERY)
+    assert context is detector.getSampleQueryContext(SAMPLE_QUERY)
+    assert list(context) == detector.getQueryContext(SAMPLE_QUERY)
+
+
+def test_safe_parameter_values():
+    assert SQLDetector.isSafeParameterValue("urn:ngsi-ld:Turbine:turbine_rect_1")
+    assert SQLDetector.isSafeParameterValue("2022-11-15T14:33:02Z")
+    assert not SQLDetector.isSafeParameterValue("abc' OR 1=1")
+    assert not SQLDetector.isSafeParameterValue("1 OR 1 --")
+    assert not SQLDetector.isSafeParameterValue("1\tOR\t1")
+    assert not SQLDetector.isSafeParameterValue("1--")
+    assert not SQLDetector.isSafeParameterValue("1/**/OR/**/1")
+    assert not SQLDetector.isSafeParameterValue("1;DROP")
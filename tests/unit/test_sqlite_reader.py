@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.sqlite_reader import SQLiteReader  # noqa: E402
+
+COMPONENT_TYPE = "com.aws.sample.component.random"
+START_NS = 1668522782 * 10**9
+SECOND = 10**9
+
+
+@pytest.fixture()
+def reader():
+    reader = SQLiteReader()
+    rows = []
+    for turbine in range(3):
+        for i in range(10):
+            rows.append(
+                (
+                    f"turbine{turbine}",
+                    "TurbineFan",
+                    "speed",
+                    START_NS + i * SECOND,
+                    float(i),
+                )
+            )
+            rows.append(
+                (
+                    f"turbine{turbine}",
+                    "TurbineFan",
+                    "rpm",
+                    START_NS + i * SECOND,
+                    float(-i),
+                )
+            )
+    reader.ingest(COMPONENT_TYPE, rows)
+    yield reader
+    reader.close()
+
+
+def make_event(entity_id=None, properties=("speed",), **extra):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "selectedProperties": list(properties),
+        "properties": {
+            p: {"definition": {"dataType": {"type": "DOUBLE"}}} for p in properties
+        },
+        "startTime": "2022-11-15T14:33:02Z",
+        "endTime": "2022-11-15T14:33:06Z",
+    }
+    if entity_id:
+        event["entityId"] = entity_id
+        event["componentName"] = "TurbineFan"
+    else:
+        event["componentTypeId"] = COMPONENT_TYPE
+    event.update(extra)
+    return event
+
+
+def query_all(reader, event):
+    """Follow nextToken until the end, return the (entity, property, time, value) tuples"""
+    results, token = [], None
+    while True:
+        if token:
+            event["nextToken"] = token
+        response = reader.process_query(event)
+        for property_value in response["propertyValues"]:
+            ref = property_value["entityPropertyReference"]
+            for value in property_value["values"]:
+                results.append(
+                    (
+                        ref["entityId"],
+                        ref["propertyName"],
+                        value["time"],
+                        float(value["value"]["doubleValue"]),
+                    )
+                )
+        token = response["nextToken"]
+        if not token:
+            return results
+
+
+def test_entity_query_time_range(reader):
+    results = query_all(reader, make_event("turbine1"))
+    # the start time is exclusive, the end time inclusive
+    assert [r[3] for r in results] == [1.0, 2.0, 3.0, 4.0]
+    assert results[0][2] == "2022-11-15T14:33:03.000Z"
+    assert results[-1][2] == "2022-11-15T14:33:06.000Z"
+    assert {r[0] for r in results} == {"turbine1"}
+
+
+def test_entity_query_descending_with_keyset_pagination(reader):
+    event = make_event(
+        "turbine1", properties=("rpm", "speed"), orderByTime="DESCENDING", maxResults=3
+    )
+    results = query_all(reader, event)
+    assert [(r[1], r[3]) for r in results] == [
+        ("rpm", -v) for v in (4.0, 3.0, 2.0, 1.0)
+    ] + [("speed", v) for v in (4.0, 3.0, 2.0, 1.0)]
+
+
+def test_component_type_query(reader):
+    results = query_all(reader, make_event(maxResults=4))
+    assert len(results) == 12
+    assert [r[0] for r in results] == ["turbine0"] * 4 + ["turbine1"] * 4 + [
+        "turbine2"
+    ] * 4
+
+
+def test_property_filters(reader):
+    event = make_event(
+        "turbine0",
+        propertyFilters=[
+            {
+                "propertyName": "speed",
+                "operator": "GREATER_THAN",
+                "value": {"doubleValue": "2"},
+            }
+        ],
+    )
+    assert [r[3] for r in query_all(reader, event)] == [3.0, 4.0]
+
+
+def test_filtered_pages_are_full(reader):
+    event = make_event(
+        properties=("speed", "rpm"),
+        maxResults=2,
+        propertyFilters=[
+            {
+                "propertyName": "speed",
+                "operator": "GREATER_THAN",
+                "value": {"doubleValue": "2"},
+            }
+        ],
+    )
+    pages = []
+    while True:
+        response = reader.process_query(event)
+        pages.append(
+            [
+                float(value["value"]["doubleValue"])
+                for property_value in response["propertyValues"]
+                for value in property_value["values"]
+            ]
+        )
+        if not response["nextToken"]:
+            break
+        event["nextToken"] = response["nextToken"]
+    # rows filtered out of a page are replaced by the next matching ones
+    assert sum(pages, []) == [-1.0, -2.0, -3.0, -4.0] * 3 + [3.0, 4.0] * 3
+    assert all(len(page) == 2 for page in pages)
+
+
+def test_entity_id_is_not_injectable(reader):
+    assert query_all(reader, make_event("turbine1' OR '1'='1")) == []
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import aws_cdk as core
-from aws_cdk.assertions import Match, Annotations
+from aws_cdk.assertions import Annotations, Match, Template
 
 from cdk_nag import AwsSolutionsChecks
 from aws_cdk import Aspects
@@ -20,3 +20,28 @@ def test_nag_has_no_error():
     )
 
     assert len(errors) == 0
+
+
+def test_content_addressed_mode_deploys_the_scene():
+    # the Lambda function is not bundled, docker is not needed
+    app = core.App(context={"content_addressed": "true", "aws:cdk:bundling-stacks": []})
+    Aspects.of(app).add(AwsSolutionsChecks(verbose=True))
+    stack = WindFarmStack(app, "twinmaker-cdk-automation")
+
+    errors = Annotations.from_stack(stack).find_error(
+        "*", Match.string_like_regexp("AwsSolutions-.*")
+    )
+    assert len(errors) == 0
+
+    template = Template.from_stack(stack)
+    template.resource_count_is("Custom::CDKBucketDeployment", 2)
+    (scene,) = template.find_resources("AWS::IoTTwinMaker::Scene").values()
+    location = scene["Properties"]["ContentLocation"]["Fn::Join"][1][-1]
+    assert location.startswith("/cas/") and location.endswith(".json")
+    # the scene is created once its content is in the bucket
+    (deploy,) = [
+        logical_id
+        for logical_id in template.find_resources("Custom::CDKBucketDeployment")
+        if logical_id.startswith("DeployTwinMakerScene")
+    ]
+    assert deploy in scene["DependsOn"]
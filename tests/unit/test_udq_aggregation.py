@@ -0,0 +1,144 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+from array import array
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq import (  # noqa: E402
+    SingleEntityReader,
+    IoTTwinMakerDataRow,
+    IoTTwinMakerDataSeries,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_aggregation import aggregate_bins, lttb  # noqa: E402
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+)
+
+SECOND = 10**9
+START_NS = 1668520800 * SECOND
+REFERENCE = IoTTwinMakerReference(
+    ecp=EntityComponentPropertyRef("entity", "component", "speed")
+)
+
+
+class MinuteRow(IoTTwinMakerDataRow):
+    def __init__(self, index):
+        self._index = index
+
+    def get_iottwinmaker_reference(self):
+        return REFERENCE
+
+    def get_iso8601_timestamp(self):
+        return f"2022-11-15T14:{self._index // 60:02d}:{self._index % 60:02d}.000Z"
+
+    def get_value(self):
+        return float(self._index)
+
+
+class DownsamplingReader(SingleEntityReader):
+    downsample_target_points = 6
+
+    def __init__(self, as_series=False):
+        self.as_series = as_series
+
+    def entity_query(self, request):
+        if self.as_series:
+            timestamps = array("q", (START_NS + i * SECOND for i in range(3600)))
+            values = array("d", (float(i) for i in range(3600)))
+            return IoTTwinMakerUdqResponse(
+                [],
+                series=[
+                    IoTTwinMakerDataSeries(
+                        REFERENCE, memoryview(timestamps), memoryview(values)
+                    )
+                ],
+            )
+        # rows in no particular order
+        return IoTTwinMakerUdqResponse([MinuteRow(i) for i in reversed(range(3600))])
+
+
+def make_event(**extra):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "entityId": "entity",
+        "componentName": "component",
+        "selectedProperties": ["speed"],
+        "properties": {"speed": {"definition": {"dataType": {"type": "DOUBLE"}}}},
+        "startTime": "2022-11-15T14:00:00Z",
+        "endTime": "2022-11-15T15:00:00Z",
+    }
+    event.update(extra)
+    return event
+
+
+def values_of(result):
+    return [
+        (v["time"], float(v["value"]["doubleValue"]))
+        for p in result["propertyValues"]
+        for v in p["values"]
+    ]
+
+
+@pytest.mark.parametrize("as_series", [False, True])
+def test_avg_bins_of_rows_and_series(as_series):
+    result = DownsamplingReader(as_series).process_query(make_event())
+    assert values_of(result) == [
+        (f"2022-11-15T14:{minute:02d}:00.000Z", minute * 60 + 299.5)
+        for minute in range(0, 60, 10)
+    ]
+
+
+@pytest.mark.parametrize("method", ["min", "max", "last"])
+def test_bin_methods(method, monkeypatch):
+    monkeypatch.setattr(DownsamplingReader, "downsample_method", method)
+    values = [v for _, v in values_of(DownsamplingReader().process_query(make_event()))]
+    offset = {"min": 0, "max": 599, "last": 599}[method]
+    assert values == [float(i * 600 + offset) for i in range(6)]
+
+
+def test_descending_order_and_filters_apply_to_raw_values(monkeypatch):
+    monkeypatch.setattr(DownsamplingReader, "apply_property_filters", True)
+    monkeypatch.setattr(DownsamplingReader, "downsample_method", "max")
+    event = make_event(
+        orderByTime="DESCENDING",
+        propertyFilters=[
+            {"propertyName": "speed", "operator": "<", "value": {"doubleValue": "100"}}
+        ],
+    )
+    assert values_of(DownsamplingReader(True).process_query(event)) == [
+        ("2022-11-15T14:00:00.000Z", 99.0)
+    ]
+
+
+def test_small_series_and_pagination_are_unchanged(monkeypatch):
+    monkeypatch.setattr(DownsamplingReader, "downsample_target_points", 10000)
+    result = DownsamplingReader(True).process_query(make_event(maxResults=100))
+    assert len(values_of(result)) == 100
+    assert result["nextToken"]
+
+
+def test_aggregate_bins_skips_empty_bins():
+    timestamps = [0, 1, 2, 50, 99]
+    assert aggregate_bins(timestamps, [1, 2, 3, 4, 5], 0, 100, 10, "avg") == (
+        [0, 50, 90],
+        [2.0, 4.0, 5.0],
+    )
+
+
+def test_lttb_keeps_extremes():
+    timestamps = list(range(100))
+    values = [0.0] * 100
+    values[37] = 10.0
+    values[71] = -10.0
+    selected_timestamps, selected_values = lttb(timestamps, values, 10)
+    assert len(selected_timestamps) == 10
+    assert selected_timestamps[0] == 0 and selected_timestamps[-1] == 99
+    assert 37 in selected_timestamps and 71 in selected_timestamps
+    assert selected_values == [values[t] for t in selected_timestamps]
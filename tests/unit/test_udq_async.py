@@ -0,0 +1,127 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq import (  # noqa: E402
+    AsyncSingleEntityReader,
+    AsyncMultiEntityReader,
+    IoTTwinMakerDataSeries,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+)
+
+START_NS = 1668520800 * 10**9
+PROPERTIES = [f"p{i}" for i in range(8)]
+
+
+class SlowReader(AsyncSingleEntityReader, AsyncMultiEntityReader):
+    """Every property read waits for `latency` seconds, the slowest reads come first"""
+
+    max_concurrency = 4
+
+    def __init__(self, latency=0.05, paginate=False):
+        self.latency = latency
+        self.paginate = paginate
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def component_type_entities(self, request):
+        return [(f"turbine{i}", "TurbineFan") for i in range(3)]
+
+    async def property_query(self, request, entity_id, component_name, property_name):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # responses complete out of order
+        await asyncio.sleep(
+            self.latency * (1 + 1 / (1 + PROPERTIES.index(property_name)))
+        )
+        self.in_flight -= 1
+        return IoTTwinMakerUdqResponse(
+            [],
+            next_token="more" if self.paginate else None,
+            series=[
+                IoTTwinMakerDataSeries(
+                    IoTTwinMakerReference(
+                        ecp=EntityComponentPropertyRef(
+                            entity_id, component_name, property_name
+                        )
+                    ),
+                    [START_NS],
+                    [float(PROPERTIES.index(property_name))],
+                )
+            ],
+        )
+
+
+def make_event(entity_id=None):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "selectedProperties": PROPERTIES,
+        "properties": {
+            name: {"definition": {"dataType": {"type": "DOUBLE"}}}
+            for name in PROPERTIES
+        },
+        "startTime": "2022-11-15T14:00:00Z",
+        "endTime": "2022-11-15T15:00:00Z",
+    }
+    if entity_id:
+        event["entityId"] = entity_id
+        event["componentName"] = "TurbineFan"
+    else:
+        event["componentTypeId"] = "com.example.turbine"
+    return event
+
+
+def references(result):
+    return [
+        (
+            p["entityPropertyReference"]["entityId"],
+            p["entityPropertyReference"]["propertyName"],
+        )
+        for p in result["propertyValues"]
+    ]
+
+
+def test_entity_properties_are_read_concurrently_and_merged_in_order():
+    reader = SlowReader()
+    start = time.perf_counter()
+    result = reader.process_query(make_event("turbine0"))
+    elapsed = time.perf_counter() - start
+
+    assert references(result) == [("turbine0", name) for name in PROPERTIES]
+    assert reader.max_in_flight == 4
+    # two waves of at most 0.1 s instead of 8 sequential reads (> 0.4 s)
+    assert elapsed < 0.35
+
+
+def test_component_type_query_fans_out_over_entities():
+    reader = SlowReader(latency=0.01)
+    result = reader.process_query(make_event())
+    assert references(result) == [
+        (f"turbine{i}", name) for i in range(3) for name in PROPERTIES
+    ]
+    assert reader.max_in_flight == 4
+
+
+def test_event_loop_is_reused_across_invocations():
+    reader = SlowReader(latency=0)
+    reader.process_query(make_event("turbine0"))
+    loop = reader._loop
+    reader.process_query(make_event("turbine0"))
+    assert reader._loop is loop
+
+
+def test_property_reads_must_not_paginate():
+    with pytest.raises(Exception, match="must not paginate"):
+        SlowReader(latency=0, paginate=True).process_query(make_event("turbine0"))
@@ -0,0 +1,167 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq import (  # noqa: E402
+    SingleEntityReader,
+    IoTTwinMakerDataSeries,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_cache import UdqResultCache, align_window  # noqa: E402
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+)
+from udq_utils.udq_time import iso8601_to_epoch_ns  # noqa: E402
+
+SECOND = 10**9
+MINUTE = 60 * SECOND
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SecondsReader(SingleEntityReader):
+    """One point per second of the requested window, counts the calls"""
+
+    result_cache_align_ns = None
+
+    def __init__(self):
+        self.result_cache = UdqResultCache()
+        self.windows = []
+
+    def entity_query(self, request):
+        self.windows.append((request.start_time, request.end_time))
+        first = -(-request.start_time_ns // SECOND)
+        timestamps = [
+            second * SECOND
+            for second in range(first, request.end_time_ns // SECOND + 1)
+        ]
+        return IoTTwinMakerUdqResponse(
+            [],
+            series=[
+                IoTTwinMakerDataSeries(
+                    IoTTwinMakerReference(
+                        ecp=EntityComponentPropertyRef(
+                            request.entity_id, request.component_name, "speed"
+                        )
+                    ),
+                    timestamps,
+                    [float(t // SECOND % 1000) for t in timestamps],
+                )
+            ],
+        )
+
+
+def make_event(start="2022-11-15T14:00:10Z", end="2022-11-15T14:00:20Z", **extra):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "entityId": "entity",
+        "componentName": "component",
+        "selectedProperties": ["speed"],
+        "properties": {"speed": {"definition": {"dataType": {"type": "DOUBLE"}}}},
+        "startTime": start,
+        "endTime": end,
+    }
+    event.update(extra)
+    return event
+
+
+def times_of(result):
+    return [v["time"] for p in result["propertyValues"] for v in p["values"]]
+
+
+def test_ttl_and_counters():
+    clock = FakeClock()
+    cache = UdqResultCache(ttl_seconds=10, clock=clock)
+    assert cache.get("a") is None
+    cache.put("a", "value", 10)
+    assert cache.get("a") == "value"
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats() == {
+        "entries": 0,
+        "bytes": 0,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+        "expirations": 1,
+    }
+
+
+def test_lru_eviction_is_bounded_by_bytes():
+    cache = UdqResultCache(max_bytes=100)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    cache.get("a")
+    cache.put("c", 3, 40)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.size == 80 and cache.evictions == 1
+    # larger than the whole cache
+    cache.put("d", 4, 101)
+    assert len(cache) == 2
+
+
+def test_identical_requests_hit_the_cache():
+    reader = SecondsReader()
+    first = reader.process_query(make_event())
+    assert reader.process_query(make_event()) == first
+    assert len(reader.windows) == 1
+    # anything that can change the response is part of the fingerprint
+    reader.process_query(make_event(orderByTime="DESCENDING"))
+    reader.process_query(make_event(maxResults=5))
+    assert len(reader.windows) == 3
+    assert reader.result_cache.hits == 1
+
+
+def test_aligned_windows_share_an_entry_and_are_trimmed():
+    reader = SecondsReader()
+    reader.result_cache_align_ns = MINUTE
+    first = reader.process_query(make_event())
+    second = reader.process_query(
+        make_event("2022-11-15T14:00:30Z", "2022-11-15T14:00:32Z")
+    )
+    assert reader.windows == [("2022-11-15T14:00:00.000Z", "2022-11-15T14:01:00.000Z")]
+    assert times_of(first)[0] == "2022-11-15T14:00:10.000Z"
+    assert times_of(first)[-1] == "2022-11-15T14:00:20.000Z"
+    assert times_of(second) == [
+        "2022-11-15T14:00:30.000Z",
+        "2022-11-15T14:00:31.000Z",
+        "2022-11-15T14:00:32.000Z",
+    ]
+
+
+def test_pagination_over_a_trimmed_cached_response():
+    reader = SecondsReader()
+    reader.result_cache_align_ns = MINUTE
+    times, token = [], None
+    while True:
+        event = make_event(maxResults=4)
+        if token:
+            event["nextToken"] = token
+        result = reader.process_query(event)
+        times.extend(times_of(result))
+        token = result["nextToken"]
+        if not token:
+            break
+    assert len(times) == 11
+    assert times[0] == "2022-11-15T14:00:10.000Z"
+    assert len(reader.windows) == 1
+
+
+def test_align_window():
+    start = iso8601_to_epoch_ns("2022-11-15T14:00:10Z")
+    assert align_window(start, start + MINUTE, MINUTE) == (
+        start - 10 * SECOND,
+        start + 110 * SECOND,
+    )
@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq_filters import CompiledPropertyFilters  # noqa: E402
+
+
+def speed_filter(operator, value):
+    return {"propertyName": "speed", "operator": operator, "value": value}
+
+
+@pytest.mark.parametrize(
+    "operator,operand,expected",
+    [
+        ("EQUAL", {"doubleValue": "60"}, [False, True, False]),
+        ("NOT_EQUAL", {"doubleValue": "60"}, [True, False, True]),
+        ("LESS_THAN", {"doubleValue": "60"}, [True, False, False]),
+        ("LESS_THAN_EQUAL", {"doubleValue": "60"}, [True, True, False]),
+        ("GREATER_THAN", {"integerValue": "60"}, [False, False, True]),
+        ("GREATER_THAN_EQUAL", {"doubleValue": "60"}, [False, True, True]),
+        (">", {"doubleValue": "55"}, [False, True, True]),
+        (
+            "IN",
+            {"listValue": [{"doubleValue": "50"}, {"doubleValue": "70"}]},
+            [True, False, True],
+        ),
+    ],
+)
+def test_operators(operator, operand, expected):
+    filters = CompiledPropertyFilters([speed_filter(operator, operand)])
+    values = [50.0, 60.0, 70.0]
+
+    assert filters.mask("speed", values) == expected
+    assert [filters.matches("speed", v) for v in values] == expected
+
+
+def test_filters_are_combined_with_and():
+    filters = CompiledPropertyFilters(
+        [
+            speed_filter("GREATER_THAN", {"doubleValue": "50"}),
+            speed_filter("LESS_THAN", {"doubleValue": "70"}),
+        ]
+    )
+    timestamps, values = filters.filter_series("speed", [1, 2, 3], [50.0, 60.0, 70.0])
+    assert timestamps == [2]
+    assert values == [60.0]
+
+
+def test_other_properties_are_not_filtered():
+    filters = CompiledPropertyFilters([speed_filter("EQUAL", {"doubleValue": "1"})])
+    assert filters.applies_to("speed")
+    assert not filters.applies_to("rpm")
+    assert filters.mask("rpm", [1.0, 2.0]) == [True, True]
+    assert not CompiledPropertyFilters([])
+
+
+def test_incomparable_values_do_not_match():
+    filters = CompiledPropertyFilters([speed_filter("LESS_THAN", {"doubleValue": "1"})])
+    assert filters.mask("speed", [0.5, "text"]) == [True, False]
+
+
+def test_unsupported_operator():
+    with pytest.raises(Exception):
+        CompiledPropertyFilters([speed_filter("LIKE", {"stringValue": "a%"})])
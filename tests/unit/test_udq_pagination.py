@@ -0,0 +1,157 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq import (  # noqa: E402
+    SingleEntityReader,
+    IoTTwinMakerDataRow,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+    UdqPaginationToken,
+)
+
+
+class CountingRow(IoTTwinMakerDataRow):
+    def __init__(self, index):
+        self._index = index
+
+    def get_iottwinmaker_reference(self):
+        return IoTTwinMakerReference(
+            ecp=EntityComponentPropertyRef("entity", "component", "speed")
+        )
+
+    def get_iso8601_timestamp(self):
+        return f"2022-11-15T14:{self._index // 60:02d}:{self._index % 60:02d}.000Z"
+
+    def get_value(self):
+        return float(self._index)
+
+
+class CountingReader(SingleEntityReader):
+    """Returns `count` rows for every page, pages are addressed by the reader token"""
+
+    def __init__(self, count, pages=1):
+        self.count = count
+        self.pages = pages
+        self.received_tokens = []
+
+    def entity_query(self, request):
+        self.received_tokens.append(request.next_token)
+        page = int(request.next_token) if request.next_token else 0
+        rows = [CountingRow(page * self.count + i) for i in range(self.count)]
+        next_token = str(page + 1) if page + 1 < self.pages else None
+        return IoTTwinMakerUdqResponse(rows, next_token)
+
+
+def make_event(next_token=None, max_results=None):
+    event = {
+        "workspaceId": "windfarm-sample",
+        "entityId": "entity",
+        "componentName": "component",
+        "selectedProperties": ["speed"],
+        "properties": {"speed": {"definition": {"dataType": {"type": "DOUBLE"}}}},
+        "startTime": "2022-11-15T14:00:00Z",
+        "endTime": "2022-11-15T15:00:00Z",
+        "startDateTime": 1668520800,
+        "endDateTime": 1668524400,
+    }
+    if next_token:
+        event["nextToken"] = next_token
+    if max_results:
+        event["maxResults"] = max_results
+    return event
+
+
+def collect_values(reader, max_results=None):
+    values, token, calls = [], None, 0
+    while True:
+        result = reader.process_query(make_event(token, max_results))
+        calls += 1
+        for property_value in result["propertyValues"]:
+            values += [
+                float(v["value"]["doubleValue"]) for v in property_value["values"]
+            ]
+        token = result["nextToken"]
+        if not token:
+            return values, calls
+
+
+def test_unbounded_response_has_no_token():
+    result = CountingReader(10).process_query(make_event())
+    assert result["nextToken"] is None
+    assert len(result["propertyValues"][0]["values"]) == 10
+
+
+def test_max_results_paginates():
+    values, calls = collect_values(CountingReader(10), max_results=3)
+    assert values == [float(i) for i in range(10)]
+    assert calls == 4
+
+
+def test_byte_budget_bounds_response_size():
+    reader = CountingReader(1000)
+    reader.max_response_bytes = 10 * 1024
+
+    result = reader.process_query(make_event())
+    assert result["nextToken"] is not None
+    assert len(json.dumps(result)) <= reader.max_response_bytes
+
+    values, _ = collect_values(reader)
+    assert values == [float(i) for i in range(1000)]
+
+
+def test_reader_token_is_wrapped_and_restored():
+    reader = CountingReader(4, pages=3)
+    reader.max_response_rows = 3
+
+    values, _ = collect_values(reader)
+    assert values == [float(i) for i in range(12)]
+    # the connector only ever sees its own tokens
+    assert set(reader.received_tokens) == {None, "1", "2"}
+
+
+def test_foreign_token_is_passed_to_reader():
+    token = UdqPaginationToken.decode("1")
+    assert token.reader_token == "1"
+    assert token.offset == 0
+
+    with pytest.raises(Exception):
+        UdqPaginationToken.decode(UdqPaginationToken.PREFIX + "garbage")
+
+
+class DatetimeRow(CountingRow):
+    def get_iso8601_timestamp(self):
+        return None
+
+    def get_timestamp(self):
+        return datetime(2022, 11, 15, 14, 0, 0, self._index * 1000)
+
+
+class EpochRow(CountingRow):
+    def get_timestamp_ns(self):
+        return 1668520800 * 10**9 + self._index * 10**6
+
+
+@pytest.mark.parametrize("row_type", [DatetimeRow, EpochRow])
+def test_row_timestamps_keep_milliseconds(row_type):
+    class Reader(SingleEntityReader):
+        def entity_query(self, request):
+            return IoTTwinMakerUdqResponse([row_type(i) for i in (0, 7, 123)])
+
+    result = Reader().process_query(make_event())
+    assert [v["time"] for v in result["propertyValues"][0]["values"]] == [
+        "2022-11-15T14:00:00.000Z",
+        "2022-11-15T14:00:00.007Z",
+        "2022-11-15T14:00:00.123Z",
+    ]
@@ -0,0 +1,96 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import copy
+import pickle
+import sys
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils import udq_models  # noqa: E402
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+    ExternalIdPropertyRef,
+)
+
+
+def test_references_are_interned():
+    first = IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine0", "TurbineFan", "speed")
+    )
+    second = IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine0", "TurbineFan", "speed")
+    )
+    assert first is second
+    assert first != IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine1", "TurbineFan", "speed")
+    )
+
+
+def test_external_id_references_ignore_key_order():
+    first = ExternalIdPropertyRef({"asset": "a1", "type": "fan"}, "speed")
+    second = ExternalIdPropertyRef({"type": "fan", "asset": "a1"}, "speed")
+    assert first is second
+    assert hash(first) == hash(second)
+    assert first != ExternalIdPropertyRef({"asset": "a2", "type": "fan"}, "speed")
+
+
+def test_external_id_references_keep_the_value_types():
+    references = [
+        ExternalIdPropertyRef({"asset": value}, "speed") for value in (1, True, 1.0)
+    ]
+    assert [type(r.external_id_property["asset"]) for r in references] == [
+        int,
+        bool,
+        float,
+    ]
+    assert len({id(r) for r in references}) == 3
+    assert references[0] != references[1]
+    # nested values too, through the canonical key
+    assert ExternalIdPropertyRef({"asset": [1]}, "speed") is not ExternalIdPropertyRef(
+        {"asset": [True]}, "speed"
+    )
+    assert ExternalIdPropertyRef({"asset": 1}, "speed") is references[0]
+
+
+def test_references_are_immutable():
+    ref = EntityComponentPropertyRef("turbine0", "TurbineFan", "speed")
+    with pytest.raises(AttributeError):
+        ref.entity_id = "turbine1"
+    with pytest.raises(AttributeError):
+        del ref.property_name
+
+
+def test_serialized_form_is_built_once():
+    ref = IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine0", "TurbineFan", "speed"),
+        eip=ExternalIdPropertyRef({"asset": "a1"}, "speed"),
+    )
+    assert ref.serialize() is ref.serialize()
+    assert ref.serialize() == {
+        "entityId": "turbine0",
+        "componentName": "TurbineFan",
+        "propertyName": "speed",
+        "externalIdProperty": {"asset": "a1"},
+    }
+
+
+def test_copy_and_pickle_return_the_interned_reference():
+    ref = IoTTwinMakerReference(
+        ecp=EntityComponentPropertyRef("turbine0", "TurbineFan", "speed")
+    )
+    assert copy.copy(ref) is ref
+    assert pickle.loads(pickle.dumps(ref)) is ref
+
+
+def test_intern_table_is_bounded(monkeypatch):
+    monkeypatch.setattr(udq_models, "MAX_INTERNED_REFERENCES", 10)
+    monkeypatch.setattr(EntityComponentPropertyRef, "_interned", {})
+    refs = [EntityComponentPropertyRef(f"e{i}", "c", "p") for i in range(25)]
+    assert len(EntityComponentPropertyRef._interned) <= 10
+    # references created before a reset are still equal to the new ones
+    assert refs[0] == EntityComponentPropertyRef("e0", "c", "p")
@@ -0,0 +1,139 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerUdqRequest,
+    IoTTwinMakerUDQEntityRequest,
+    IoTTwinMakerUDQComponentTypeRequest,
+    OrderBy,
+)
+from udq_utils.udq_time import (  # noqa: E402
+    Iso8601Formatter,
+    datetime_to_epoch_ns,
+    epoch_ns_to_iso8601,
+    iso8601_to_epoch_ns,
+)
+
+
+@pytest.fixture()
+def event():
+    return {
+        "workspaceId": "windfarm-sample",
+        "entityId": "urn:ngsi-ld:Turbine:turbine_rect_1",
+        "componentName": "TurbineFan",
+        "selectedProperties": ["speed"],
+        "startTime": "2022-11-15T14:33:02Z",
+        "endTime": "2022-11-15T14:34:02.5Z",
+        "startDateTime": 1668522782,
+        "endDateTime": 1668522842,
+        "properties": {
+            "speed": {
+                "definition": {"dataType": {"type": "DOUBLE"}, "isTimeSeries": True}
+            },
+            "min": {
+                "definition": {"dataType": {"type": "DOUBLE"}},
+                "value": {"doubleValue": "50"},
+            },
+            "tags": {
+                "definition": {
+                    "dataType": {"type": "LIST", "nestedType": {"type": "STRING"}}
+                },
+                "value": {"listValue": [{"stringValue": "a"}, {"stringValue": "b"}]},
+            },
+        },
+        "orderByTime": "DESCENDING",
+    }
+
+
+def test_parse_request_type(event):
+    assert type(IoTTwinMakerUdqRequest.parse(event)) is IoTTwinMakerUDQEntityRequest
+
+    del event["entityId"]
+    del event["componentName"]
+    event["componentTypeId"] = "com.aws.sample.component.random"
+    request = IoTTwinMakerUdqRequest.parse(event)
+    assert type(request) is IoTTwinMakerUDQComponentTypeRequest
+    assert request.order_by == OrderBy.DESCENDING
+
+
+def test_request_is_slotted(event):
+    request = IoTTwinMakerUdqRequest.parse(event)
+    assert not hasattr(request, "__dict__")
+    assert not hasattr(request, "_event")
+
+
+def test_epoch_nanoseconds(event):
+    request = IoTTwinMakerUdqRequest.parse(event)
+    assert request.start_time_ns == 1668522782 * 10**9
+    assert request.end_time_ns == 1668522842 * 10**9 + 500_000_000
+    # deprecated naive UTC datetimes, converted once
+    assert request.start_datetime == datetime(2022, 11, 15, 14, 33, 2)
+    assert request.end_datetime == datetime(2022, 11, 15, 14, 34, 2)
+    assert request.start_datetime is request.start_datetime
+    shifted = request.with_time_window(1668522842 * 10**9, 1668522902 * 10**9)
+    assert shifted.start_datetime == datetime(2022, 11, 15, 14, 34, 2)
+
+
+def test_typed_property_definitions(event):
+    request = IoTTwinMakerUdqRequest.parse(event)
+    definitions = request.property_definitions
+
+    assert definitions["speed"].data_type == "DOUBLE"
+    assert definitions["speed"].is_time_series
+    assert definitions["speed"].value is None
+    assert definitions["min"].value == 50.0
+    assert definitions["tags"].nested_type == "STRING"
+    assert definitions["tags"].value == ["a", "b"]
+    # raw context is still available
+    assert request.udq_context["properties"]["min"]["value"]["doubleValue"] == "50"
+
+
+def test_unknown_selected_property(event):
+    event["selectedProperties"] = ["unknown"]
+    with pytest.raises(Exception):
+        IoTTwinMakerUdqRequest.parse(event)
+
+
+@pytest.mark.parametrize(
+    "timestamp,expected",
+    [
+        ("1970-01-01T00:00:00Z", 0),
+        ("2022-11-15T14:33:02Z", 1668522782 * 10**9),
+        ("2022-11-15T14:33:02.123456789Z", 1668522782 * 10**9 + 123456789),
+        ("2022-11-15T15:33:02+01:00", 1668522782 * 10**9),
+        ("2024-02-29T00:00:00", 1709164800 * 10**9),
+        ("1969-12-31T23:59:59Z", -(10**9)),
+    ],
+)
+def test_iso8601_to_epoch_ns(timestamp, expected):
+    assert iso8601_to_epoch_ns(timestamp) == expected
+
+
+def test_iso8601_formatter_matches_epoch_ns_to_iso8601():
+    rng = random.Random(0)
+    timestamps = sorted(rng.randrange(-(10**18), 4 * 10**18) for _ in range(200))
+    # points in the same second and across a day boundary
+    start = 1668556799 * 10**9
+    timestamps += [start + i * 250_000_000 for i in range(12)]
+    formatter = Iso8601Formatter()
+    assert formatter.format_many(timestamps) == [
+        epoch_ns_to_iso8601(t) for t in timestamps
+    ]
+
+
+def test_datetime_to_epoch_ns_keeps_sub_second_precision():
+    naive = datetime(2022, 11, 15, 14, 33, 2, 123456)
+    assert datetime_to_epoch_ns(naive) == 1668522782123456000
+    aware = datetime(
+        2022, 11, 15, 15, 33, 2, 123456, tzinfo=timezone(timedelta(hours=1))
+    )
+    assert datetime_to_epoch_ns(aware) == 1668522782123456000
@@ -0,0 +1,130 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+from array import array
+
+import pytest
+
+# Add path to udq_utils module
+sys.path.insert(0, "wind_farm/random_component/udq_helper_utils")
+
+from udq_utils.udq import (  # noqa: E402
+    SingleEntityReader,
+    IoTTwinMakerDataSeries,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_models import (  # noqa: E402
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+)
+from udq_utils.udq_values import (  # noqa: E402
+    decode_data_value,
+    encode_data_value,
+    encode_series,
+    value_encoder,
+)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (1.5, {"doubleValue": "1.5"}),
+        (7, {"integerValue": "7"}),
+        (2**40, {"longValue": str(2**40)}),
+        (True, {"booleanValue": "True"}),
+        ("NORMAL", {"stringValue": "NORMAL"}),
+        ([1, "a"], {"listValue": [{"integerValue": "1"}, {"stringValue": "a"}]}),
+        ({"k": 1.0}, {"mapValue": {"k": {"doubleValue": "1.0"}}}),
+    ],
+)
+def test_encode_data_value(value, expected):
+    assert encode_data_value(value) == expected
+
+
+def test_unsupported_value():
+    with pytest.raises(Exception, match="Unsupported value type"):
+        encode_data_value(None)
+
+
+def test_typed_encoders_coerce_to_the_declared_type():
+    assert encode_series([1, 2.0], "DOUBLE") == [
+        {"doubleValue": "1.0"},
+        {"doubleValue": "2.0"},
+    ]
+    assert encode_series([3.0], "LONG") == [{"longValue": "3"}]
+    assert value_encoder("LIST", "INTEGER")([1.0, 2]) == {
+        "listValue": [{"integerValue": "1"}, {"integerValue": "2"}]
+    }
+    assert value_encoder("MAP", "STRING")({"a": 1}) == {
+        "mapValue": {"a": {"stringValue": "1"}}
+    }
+    # unknown types fall back to the python type of each value
+    assert value_encoder(None) is encode_data_value
+
+
+@pytest.mark.parametrize(
+    "data_type,value,expected",
+    [
+        ("DOUBLE", 10**400, {"longValue": str(10**400)}),
+        ("DOUBLE", "fast", {"stringValue": "fast"}),
+        ("DOUBLE", True, {"booleanValue": "True"}),
+        ("INTEGER", 1.5, {"doubleValue": "1.5"}),
+        ("INTEGER", 2**40, {"longValue": str(2**40)}),
+        ("INTEGER", "7", {"stringValue": "7"}),
+        ("LONG", float("nan"), {"doubleValue": "nan"}),
+        ("BOOLEAN", "false", {"stringValue": "false"}),
+        ("BOOLEAN", 1, {"integerValue": "1"}),
+        ("STRING", [1], {"listValue": [{"integerValue": "1"}]}),
+        ("LIST", 3, {"integerValue": "3"}),
+        ("MAP", [1.0], {"listValue": [{"doubleValue": "1.0"}]}),
+    ],
+)
+def test_typed_encoders_fall_back_on_incompatible_values(data_type, value, expected):
+    assert value_encoder(data_type, "DOUBLE")(value) == expected
+
+
+def test_decode_encode_round_trip():
+    for value in (1.5, 7, True, "x", [1, 2], {"a": "b"}):
+        assert decode_data_value(encode_data_value(value)) == value
+
+
+class IntegerSeriesReader(SingleEntityReader):
+    def entity_query(self, request):
+        return IoTTwinMakerUdqResponse(
+            [],
+            series=[
+                IoTTwinMakerDataSeries(
+                    IoTTwinMakerReference(
+                        ecp=EntityComponentPropertyRef(
+                            request.entity_id, request.component_name, name
+                        )
+                    ),
+                    array("q", [1668520800 * 10**9]),
+                    array("q", [42]),
+                )
+                for name in request.selected_properties
+            ],
+        )
+
+
+def test_series_are_encoded_with_the_declared_property_types():
+    event = {
+        "workspaceId": "windfarm-sample",
+        "entityId": "turbine0",
+        "componentName": "TurbineFan",
+        "selectedProperties": ["rpm", "speed", "count"],
+        "properties": {
+            "rpm": {"definition": {"dataType": {"type": "INTEGER"}}},
+            "speed": {"definition": {"dataType": {"type": "DOUBLE"}}},
+            "count": {"definition": {"dataType": {"type": "LONG"}}},
+        },
+        "startTime": "2022-11-15T14:00:00Z",
+        "endTime": "2022-11-15T15:00:00Z",
+    }
+    result = IntegerSeriesReader().process_query(event)
+    assert [p["values"][0]["value"] for p in result["propertyValues"]] == [
+        {"integerValue": "42"},
+        {"doubleValue": "42.0"},
+        {"longValue": "42"},
+    ]
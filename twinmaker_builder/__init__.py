@@ -2,7 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from typing import Mapping
-from aws_cdk import aws_iottwinmaker as twinmaker
+from aws_cdk import Stack, Stage, aws_iottwinmaker as twinmaker
+from aws_cdk import cloudformation_include as cfn_inc
 
 from os import path
 import sys
@@ -16,29 +17,108 @@ import logging
 from ngsildclient.utils.urn import Urn
 
 from .scene import SceneNode, JSONEncoder
+from .cfn import make_logical_id, to_cfn_data_value
+from .index import ModelIndex
+from .schema import Field, ModelValidationError, SchemaMeta  # noqa: F401
+from .template import expand
+
+# The libyaml parser is much faster on large models, when PyYAML is built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 LOGGER = logging.getLogger()
 LOGGER.setLevel(logging.INFO)
 
 
-class TwinMakerObject:
+class TwinMakerObject(metaclass=SchemaMeta):
     """
     Defines the base API of an objet in the domain model. An basic object has property like id, name and model
     and can contain other TwinMakerObject that are then managed in a parent-child relantionship.
     A TwinMakerObject has a unique URN to identify itself that by default follows the ngsi-ld specification.
+
+    The fields of a domain class are declared with Field attributes: they are validated when the object
+    is created and stored in slots.
+
+    Examples
+    --------
+        class Turbine(TwinMakerObject):
+            device_code = Field(str, required=True)
     """
 
+    __slots__ = (
+        "_items",
+        "_pending",
+        "parent",
+        "model",
+        "_name",
+        "_id",
+        "components",
+        "_position",
+    )
+
     def __init__(self, description: dict, parent=None, fields=None) -> None:
         self.items = []
         self.parent = parent
+        self._position = None
 
-        self.model = description["model"] if "model" in description else None
-        self._name = description["name"] if "name" in description else None
-        self._id = description["id"] if "id" in description else None
+        values = self.read_description(description)
+        for name, value in values.items():
+            setattr(self, name, value)
 
         if fields:
             self._read_props(description, fields)
 
+    @classmethod
+    def read_description(cls, description: dict) -> dict:
+        """Return the values of the fields of an object read from its description
+
+        Raises
+        ------
+            ModelValidationError if the description does not match the schema of the class
+        """
+        errors = []
+        values = {
+            "model": description.get("model"),
+            "_name": description.get("name"),
+            "_id": description.get("id"),
+            # per-object overrides of the component bindings declared at the root of the model
+            "components": description.get("components"),
+        }
+        if values["_name"] is None and values["_id"] is None:
+            errors.append("an item needs a name or an id")
+        for key in ("model", "components"):
+            if values[key] is not None and not isinstance(values[key], dict):
+                errors.append(f"'{key}' must be a mapping")
+
+        for name, field in cls._schema.items():
+            values[name] = field.read(description, errors)
+
+        if errors:
+            raise ModelValidationError(errors)
+        return values
+
+    @property
+    def items(self):
+        """The children of this object
+
+        Children generated from a template (see the `repeat` section of the model) are built on first access.
+        """
+        if self._pending is not None:
+            pending = self._pending
+            self._pending = None
+            try:
+                self.root._expand_items(self, *pending)
+            except Exception:
+                # no partial list of children, the error is raised again on the next access
+                self._items = []
+                self._pending = pending
+                raise
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        self._items = items
+        self._pending = None
+
     def visit(self, visitor):
         """Visit this object by a visitor.
 
@@ -61,12 +141,17 @@ class TwinMakerObject:
         for item in self.items:
             item.visit(visitor)
 
+        # Let the visitor complete its work once the whole model has been visited
+        end_visit = getattr(visitor, "end_visit", None)
+        if self.parent is None and callable(end_visit):
+            end_visit(self)
+
     def _read_props(self, description: dict, fields):
         """Internal method that introspect the description field and creates the properties found
         in the fields array
         """
         for field in fields:
-            self.__dict__[field] = description[field] if field in description else None
+            setattr(self, field, description[field] if field in description else None)
 
     @property
     def index(self):
@@ -76,7 +161,14 @@ class TwinMakerObject:
         -------
             The index of this object in the parent else 0
         """
-        return self.parent.items.index(self) if self.parent else 0
+        if not self.parent:
+            return 0
+        # position recorded when the model was loaded, unless the items changed since
+        position = self._position
+        items = self.parent.items
+        if position is not None and position < len(items) and items[position] is self:
+            return position
+        return items.index(self)
 
     @property
     def urn(self):
@@ -103,47 +195,287 @@ class TwinMakerObject:
         """Name of the object"""
         return self._name
 
+    @property
+    def root(self):
+        """The root of the domain model this object belongs to"""
+        return self.parent.root if self.parent else self
+
+    def component_bindings(self):
+        """Return the components bound to this object
+
+        Bindings are declared once per object type in the `component_bindings` section of the model,
+        an object can override the property values of its components with a `components` section.
+
+        Returns
+        -------
+            A dict of ComponentBinding by component name
+
+        Examples
+        --------
+            component_bindings:
+              Turbine:
+                TurbineFan:
+                  component_type: com.aws.sample.component.random
+                  properties:
+                    min: {double_value: 50}
+                    max: {double_value: 150}
+            items:
+            - name: turbine1
+              type: Turbine
+              components:
+                TurbineFan:
+                  properties:
+                    max: {double_value: 200}
+        """
+        declared = getattr(self.root, "bindings", {}).get(type(self).__name__, {})
+        overrides = self.components or {}
+
+        bindings = {}
+        for component_name in list(declared) + [
+            name for name in overrides if name not in declared
+        ]:
+            spec = declared.get(component_name, {})
+            override = overrides.get(component_name, {})
+            component_type = override.get("component_type", spec.get("component_type"))
+            if not component_type:
+                raise Exception(
+                    f"No component type bound to component {component_name} of {self.name}"
+                )
+            properties = dict(spec.get("properties") or {})
+            properties.update(override.get("properties") or {})
+            bindings[component_name] = ComponentBinding(
+                component_name, component_type, properties
+            )
+        return bindings
+
+
+class ComponentBinding:
+    """A component of an entity: its type and the values of its properties, as declared in the model.
+
+    The property values use the snake_case fields of CfnEntity.DataValueProperty, e.g. {double_value: 50}.
+    Bindings with the same signature resolve to the same CDK structure.
+    """
+
+    def __init__(self, component_name: str, component_type_id: str, properties: dict):
+        self.component_name = component_name
+        self.component_type_id = component_type_id
+        self.properties = properties
+        self.signature = (
+            component_name,
+            component_type_id,
+            json.dumps(properties, sort_keys=True),
+        )
+
 
 class TwinMakerRoot(TwinMakerObject):
-    """Represents the root of a domain model."""
+    """Represents the root of a domain model.
+
+    Repetitive hierarchies can be described with templates: an item with a `repeat` section is expanded
+    once per value of its index, the strings of the descriptions can use ${expression} placeholders on the
+    `parameters` of the model and the indexes, and `model` can refer to a block of the `models` section.
+    Templates are validated when the model is loaded (on their first value) but the objects they generate
+    are only built when the items of their parent are first accessed.
+
+    Examples
+    --------
+        name: ACME WindFarm
+        parameters:
+          spacing: 300
+        models:
+          turbine: {uri: turbine.glb, rotation: {x: 0, y: 90, z: 0}}
+        items:
+        - name: group1
+          type: TurbineGroup
+          items:
+          - type: Turbine
+            repeat: {index: t, start: 1, count: 200}
+            name: turbine_${t}
+            device_code: "0x${t:04x}"
+            model:
+              use: turbine
+              position: {x: "${t * spacing}", y: 0, z: 0}
+    """
 
     def __init__(self, description: dict, fields=None) -> None:
         """Internal constructor, use the load_from_yaml method instead."""
         super().__init__(description, fields=fields)
         self._description = description
 
+        # component bindings by object type, see TwinMakerObject.component_bindings
+        self.bindings = description.get("component_bindings") or {}
+        # variables of the templates and shared model blocks
+        self.parameters = description.get("parameters") or {}
+        self.models = description.get("models") or {}
+
         self.klasses = {}
         for name, obj in inspect.getmembers(sys.modules[self.__module__]):
             if inspect.isclass(obj):
                 self.klasses[name] = obj
 
-        if "items" in description:
-            for item in description["items"]:
-                try:
-                    self.items.append(self._build_item(item, self))
-                except Exception as e:
-                    LOGGER.info("Unable to build item: " + str(e))
+        # all the validation errors of the items are reported at once, at the end of the loading
+        self._validation_errors = []
+        self._model_index = None
+        self._build_items(self, description.get("items") or [], dict(self.parameters))
+        if self._validation_errors:
+            raise ModelValidationError(self._validation_errors)
+
+    @staticmethod
+    def _append_item(parent: TwinMakerObject, item: TwinMakerObject):
+        item._position = len(parent.items)
+        parent.items.append(item)
+
+    @property
+    def model_index(self) -> ModelIndex:
+        """The secondary indexes of the model (URN, type, fields, subtrees), built on first use
+
+        Call reindex() after changing the hierarchy of the model.
+        """
+        if self._model_index is None:
+            self._model_index = ModelIndex(self)
+        return self._model_index
+
+    def reindex(self):
+        """Drop the indexes of the model, they are rebuilt on their next use"""
+        self._model_index = None
+
+    def find(self, urn: str):
+        """Return the object of the model with the given URN, None if there is none
 
-    def _build_item(self, item_description: dict, parent=None) -> TwinMakerObject:
-        """Recursive method to build a TwinMakerObject based on its description"""
+        Examples
+        --------
+            turbine = farm.find("urn:ngsi-ld:Turbine:turbine3")
+        """
+        return self.model_index.get(urn)
+
+    def query(self, type=None, within=None, **fields):
+        """Return the objects of the model matching all the criteria, see ModelIndex.query
+
+        Examples
+        --------
+            turbines = farm.query(type=Turbine, within=group, device_code="0x03")
+        """
+        return self.model_index.query(type=type, within=within, **fields)
+
+    def _build_items(self, parent: TwinMakerObject, descriptions: list, scope: dict):
+        """Build the children of an object, or defer them when they include templates"""
+        if any("repeat" in description for description in descriptions):
+            parent._pending = (descriptions, scope)
+            self._validate_items(
+                descriptions, self._item_path(parent.parent, parent), scope
+            )
+        else:
+            self._add_items(parent, descriptions, scope)
+
+    def _expand_items(self, parent: TwinMakerObject, descriptions: list, scope: dict):
+        """Build the children of an object deferred by _build_items"""
+        self._validation_errors = []
+        self._add_items(parent, descriptions, scope)
+        if self._validation_errors:
+            raise ModelValidationError(self._validation_errors)
+
+    def _add_items(self, parent: TwinMakerObject, descriptions: list, scope: dict):
+        for description in descriptions:
+            try:
+                for instance, instance_scope in expand(description, scope):
+                    built = self._build_item(instance, parent, instance_scope)
+                    if built is not None:
+                        self._append_item(parent, built)
+            except ModelValidationError as e:
+                # errors of the template itself, like an unknown variable
+                self._record_errors(self._item_path(parent, description), e.errors)
+            except Exception as e:
+                if parent is not self:
+                    raise
+                LOGGER.info("Unable to build item: " + str(e))
+
+    def _build_item(
+        self, item_description: dict, parent=None, scope=None
+    ) -> TwinMakerObject:
+        """Recursive method to build a TwinMakerObject based on its description, with its
+        placeholders evaluated (see template.expand)
+
+        Returns None when the description is not valid, the errors are recorded to be raised
+        once the whole model is loaded.
+        """
         if "type" not in item_description:
             raise Exception("No type defined for item")
 
         type = item_description["type"]
+        scope = scope or {}
         item = None
 
         if type in self.klasses:
-            item = self.klasses[type](item_description, parent=parent)
+            try:
+                item = self.klasses[type](
+                    self._resolve(item_description), parent=parent
+                )
+            except ModelValidationError as e:
+                item_path = self._item_path(parent, item_description)
+                self._record_errors(item_path, e.errors)
+                self._validate_items(
+                    item_description.get("items") or [], item_path, scope
+                )
+                return None
 
         if item and "items" in item_description:
-            for sub_item in item_description["items"]:
-                item.items.append(self._build_item(sub_item, parent=item))
+            self._build_items(item, item_description["items"], scope)
 
         if item:
             return item
         else:
             raise Exception(f"Item type not found : {type}")
 
+    def _resolve(self, item_description: dict) -> dict:
+        """Return an item description with the shared model block it refers to"""
+        model = item_description.get("model")
+        if isinstance(model, dict) and "use" in model:
+            shared = self._shared_model(model["use"])
+            model = dict(shared, **{k: v for k, v in model.items() if k != "use"})
+        elif isinstance(model, str):
+            model = self._shared_model(model)
+        else:
+            return item_description
+        return dict(item_description, model=model)
+
+    def _shared_model(self, name: str) -> dict:
+        if name not in self.models:
+            raise ModelValidationError([f"unknown model block '{name}'"])
+        return self.models[name]
+
+    def _record_errors(self, item_path: str, errors):
+        self._validation_errors.extend(f"{item_path}: {error}" for error in errors)
+
+    def _item_path(self, parent: TwinMakerObject, item) -> str:
+        """Return the path of an item (object or description) from the root, for the error messages"""
+        if isinstance(item, TwinMakerObject):
+            name = item.name or item._id
+        else:
+            name = item.get("name", item.get("id"))
+        names = [str(name)]
+        while parent is not None:
+            names.append(parent.name or str(parent._id))
+            parent = parent.parent
+        return "/".join(reversed(names))
+
+    def _validate_items(self, descriptions: list, item_path: str, scope: dict):
+        """Validate item descriptions without building them, templates are validated on their first value"""
+        for description in descriptions:
+            sub_path = f"{item_path}/{description.get('name', description.get('id'))}"
+            try:
+                instance = next(expand(description, scope), None)
+                if instance is None:
+                    continue
+                sub_item, sub_scope = instance
+                sub_path = f"{item_path}/{sub_item.get('name', sub_item.get('id'))}"
+                klass = self.klasses.get(sub_item.get("type"))
+                if klass is None:
+                    continue
+                klass.read_description(self._resolve(sub_item))
+            except ModelValidationError as e:
+                self._record_errors(sub_path, e.errors)
+                continue
+            self._validate_items(sub_item.get("items") or [], sub_path, sub_scope)
+
     def load_from_yaml(description_file_path: str, klass):
         """Loads a Domain model from a YAML file
 
@@ -172,7 +504,7 @@ class TwinMakerRoot(TwinMakerObject):
             )
 
         with open(description_file_path) as file:
-            description = yaml.safe_load(file)
+            description = yaml.load(file, Loader=_YAML_LOADER)
             return klass(description)
 
 
@@ -199,38 +531,142 @@ def to_snake_case(name):
     return name.lower()
 
 
+class RawEntity:
+    """A TwinMaker entity held as plain data, emitted in bulk by a TwinMakerCDKVisitor in raw mode."""
+
+    def __init__(self, construct_id: str, entity_id: str, parent_entity_id, properties):
+        self.construct_id = construct_id
+        self.entity_id = entity_id
+        self.parent_entity_id = parent_entity_id
+        # CloudFormation properties of the AWS::IoTTwinMaker::Entity resource
+        self.properties = properties
+
+
 class TwinMakerCDKVisitor(Construct):
     """Abstract visitor to generate CDK calls from a domain model. In its accept
     method, it introspect the current class implementation to find some methods
     matching the `on_{object_type}` pattern and calling them.
-    The hook must return a CfnEntity object.
+    The hook must return a CfnEntity object, usually built with the `entity` method.
+
+    Every CfnEntity created is a call into the CDK (JSII) process. With `raw=True`, the
+    `entity` method returns plain data instead and all the entities are added to the
+    stack at the end of the visit through a single CfnInclude, with the logical IDs
+    and dependencies they would have as CfnEntity constructs.
 
     Examples
     --------
 
         def on_wind_farm(self, farm: WindFarm):
-            return twinmaker.CfnEntity(
-                self,
-                f"WindFarm{farm.name}",
-                parent_entity_id=farm.parent.urn.fqn if farm.parent else None,
-                entity_name=farm.name,
-                entity_id=farm.urn.fqn,
-                workspace_id=self._workspace.workspace_id,
-                components={},
-            )
+            return self.entity(f"WindFarm{farm.name}", farm)
 
     """
 
     def __init__(
-        self, scope: "Construct", id: str, workspace: twinmaker.CfnWorkspace
+        self,
+        scope: "Construct",
+        id: str,
+        workspace: twinmaker.CfnWorkspace,
+        raw: bool = False,
     ) -> None:
         super().__init__(scope, id)
 
         self._workspace = workspace
+        self.workspace_id = workspace.workspace_id
+        self.raw = raw
         self._index_entities: Mapping[str, twinmaker.CfnEntity] = {}
+        # component structures shared by the entities having the same bindings
+        self._components_by_signature = {}
+
+        # raw mode: logical IDs by entity_id and the resources of the template to include
+        self._path = None
+        self._logical_ids = {}
+        self._resources = {}
 
         self.node.add_dependency(workspace)
 
+    def entity(self, construct_id: str, entity: TwinMakerObject, components=None):
+        """Build the TwinMaker entity of an object of the model.
+
+        Parameters
+        ----------
+            construct_id: string, required
+                The ID of the CfnEntity construct
+
+            entity: TwinMakerObject, required
+                The object of the model
+
+            components: dict, optional
+                The components of the entity, as returned by `components_for`
+
+        Returns
+        -------
+            A CfnEntity, or a RawEntity in raw mode
+        """
+        parent_entity_id = entity.parent.urn.fqn if entity.parent else None
+        entity_id = entity.urn.fqn
+        if self.raw:
+            properties = {
+                "EntityId": entity_id,
+                "EntityName": entity.name,
+                "WorkspaceId": {"Ref": "WorkspaceId"},
+                "Components": components or {},
+            }
+            if parent_entity_id:
+                properties["ParentEntityId"] = parent_entity_id
+            return RawEntity(construct_id, entity_id, parent_entity_id, properties)
+
+        return twinmaker.CfnEntity(
+            self,
+            construct_id,
+            parent_entity_id=parent_entity_id,
+            entity_name=entity.name,
+            entity_id=entity_id,
+            workspace_id=self.workspace_id,
+            components=components or {},
+        )
+
+    def components_for(
+        self, entity: TwinMakerObject
+    ) -> Mapping[str, twinmaker.CfnEntity.ComponentProperty]:
+        """Return the CfnEntity components of an entity, built from its component bindings.
+
+        A component structure is built once per binding signature (component type and property values)
+        and shared by every entity having that signature. In raw mode, the structures are
+        CloudFormation dicts.
+        """
+        components = {}
+        for name, binding in entity.component_bindings().items():
+            component = self._components_by_signature.get(binding.signature)
+            if component is None:
+                component = (
+                    self._raw_component(binding)
+                    if self.raw
+                    else self._cdk_component(binding)
+                )
+                self._components_by_signature[binding.signature] = component
+            components[name] = component
+        return components
+
+    def _cdk_component(self, binding) -> twinmaker.CfnEntity.ComponentProperty:
+        return twinmaker.CfnEntity.ComponentProperty(
+            component_type_id=binding.component_type_id,
+            properties={
+                property_name: twinmaker.CfnEntity.PropertyProperty(
+                    value=twinmaker.CfnEntity.DataValueProperty(**value)
+                )
+                for property_name, value in binding.properties.items()
+            },
+        )
+
+    def _raw_component(self, binding) -> dict:
+        return {
+            "ComponentTypeId": binding.component_type_id,
+            "Properties": {
+                property_name: {"Value": to_cfn_data_value(value)}
+                for property_name, value in binding.properties.items()
+            },
+        }
+
     def accept(self, entity: TwinMakerObject):
 
         # Convert the object type to snake_case, verify if there is
@@ -241,6 +677,10 @@ class TwinMakerCDKVisitor(Construct):
         if callable(method):
             twinmaker_entity = method(entity)
 
+            if isinstance(twinmaker_entity, RawEntity):
+                self._add_raw_entity(twinmaker_entity)
+                return
+
             # Index entities by their entity_id to be able to reference them when
             # creating the dependency
             self._index_entities[twinmaker_entity.entity_id] = twinmaker_entity
@@ -250,6 +690,48 @@ class TwinMakerCDKVisitor(Construct):
                 parent = self._index_entities[twinmaker_entity.parent_entity_id]
                 twinmaker_entity.node.add_dependency(parent)
 
+    def _add_raw_entity(self, raw_entity: RawEntity):
+        if self._path is None:
+            # construct path of this visitor below its stack, to allocate logical IDs
+            stack_path = Stack.of(self).node.path
+            self._path = self.node.path[len(stack_path) + 1 :].split("/")
+
+        logical_id = make_logical_id(self._path + [raw_entity.construct_id])
+        if logical_id in self._resources:
+            raise Exception(
+                f"There is already an entity named '{raw_entity.construct_id}' in {self.node.path}"
+            )
+        resource = {"Type": "AWS::IoTTwinMaker::Entity"}
+        if raw_entity.parent_entity_id:
+            resource["DependsOn"] = [self._logical_ids[raw_entity.parent_entity_id]]
+        resource["Properties"] = raw_entity.properties
+
+        self._logical_ids[raw_entity.entity_id] = logical_id
+        self._resources[logical_id] = resource
+
+    def end_visit(self, root: TwinMakerObject):
+        """Add the entities gathered in raw mode to the stack, in a single CfnInclude"""
+        if not self._resources:
+            return
+
+        template = {
+            "Parameters": {"WorkspaceId": {"Type": "String"}},
+            "Resources": self._resources,
+        }
+        # next to the synthesized templates: the file outlives the construct creation and the synthesis
+        template_file = path.join(
+            Stage.of(self).outdir, f"{self.node.addr}.entities.json"
+        )
+        with open(template_file, "w") as file:
+            json.dump(template, file)
+        cfn_inc.CfnInclude(
+            self,
+            "Entities",
+            template_file=template_file,
+            parameters={"WorkspaceId": self.workspace_id},
+        )
+        self._resources = {}
+
 
 class SceneVisitor:
     """Abstract visitor to generate a TwinMaker 3D scene from a domain model. In its accept
@@ -269,7 +751,7 @@ class SceneVisitor:
             node.components.append(
                 {
                     "type": "ModelRef",
-                    "uri": f"s3://{self.s3_bucket_name}/models/animated_wind_turbine.glb",
+                    "uri": self.asset_uri("models/animated_wind_turbine.glb"),
                     "modelType": "GLB"
                 }
             )
@@ -277,9 +759,13 @@ class SceneVisitor:
             ...
     """
 
-    def __init__(self, s3_bucket_name, base_file: str = "base.json") -> None:
+    def __init__(
+        self, s3_bucket_name, base_file: str = "base.json", asset_keys=None
+    ) -> None:
 
         self.s3_bucket_name = s3_bucket_name
+        # content-addressed keys of the resources by path, see twinmaker_builder.assets
+        self.asset_keys = asset_keys or {}
 
         # Initialize content JSON
         with open(base_file) as file:
@@ -288,13 +774,14 @@ class SceneVisitor:
         # entity_id to entity
         self.entity_index = {}
 
-    def _add_node(self, node: SceneNode):
+    def _add_node(self, node: SceneNode) -> int:
         self.content["nodes"].append(node)
+        return len(self.content["nodes"]) - 1
 
     def accept(self, entity: TwinMakerObject):
         node = SceneNode(self, entity.name, model=entity.model)
         self.entity_index[entity.urn.fqn] = (entity, node)
-        self._add_node(node)
+        entity_index = self._add_node(node)
 
         klass = type(entity).__name__
         method_name = f"on_{to_snake_case(klass)}"
@@ -303,14 +790,21 @@ class SceneVisitor:
             method(entity, node)
 
         # To handle hierarchy of nodes
-        entity_index = self.content["nodes"].index(node)
         if entity.parent:
             parent_node = self.entity_index[entity.parent.urn.fqn][1]
             parent_node.children.append(entity_index)
-            print(len(parent_node.children))
         else:
             self.content["rootNodeIndexes"].append(entity_index)
 
+    def asset_uri(self, asset_path: str) -> str:
+        """Return the S3 URI of a resource of the workspace, e.g. "models/turbine.glb"
+
+        The resource is referred to by its content-addressed key when the visitor has one.
+        """
+        return (
+            f"s3://{self.s3_bucket_name}/{self.asset_keys.get(asset_path, asset_path)}"
+        )
+
     def get_content(self):
         """Return the 3D scene as JSON
 
@@ -0,0 +1,103 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+from os import link, makedirs, path, walk
+from shutil import copyfile, rmtree
+from typing import Dict
+
+# ---------------------------------------------------------------------------
+#   Content-addressed storage of the resources of a workspace (3D models, scenes) in its S3 bucket
+#
+#   Every object is stored under a key derived from the SHA-256 of its content, e.g. cas/<sha256>.glb,
+#   and the scenes refer to these keys: an object that does not change keeps its key. stage_directory() lays
+#   the files out under their keys for the tools copying a directory as is, such as a CDK BucketDeployment.
+#
+#   Keys never change content, so they are never overwritten. The objects no longer referenced stay in
+#   the bucket until cleaned up.
+# ---------------------------------------------------------------------------
+
+DEFAULT_PREFIX = "cas"
+
+# Placeholder of the bucket name in the content of the scenes: the key of a scene does not depend on the
+# bucket it is deployed to
+BUCKET_PLACEHOLDER = "{{bucket}}"
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """Return the SHA-256 of the content of a file, in hex"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_key(digest: str, extension: str, prefix: str = DEFAULT_PREFIX) -> str:
+    """Return the key of an object from the SHA-256 of its content
+
+    Examples
+    --------
+        key = content_key(file_digest("models/turbine.glb"), ".glb")
+        assert key.startswith("cas/") and key.endswith(".glb")
+    """
+    return f"{prefix}/{digest}{extension}"
+
+
+def bytes_key(data: bytes, extension: str, prefix: str = DEFAULT_PREFIX) -> str:
+    """Return the key of an object from its content"""
+    return content_key(hashlib.sha256(data).hexdigest(), extension, prefix)
+
+
+def hash_directory(directory: str, prefix: str = DEFAULT_PREFIX) -> Dict[str, str]:
+    """Return the key of every file of a directory, by path relative to the directory
+
+    Examples
+    --------
+        asset_keys = hash_directory("twinmaker_resources")
+        key = asset_keys["models/animated_wind_turbine.glb"]
+    """
+    asset_keys = {}
+    for root, _, files in walk(directory):
+        for name in sorted(files):
+            file_path = path.join(root, name)
+            relative = path.relpath(file_path, directory).replace(path.sep, "/")
+            asset_keys[relative] = content_key(
+                file_digest(file_path), path.splitext(name)[1], prefix
+            )
+    return asset_keys
+
+
+def stage_directory(
+    directory: str, staging_dir: str, prefix: str = DEFAULT_PREFIX
+) -> Dict[str, str]:
+    """Lay the files of a directory out under their keys in staging_dir, replacing its content
+
+    Files are hard-linked when possible, copied otherwise.
+
+    Returns
+    -------
+        The key of every file of the directory, see hash_directory
+    """
+    asset_keys = hash_directory(directory, prefix)
+    if path.isdir(staging_dir):
+        rmtree(staging_dir)
+    for relative, key in asset_keys.items():
+        target = path.join(staging_dir, *key.split("/"))
+        if path.exists(target):
+            # same content as a file already staged
+            continue
+        makedirs(path.dirname(target), exist_ok=True)
+        source = path.join(directory, relative)
+        try:
+            link(source, target)
+        except OSError:
+            copyfile(source, target)
+    return asset_keys
+
+
+def render_scene(content: str, bucket_name: str) -> bytes:
+    """Return the content of a scene generated with BUCKET_PLACEHOLDER, for a bucket"""
+    return content.replace(BUCKET_PLACEHOLDER, bucket_name).encode("utf-8")
@@ -0,0 +1,87 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import re
+from typing import List
+
+# Constants of the logical ID allocation of the CDK (see makeUniqueId in aws-cdk-lib/core)
+HIDDEN_ID = "Default"
+HIDDEN_FROM_HUMAN_ID = "Resource"
+PATH_SEP = "/"
+HASH_LEN = 8
+MAX_HUMAN_LEN = 240
+MAX_ID_LEN = 255
+
+
+def _remove_non_alphanumeric(component: str) -> str:
+    return re.sub("[^A-Za-z0-9]", "", component)
+
+
+def _remove_dupes(components: List[str]) -> List[str]:
+    result = []
+    for component in components:
+        if not result or not result[-1].endswith(component):
+            result.append(component)
+    return result
+
+
+def make_logical_id(components: List[str]) -> str:
+    """Return the logical ID the CDK allocates to an element from its construct path.
+
+    Parameters
+    ----------
+        components: list, required
+            The construct IDs from the stack (excluded) down to the element
+
+    Examples
+    --------
+        logical_id = make_logical_id(["WindFarm", "Turbineturbine1"])
+        assert logical_id.startswith("WindFarmTurbineturbine1")
+    """
+    components = [c for c in components if c != HIDDEN_ID]
+    if not components:
+        raise Exception("Unable to calculate a logical ID for an empty path")
+
+    # top-level elements use their ID as is
+    if len(components) == 1:
+        candidate = _remove_non_alphanumeric(components[0])
+        if len(candidate) <= MAX_ID_LEN:
+            return candidate
+
+    path_hash = (
+        hashlib.md5(PATH_SEP.join(components).encode("utf-8"))
+        .hexdigest()[:HASH_LEN]
+        .upper()
+    )
+    human = "".join(
+        _remove_non_alphanumeric(c)
+        for c in _remove_dupes(components)
+        if c != HIDDEN_FROM_HUMAN_ID
+    )[:MAX_HUMAN_LEN]
+    return human + path_hash
+
+
+def _pascal_case(name: str) -> str:
+    return "".join(part[:1].upper() + part[1:] for part in name.split("_"))
+
+
+def to_cfn_data_value(value: dict) -> dict:
+    """Convert the snake_case fields of a CfnEntity.DataValueProperty to the CloudFormation syntax
+
+    Examples
+    --------
+        assert to_cfn_data_value({"double_value": 50}) == {"DoubleValue": 50}
+    """
+    data_value = {}
+    for field, field_value in value.items():
+        if field == "list_value":
+            field_value = [to_cfn_data_value(item) for item in field_value]
+        elif field == "map_value":
+            field_value = {
+                key: to_cfn_data_value(item) for key, item in field_value.items()
+            }
+        elif field == "relationship_value":
+            field_value = {_pascal_case(k): v for k, v in field_value.items()}
+        data_value[_pascal_case(field)] = field_value
+    return data_value
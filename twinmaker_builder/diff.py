@@ -0,0 +1,278 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import gc
+import json
+import marshal
+from operator import attrgetter, itemgetter
+from typing import Dict, List
+
+from .schema import slot_names
+
+# Attributes of a TwinMakerObject that are not fields of the object itself
+_STRUCTURE = frozenset(
+    (
+        "items",
+        "_items",
+        "_pending",
+        "parent",
+        "klasses",
+        "_description",
+        "bindings",
+        "_position",
+        "_model_index",
+        "_validation_errors",
+        "parameters",
+        "models",
+    )
+)
+
+
+def object_fields(obj) -> dict:
+    """Return the fields of an object of the model, without its structure (parent and items)
+
+    Examples
+    --------
+        fields = object_fields(turbine)
+        assert fields["device_code"] == "0x01"
+    """
+    attributes = {name: getattr(obj, name) for name in slot_names(type(obj))}
+    attributes.update(getattr(obj, "__dict__", {}))
+    return {
+        key[1:] if key in ("_id", "_name") else key: value
+        for key, value in attributes.items()
+        if key not in _STRUCTURE
+    }
+
+
+def _getter(make_getter, names):
+    """Return a getter of the fields among names, built with attrgetter (slots) or itemgetter (dict)"""
+    names = [name for name in names if name not in _STRUCTURE]
+    if not names:
+        return lambda obj: ()
+    return make_getter(*names)
+
+
+def _serialize(value) -> bytes:
+    try:
+        return marshal.dumps(value)
+    except ValueError:
+        # values marshal does not support, e.g. YAML timestamps
+        return json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+
+
+class ModelNode:
+    """An object of the model, indexed by URN with the digests of its fields and of its subtree"""
+
+    __slots__ = ("obj", "urn", "parent_urn", "digest", "subtree_digest", "children")
+
+    def __init__(self, obj, urn: str, parent_urn, digest: int):
+        self.obj = obj
+        self.urn = urn
+        self.parent_urn = parent_urn
+        self.digest = digest
+        self.subtree_digest = digest
+        self.children = ()
+
+
+def index_model(root) -> Dict[str, ModelNode]:
+    """Index the objects of a model by URN, in parent-before-child order
+
+    The digest of an object covers its type, URN, fields and the component bindings declared for its type.
+    The digest of a subtree also covers the subtrees of the children, in order: two subtrees with the same
+    digest hold the same objects, fields and hierarchy.
+    Digests are built with hash(), they can only be compared within a process.
+    """
+    bindings = getattr(root, "bindings", {})
+    declared = {name: _serialize(spec) for name, spec in bindings.items()}
+    # getters of the fields held in slots by class, and of the fields held in the __dict__ of the objects
+    # by attribute names (objects of a class usually share the same attributes)
+    slot_getters = {}
+    dict_getters = {}
+    nodes = {}
+
+    def build(obj, parent_urn):
+        urn = obj.urn.fqn
+        if urn in nodes:
+            raise Exception(f"Duplicate URN in the model: {urn}")
+        klass = type(obj)
+        slot_getter = slot_getters.get(klass)
+        if slot_getter is None:
+            slot_getter = slot_getters[klass] = _getter(attrgetter, slot_names(klass))
+        attributes = getattr(obj, "__dict__", None)
+        names = tuple(attributes) if attributes else ()
+        dict_getter = dict_getters.get(names)
+        if dict_getter is None:
+            dict_getter = dict_getters[names] = _getter(itemgetter, names)
+
+        values = (slot_getter(obj), dict_getter(attributes) if names else ())
+        node = ModelNode(
+            obj,
+            urn,
+            parent_urn,
+            hash(
+                (
+                    klass.__name__,
+                    urn,
+                    names,
+                    _serialize(values),
+                    declared.get(klass.__name__),
+                )
+            ),
+        )
+        nodes[urn] = node
+
+        if obj.items:
+            node.children = [build(item, urn) for item in obj.items]
+            node.subtree_digest = hash(
+                (node.digest, tuple([child.subtree_digest for child in node.children]))
+            )
+        return node
+
+    # indexing allocates a node per object but no reference cycle, collections triggered by these allocations
+    # would traverse the whole (large) model for nothing
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        build(root, None)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return nodes
+
+
+class Move:
+    """An object attached to another parent"""
+
+    def __init__(self, obj, old_parent_urn: str, new_parent_urn: str):
+        self.obj = obj
+        self.old_parent_urn = old_parent_urn
+        self.new_parent_urn = new_parent_urn
+
+
+class Change:
+    """An object whose fields (or component bindings) changed, by field name the (old, new) values"""
+
+    def __init__(self, old, new, fields: dict):
+        self.old = old
+        self.new = new
+        self.fields = fields
+
+
+class ModelDiff:
+    """Differences between two versions of a model, objects are matched by URN.
+
+    Attributes
+    ----------
+        added: list
+            The objects of the new model that are not in the old one, parents before children
+
+        removed: list
+            The objects of the old model that are not in the new one, parents before children
+
+        moved: list of Move
+            The objects attached to a different parent
+
+        changed: list of Change
+            The objects with different fields
+    """
+
+    def __init__(self, new_index: Dict[str, ModelNode]):
+        self._new_index = new_index
+        self.added: List = []
+        self.removed: List = []
+        self.moved: List[Move] = []
+        self.changed: List[Change] = []
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def updated_objects(self) -> List:
+        """Return the objects of the new model that are added, moved or changed, parents before children"""
+        urns = {obj.urn.fqn for obj in self.added}
+        urns.update(move.obj.urn.fqn for move in self.moved)
+        urns.update(change.new.urn.fqn for change in self.changed)
+        return [node.obj for urn, node in self._new_index.items() if urn in urns]
+
+    def __repr__(self):
+        return (
+            f"ModelDiff(added={len(self.added)}, removed={len(self.removed)}, "
+            f"moved={len(self.moved)}, changed={len(self.changed)})"
+        )
+
+
+def _changed_fields(old, new) -> dict:
+    old_fields = object_fields(old)
+    new_fields = object_fields(new)
+    old_fields["component_bindings"] = _bindings_of(old)
+    new_fields["component_bindings"] = _bindings_of(new)
+    return {
+        name: (old_fields.get(name), new_fields.get(name))
+        for name in list(old_fields) + [n for n in new_fields if n not in old_fields]
+        if old_fields.get(name) != new_fields.get(name)
+    }
+
+
+def _bindings_of(obj) -> dict:
+    return {
+        name: {
+            "component_type": binding.component_type_id,
+            "properties": binding.properties,
+        }
+        for name, binding in obj.component_bindings().items()
+    }
+
+
+def diff_models(old_root, new_root) -> ModelDiff:
+    """Compare two versions of a model.
+
+    Examples
+    --------
+        old = TwinMakerRoot.load_from_yaml("farm.yaml", WindFarm)
+        new = TwinMakerRoot.load_from_yaml("farm.new.yaml", WindFarm)
+        diff = diff_models(old, new)
+        for change in diff.changed:
+            print(change.new.urn.fqn, change.fields)
+    """
+    return diff_indexes(index_model(old_root), index_model(new_root))
+
+
+def diff_indexes(
+    old_index: Dict[str, ModelNode], new_index: Dict[str, ModelNode]
+) -> ModelDiff:
+    """Compare two versions of a model indexed with index_model, an index can be reused across comparisons.
+
+    The subtrees with the same digest on both sides are skipped: the comparison only descends into the parts
+    of the hierarchy that changed.
+    """
+    diff = ModelDiff(new_index)
+
+    # indexes start with their root
+    pending = [next(iter(new_index.values()))]
+    while pending:
+        node = pending.pop()
+        previous = old_index.get(node.urn)
+        if previous is None:
+            diff.added.append(node.obj)
+        else:
+            if previous.parent_urn != node.parent_urn:
+                diff.moved.append(Move(node.obj, previous.parent_urn, node.parent_urn))
+            if previous.subtree_digest == node.subtree_digest:
+                continue
+            if previous.digest != node.digest:
+                fields = _changed_fields(previous.obj, node.obj)
+                if fields:
+                    diff.changed.append(Change(previous.obj, node.obj, fields))
+        pending.extend(reversed(node.children))
+
+    pending = [next(iter(old_index.values()))]
+    while pending:
+        node = pending.pop()
+        current = new_index.get(node.urn)
+        if current is None:
+            diff.removed.append(node.obj)
+        elif current.subtree_digest == node.subtree_digest:
+            continue
+        pending.extend(reversed(node.children))
+
+    return diff
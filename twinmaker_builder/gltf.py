@@ -0,0 +1,670 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import copy
+import hashlib
+import json
+import logging
+import struct
+from os import makedirs, path, remove, walk
+from typing import Dict, List
+
+from .assets import file_digest
+
+LOGGER = logging.getLogger()
+
+# ---------------------------------------------------------------------------
+#   Optimization of the GLB (binary glTF 2.0) models of a workspace
+#
+#   The geometry of the meshes is decoded and written again:
+#       - texture coordinate sets no material uses are dropped, as well as the accessors and buffer views
+#         nothing refers to
+#       - indices are stored on 16 bits when possible
+#       - vertex attributes are quantized (KHR_mesh_quantization): positions on normalized 16 bits with the
+#         dequantization transform on a node holding the mesh, normals and tangents on normalized 8 bits,
+#         texture coordinates on normalized 16 bits
+#       - buffer views and accessors with the same content are stored once
+#   and, optionally, meshes are simplified by vertex clustering for the LOD variants of a model.
+#
+#   Images are copied as is. Models using extensions that store data in buffers (e.g. Draco), sparse
+#   accessors or several buffers are copied as is.
+# ---------------------------------------------------------------------------
+
+# Bumped when the output of optimize_glb changes, it is part of the cache keys
+OPTIMIZER_VERSION = 3
+
+_JSON_CHUNK = 0x4E4F534A
+_BIN_CHUNK = 0x004E4942
+
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_TRIANGLES = 4
+
+_BYTE, _UNSIGNED_BYTE, _SHORT, _UNSIGNED_SHORT, _UNSIGNED_INT, _FLOAT = (
+    5120,
+    5121,
+    5122,
+    5123,
+    5125,
+    5126,
+)
+_FORMATS = {
+    _BYTE: "b",
+    _UNSIGNED_BYTE: "B",
+    _SHORT: "h",
+    _UNSIGNED_SHORT: "H",
+    _UNSIGNED_INT: "I",
+    _FLOAT: "f",
+}
+# maximum of the normalized integer types
+_NORMALIZATION = {
+    _BYTE: 127,
+    _UNSIGNED_BYTE: 255,
+    _SHORT: 32767,
+    _UNSIGNED_SHORT: 65535,
+}
+_COMPONENTS = {
+    "SCALAR": 1,
+    "VEC2": 2,
+    "VEC3": 3,
+    "VEC4": 4,
+    "MAT2": 4,
+    "MAT3": 9,
+    "MAT4": 16,
+}
+
+# Extensions that do not store data in the buffers
+_SUPPORTED_EXTENSIONS = frozenset(
+    (
+        "KHR_lights_punctual",
+        "KHR_materials_clearcoat",
+        "KHR_materials_emissive_strength",
+        "KHR_materials_ior",
+        "KHR_materials_sheen",
+        "KHR_materials_specular",
+        "KHR_materials_transmission",
+        "KHR_materials_unlit",
+        "KHR_materials_variants",
+        "KHR_materials_volume",
+        "KHR_mesh_quantization",
+        "KHR_texture_transform",
+    )
+)
+
+
+class GLB:
+    """A GLB file: the glTF JSON document and its binary chunk"""
+
+    def __init__(self, document: dict, binary: bytes = b""):
+        self.document = document
+        self.binary = binary
+
+    @classmethod
+    def parse(cls, data: bytes) -> "GLB":
+        magic, version, length = struct.unpack_from("<4sII", data, 0)
+        if magic != b"glTF" or version != 2:
+            raise Exception("Not a glTF 2.0 binary file")
+        document = None
+        binary = b""
+        offset = 12
+        while offset < length:
+            chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+            chunk = data[offset + 8 : offset + 8 + chunk_length]
+            if chunk_type == _JSON_CHUNK:
+                document = json.loads(chunk)
+            elif chunk_type == _BIN_CHUNK:
+                binary = bytes(chunk)
+            offset += 8 + chunk_length
+        if document is None:
+            raise Exception("No JSON chunk in the GLB file")
+        return cls(document, binary)
+
+    def to_bytes(self) -> bytes:
+        content = json.dumps(self.document, separators=(",", ":")).encode("utf-8")
+        content += b" " * (-len(content) % 4)
+        chunks = [struct.pack("<II", len(content), _JSON_CHUNK), content]
+        if self.binary:
+            binary = self.binary + b"\0" * (-len(self.binary) % 4)
+            chunks += [struct.pack("<II", len(binary), _BIN_CHUNK), binary]
+        body = b"".join(chunks)
+        return struct.pack("<4sII", b"glTF", 2, 12 + len(body)) + body
+
+    def view_bytes(self, index: int) -> bytes:
+        view = self.document["bufferViews"][index]
+        start = view.get("byteOffset", 0)
+        return self.binary[start : start + view["byteLength"]]
+
+    def read_accessor(self, index: int) -> List[tuple]:
+        """Return the elements of an accessor, normalized integers as floats"""
+        accessor = self.document["accessors"][index]
+        view = self.document["bufferViews"][accessor["bufferView"]]
+        component_type = accessor["componentType"]
+        components = _COMPONENTS[accessor["type"]]
+        element = struct.Struct("<" + _FORMATS[component_type] * components)
+        stride = view.get("byteStride") or element.size
+        start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        count = accessor["count"]
+
+        if stride == element.size:
+            values = list(
+                element.iter_unpack(self.binary[start : start + count * stride])
+            )
+        else:
+            values = [
+                element.unpack_from(self.binary, start + i * stride)
+                for i in range(count)
+            ]
+        if accessor.get("normalized"):
+            scale = _NORMALIZATION[component_type]
+            values = [tuple(max(c / scale, -1.0) for c in value) for value in values]
+        return values
+
+
+class _Writer:
+    """Builds the buffer views and accessors of an optimized model, storing the same content once"""
+
+    def __init__(self):
+        self.binary = bytearray()
+        self.views = []
+        self.accessors = []
+        self._view_index = {}
+        self._accessor_index = {}
+        # accessors copied as is, by index in the source model
+        self._copied = {}
+
+    def add_view(self, data: bytes, target=None, stride=None) -> int:
+        key = (bytes(data), target, stride)
+        index = self._view_index.get(key)
+        if index is None:
+            self.binary += b"\0" * (-len(self.binary) % 4)
+            view = {
+                "buffer": 0,
+                "byteOffset": len(self.binary),
+                "byteLength": len(data),
+            }
+            if stride:
+                view["byteStride"] = stride
+            if target:
+                view["target"] = target
+            self.binary += data
+            index = self._view_index[key] = len(self.views)
+            self.views.append(view)
+        return index
+
+    def add_accessor(self, accessor: dict) -> int:
+        key = json.dumps(accessor, sort_keys=True)
+        index = self._accessor_index.get(key)
+        if index is None:
+            index = self._accessor_index[key] = len(self.accessors)
+            self.accessors.append(accessor)
+        return index
+
+    def copy_accessor(self, glb: "GLB", index: int) -> int:
+        """Copy an accessor that is not a vertex attribute or index (animations, skins) as is"""
+        if index not in self._copied:
+            accessor = dict(glb.document["accessors"][index])
+            view = glb.document["bufferViews"][accessor.pop("bufferView")]
+            element_size = struct.calcsize(
+                "<"
+                + _FORMATS[accessor["componentType"]] * _COMPONENTS[accessor["type"]]
+            )
+            stride = view.get("byteStride") or element_size
+            start = view.get("byteOffset", 0) + accessor.pop("byteOffset", 0)
+            content = b"".join(
+                glb.binary[start + i * stride : start + i * stride + element_size]
+                for i in range(accessor["count"])
+            )
+            accessor["bufferView"] = self.add_view(content)
+            self._copied[index] = self.add_accessor(accessor)
+        return self._copied[index]
+
+    def write(
+        self,
+        values: List[tuple],
+        accessor_type: str,
+        component_type: int,
+        normalized=False,
+        target=_ARRAY_BUFFER,
+        bounds=False,
+    ) -> int:
+        """Write the elements of an accessor, normalized values are given as integers"""
+        fmt = _FORMATS[component_type] * _COMPONENTS[accessor_type]
+        element = struct.Struct("<" + fmt)
+        # vertex attributes are aligned on 4 bytes
+        padding = -element.size % 4 if target == _ARRAY_BUFFER else 0
+        packed = struct.Struct("<" + fmt + "x" * padding)
+        data = b"".join(packed.pack(*value) for value in values)
+
+        accessor = {
+            "bufferView": self.add_view(
+                data,
+                target,
+                packed.size if target == _ARRAY_BUFFER and padding else None,
+            ),
+            "componentType": component_type,
+            "count": len(values),
+            "type": accessor_type,
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if bounds and values:
+            accessor["min"] = [min(c) for c in zip(*values)]
+            accessor["max"] = [max(c) for c in zip(*values)]
+        return self.add_accessor(accessor)
+
+
+def _is_supported(document: dict) -> bool:
+    if set(document.get("extensionsUsed", [])) - _SUPPORTED_EXTENSIONS:
+        return False
+    if len(document.get("buffers", [])) > 1 or any(
+        "uri" in buffer for buffer in document.get("buffers", [])
+    ):
+        return False
+    return all(
+        "sparse" not in accessor and "bufferView" in accessor
+        for accessor in document.get("accessors", [])
+    )
+
+
+def _texcoords_used(material: dict) -> set:
+    """Return the texture coordinate sets used by the textures of a material"""
+    used = set()
+    pending = [material]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            if "index" in value:
+                used.add(value.get("texCoord", 0))
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return used
+
+
+def _quantizable(document: dict, mesh_index: int) -> bool:
+    """Whether the positions of a mesh can be dequantized by a node transform"""
+    for node in document.get("nodes", []):
+        if node.get("mesh") == mesh_index and ("skin" in node or "weights" in node):
+            return False
+    return all(
+        primitive.get("mode", _TRIANGLES) == _TRIANGLES
+        and "targets" not in primitive
+        and "POSITION" in primitive["attributes"]
+        and not any(
+            name.startswith(("JOINTS_", "WEIGHTS_")) for name in primitive["attributes"]
+        )
+        for primitive in document["meshes"][mesh_index]["primitives"]
+    )
+
+
+def _cluster(positions: List[tuple], indices: List[int], ratio: float):
+    """Simplify a triangle list by vertex clustering on a grid, down to about ratio of its triangles
+
+    Returns
+    -------
+        The kept vertices (indices in positions) and the triangles, as indices in the kept vertices
+    """
+    target = max(1, int(len(indices) // 3 * ratio))
+    low = [min(c) for c in zip(*positions)]
+    high = [max(c) for c in zip(*positions)]
+    size = max(h - l for h, l in zip(high, low)) or 1.0
+
+    def simplify(resolution: int):
+        cell_size = size / resolution
+        representatives = {}
+        remap = []
+        for i, position in enumerate(positions):
+            cell = tuple(int((c - l) / cell_size) for c, l in zip(position, low))
+            remap.append(representatives.setdefault(cell, i))
+        triangles = []
+        for t in range(0, len(indices), 3):
+            a, b, c = (remap[i] for i in indices[t : t + 3])
+            if a != b and b != c and a != c:
+                triangles.append((a, b, c))
+        return triangles
+
+    # the largest grid keeping at most the target number of triangles
+    lower, upper = 1, 1024
+    best = simplify(lower)
+    while lower < upper:
+        resolution = (lower + upper + 1) // 2
+        triangles = simplify(resolution)
+        if len(triangles) <= target:
+            lower, best = resolution, triangles
+        else:
+            upper = resolution - 1
+
+    kept = sorted({i for triangle in best for i in triangle})
+    new_index = {old: new for new, old in enumerate(kept)}
+    return kept, [new_index[i] for triangle in best for i in triangle]
+
+
+def _read_primitive(glb: GLB, primitive: dict, simplify: float = None):
+    """Return the vertex attributes (by name, their values), the morph targets (the same for each
+    target) and the indices of a primitive, without the texture coordinates its material does not use
+    and simplified if requested"""
+    attributes = {
+        name: glb.read_accessor(index)
+        for name, index in primitive["attributes"].items()
+    }
+    targets = [
+        {name: glb.read_accessor(index) for name, index in target.items()}
+        for target in primitive.get("targets", [])
+    ]
+    indices = (
+        [value[0] for value in glb.read_accessor(primitive["indices"])]
+        if "indices" in primitive
+        else None
+    )
+
+    # materials of extensions (e.g. variants) may use other sets
+    if "extensions" not in primitive:
+        material = (
+            glb.document["materials"][primitive["material"]]
+            if "material" in primitive
+            else {}
+        )
+        used = _texcoords_used(material)
+        for name in list(attributes):
+            if name.startswith("TEXCOORD_") and int(name[9:]) not in used:
+                del attributes[name]
+                for target in targets:
+                    target.pop(name, None)
+
+    if (
+        simplify
+        and primitive.get("mode", _TRIANGLES) == _TRIANGLES
+        and attributes.get("POSITION")
+    ):
+        if indices is None:
+            indices = list(range(len(attributes["POSITION"])))
+        kept, indices = _cluster(attributes["POSITION"], indices, simplify)
+        # the targets hold a displacement per vertex, they are remapped the same way
+        attributes, *targets = (
+            {name: [values[i] for i in kept] for name, values in vertices.items()}
+            for vertices in [attributes] + targets
+        )
+    return attributes, targets, indices
+
+
+def _add_dequantization_nodes(document: dict, quantized_meshes: dict):
+    """Move the quantized meshes to child nodes holding their dequantization transform, the transform
+    of the original nodes may be animated"""
+    nodes = document.get("nodes", [])
+    for node in list(nodes):
+        if node.get("mesh") in quantized_meshes:
+            center, scale = quantized_meshes[node["mesh"]]
+            nodes.append(
+                {
+                    "mesh": node.pop("mesh"),
+                    "translation": center,
+                    "scale": [scale, scale, scale],
+                }
+            )
+            node.setdefault("children", []).append(len(nodes) - 1)
+    for key in ("extensionsUsed", "extensionsRequired"):
+        extensions = document.setdefault(key, [])
+        if "KHR_mesh_quantization" not in extensions:
+            extensions.append("KHR_mesh_quantization")
+
+
+def optimize_glb(data: bytes, quantize: bool = True, simplify: float = None) -> bytes:
+    """Return a lighter version of a GLB model, see the top of this module
+
+    Parameters
+    ----------
+        data: bytes, required
+            The content of the GLB file
+
+        quantize: bool, optional
+            Whether the vertex attributes are quantized
+
+        simplify: float, optional
+            The ratio of triangles to keep, for a LOD variant
+
+    Examples
+    --------
+        with open("turbine.glb", "rb") as file:
+            optimized = optimize_glb(file.read())
+    """
+    glb = GLB.parse(data)
+    if not _is_supported(glb.document):
+        LOGGER.info("GLB model not optimized: unsupported extension or buffer layout")
+        return data
+
+    document = copy.deepcopy(glb.document)
+    writer = _Writer()
+
+    quantized_meshes = {}
+    for mesh_index, mesh in enumerate(document.get("meshes", [])):
+        quantized = quantize and _quantizable(glb.document, mesh_index)
+        primitives = [
+            (primitive, *_read_primitive(glb, primitive, simplify))
+            for primitive in mesh["primitives"]
+        ]
+
+        positions = (
+            [p for _, attributes, _, _ in primitives for p in attributes["POSITION"]]
+            if quantized
+            else []
+        )
+        if positions:
+            low = [min(c) for c in zip(*positions)]
+            high = [max(c) for c in zip(*positions)]
+            center = [(h + l) / 2 for h, l in zip(high, low)]
+            scale = max((h - l) / 2 for h, l in zip(high, low)) or 1.0
+            quantized_meshes[mesh_index] = (center, scale)
+
+        accessors = glb.document["accessors"]
+        for primitive, attributes, targets, indices in primitives:
+            primitive["attributes"] = {
+                name: _write_attribute(
+                    writer,
+                    name,
+                    accessors[primitive["attributes"][name]],
+                    values,
+                    quantized_meshes.get(mesh_index),
+                )
+                for name, values in attributes.items()
+            }
+            if targets:
+                # the meshes with targets are not quantized, displacements keep their type
+                primitive["targets"] = [
+                    {
+                        name: _write_as_source(
+                            writer,
+                            accessors[old[name]],
+                            values,
+                            bounds=name == "POSITION",
+                        )
+                        for name, values in target.items()
+                    }
+                    for old, target in zip(primitive["targets"], targets)
+                ]
+            if indices is not None:
+                vertex_count = len(next(iter(attributes.values()), []))
+                primitive["indices"] = writer.write(
+                    [(i,) for i in indices],
+                    "SCALAR",
+                    _UNSIGNED_SHORT if vertex_count < 65535 else _UNSIGNED_INT,
+                    target=_ELEMENT_ARRAY_BUFFER,
+                )
+
+    if quantized_meshes:
+        _add_dequantization_nodes(document, quantized_meshes)
+
+    for animation in document.get("animations", []):
+        for sampler in animation["samplers"]:
+            sampler["input"] = writer.copy_accessor(glb, sampler["input"])
+            sampler["output"] = writer.copy_accessor(glb, sampler["output"])
+    for skin in document.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = writer.copy_accessor(
+                glb, skin["inverseBindMatrices"]
+            )
+    for image in document.get("images", []):
+        if "bufferView" in image:
+            image["bufferView"] = writer.add_view(glb.view_bytes(image["bufferView"]))
+
+    document["accessors"] = writer.accessors
+    document["bufferViews"] = writer.views
+    if writer.binary:
+        document["buffers"] = [{"byteLength": len(writer.binary)}]
+    else:
+        document.pop("buffers", None)
+    return GLB(document, bytes(writer.binary)).to_bytes()
+
+
+def _write_as_source(
+    writer: _Writer, source: dict, values: List[tuple], bounds=False
+) -> int:
+    """Write the elements of an accessor with the component type and normalization of its source
+    accessor (e.g. JOINTS_n stay integers, normalized COLOR_n and WEIGHTS_n stay on 8 or 16 bits)"""
+    component_type = source["componentType"]
+    normalized = source.get("normalized", False)
+    if normalized:
+        # read_accessor returned them as floats
+        scale = _NORMALIZATION[component_type]
+        values = [tuple(round(c * scale) for c in value) for value in values]
+    return writer.write(
+        values, source["type"], component_type, normalized=normalized, bounds=bounds
+    )
+
+
+def _write_attribute(
+    writer: _Writer, name: str, source: dict, values: List[tuple], dequantize
+):
+    accessor_type = source["type"]
+    if dequantize is not None:
+        if name == "POSITION":
+            center, scale = dequantize
+            return writer.write(
+                [
+                    tuple(round((c - o) / scale * 32767) for c, o in zip(value, center))
+                    for value in values
+                ],
+                accessor_type,
+                _SHORT,
+                normalized=True,
+                bounds=True,
+            )
+        if name in ("NORMAL", "TANGENT"):
+            return writer.write(
+                [
+                    tuple(max(-127, min(127, round(c * 127))) for c in value)
+                    for value in values
+                ],
+                accessor_type,
+                _BYTE,
+                normalized=True,
+            )
+        if name.startswith("TEXCOORD_") and all(
+            0.0 <= c <= 1.0 for value in values for c in value
+        ):
+            return writer.write(
+                [tuple(round(c * 65535) for c in value) for value in values],
+                accessor_type,
+                _UNSIGNED_SHORT,
+                normalized=True,
+            )
+    return _write_as_source(writer, source, values, bounds=name == "POSITION")
+
+
+def _cached_optimize(
+    source: str, cache_dir: str, quantize: bool, simplify: float = None
+) -> bytes:
+    options = json.dumps([OPTIMIZER_VERSION, quantize, simplify])
+    digest = file_digest(source)
+    cache_file = None
+    if cache_dir:
+        key = hashlib.sha256(f"{digest}:{options}".encode("utf-8")).hexdigest()
+        cache_file = path.join(cache_dir, f"{key}.glb")
+        if path.exists(cache_file):
+            with open(cache_file, "rb") as file:
+                return file.read()
+
+    with open(source, "rb") as file:
+        optimized = optimize_glb(file.read(), quantize, simplify)
+    if cache_file:
+        makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "wb") as file:
+            file.write(optimized)
+    return optimized
+
+
+def optimize_resources(
+    source_dir: str,
+    destination_dir: str,
+    cache_dir: str = None,
+    quantize: bool = True,
+    lod_ratios=(),
+) -> Dict[str, str]:
+    """Copy a directory of resources with its GLB models optimized, the other files as is
+
+    The optimized models are cached by content of the source file and options: a model is only
+    optimized again when it changes. Files of the destination that are not produced are removed.
+
+    Parameters
+    ----------
+        lod_ratios: list of float, optional
+            The ratio of triangles of each LOD variant of the models, written next to the optimized
+            model: models/turbine.glb has models/turbine.lod1.glb, models/turbine.lod2.glb...
+
+    Returns
+    -------
+        The produced files by path relative to the destination, the path of their source
+
+    Examples
+    --------
+        optimize_resources("twinmaker_resources", ".build/twinmaker_resources", ".build/glb_cache")
+    """
+    produced = {}
+    for root, _, files in walk(source_dir):
+        for name in sorted(files):
+            source = path.join(root, name)
+            relative = path.relpath(source, source_dir)
+            if not name.lower().endswith(".glb"):
+                _write_if_changed(destination_dir, relative, source=source)
+                produced[relative] = source
+                continue
+
+            _write_if_changed(
+                destination_dir,
+                relative,
+                content=_cached_optimize(source, cache_dir, quantize),
+            )
+            produced[relative] = source
+            stem = path.splitext(relative)[0]
+            for level, ratio in enumerate(lod_ratios, start=1):
+                variant = f"{stem}.lod{level}.glb"
+                _write_if_changed(
+                    destination_dir,
+                    variant,
+                    content=_cached_optimize(source, cache_dir, quantize, ratio),
+                )
+                produced[variant] = source
+
+    # files of a previous run, e.g. a model since removed
+    for root, _, files in walk(destination_dir):
+        for name in files:
+            relative = path.relpath(path.join(root, name), destination_dir)
+            if relative not in produced:
+                remove(path.join(root, name))
+    return {
+        relative.replace(path.sep, "/"): source for relative, source in produced.items()
+    }
+
+
+def _write_if_changed(destination_dir: str, relative: str, content=None, source=None):
+    """Write a file of the destination unless it has the same content, the CDK asset hash stays stable"""
+    target = path.join(destination_dir, relative)
+    if content is None:
+        with open(source, "rb") as file:
+            content = file.read()
+    if path.exists(target):
+        with open(target, "rb") as file:
+            if file.read() == content:
+                return
+    makedirs(path.dirname(target) or ".", exist_ok=True)
+    with open(target, "wb") as file:
+        file.write(content)
@@ -0,0 +1,141 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+from bisect import bisect_left
+from typing import Dict, List
+
+
+class ModelIndex:
+    """Secondary indexes over the objects of a loaded domain model.
+
+    Objects are stored in pre-order: the subtree of an object is the contiguous range from its
+    position to the end of its descendants. The indexes hold sorted positions, so that a lookup
+    restricted to a subtree is two binary searches.
+
+    The indexes on URN and type are built with the index, the indexes on fields (like device_code)
+    are built on their first query.
+
+    Examples
+    --------
+        index = farm.model_index
+        turbine = index.get("urn:ngsi-ld:Turbine:turbine3")
+        group_turbines = index.query(type="Turbine", within=turbine.parent)
+        index.query(device_code="0x03")
+    """
+
+    def __init__(self, root) -> None:
+        self.objects = []
+        self._positions: Dict[int, int] = {}
+        self._ends: List[int] = []
+        self.by_urn = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self._fields: Dict[str, Dict] = {}
+
+        pending = [root]
+        while pending:
+            obj = pending.pop()
+            position = len(self.objects)
+            self.objects.append(obj)
+            self._positions[id(obj)] = position
+            self._ends.append(None)
+            urn = obj.urn.fqn
+            if urn in self.by_urn:
+                raise Exception(f"Duplicate URN in the model: {urn}")
+            self.by_urn[urn] = obj
+            self.by_type.setdefault(type(obj).__name__, []).append(position)
+            pending.extend(reversed(obj.items))
+
+        # end of each subtree: the position following its last descendant
+        for position in range(len(self.objects) - 1, -1, -1):
+            items = self.objects[position].items
+            self._ends[position] = (
+                self._ends[self._positions[id(items[-1])]] if items else position + 1
+            )
+
+    def __len__(self):
+        return len(self.objects)
+
+    def get(self, urn: str):
+        """Return the object with the given URN, None if there is none"""
+        return self.by_urn.get(urn)
+
+    def position(self, obj) -> int:
+        """Return the pre-order position of an object of the model"""
+        try:
+            return self._positions[id(obj)]
+        except KeyError:
+            raise Exception(f"{obj.name} is not indexed") from None
+
+    def subtree(self, obj) -> List:
+        """Return an object and all its descendants, in pre-order"""
+        position = self.position(obj)
+        return self.objects[position : self._ends[position]]
+
+    def _field_index(self, field: str) -> Dict:
+        values = self._fields.get(field)
+        if values is None:
+            values = {}
+            for position, obj in enumerate(self.objects):
+                value = getattr(obj, field, None)
+                try:
+                    values.setdefault(value, []).append(position)
+                except TypeError:
+                    # unhashable values (like dicts) are only matched by comparison
+                    pass
+            self._fields[field] = values
+        return values
+
+    def query(self, type=None, within=None, **fields) -> List:
+        """Return the objects matching all the criteria, in pre-order
+
+        Parameters
+        ----------
+            type: class or string, optional
+                The type of the objects
+
+            within: TwinMakerObject, optional
+                Restrict the query to the subtree of this object (included)
+
+            fields: optional
+                Values of fields (or attributes like name) of the objects
+
+        Examples
+        --------
+            index.query(type=Turbine, device_code="0x01")
+        """
+        candidates = []
+        by_type = None
+        if type is not None:
+            type_name = type if isinstance(type, str) else type.__name__
+            by_type = self.by_type.get(type_name, [])
+            candidates.append(by_type)
+        for field, value in fields.items():
+            try:
+                candidates.append(self._field_index(field).get(value, []))
+            except TypeError:
+                # unhashable value, the objects are compared one by one
+                pass
+
+        # the smallest list of candidates is checked against all the criteria
+        positions = min(candidates, key=len) if candidates else range(len(self.objects))
+        # objects from the type index do not need their type checked
+        check_type = type is not None and positions is not by_type
+        if within is not None:
+            start = self.position(within)
+            end = self._ends[start]
+            positions = positions[
+                bisect_left(positions, start) : bisect_left(positions, end)
+            ]
+
+        objects = self.objects
+        if not check_type and not fields:
+            return [objects[position] for position in positions]
+        results = []
+        for position in positions:
+            obj = objects[position]
+            if check_type and obj.__class__.__name__ != type_name:
+                continue
+            if any(getattr(obj, f, None) != v for f, v in fields.items()):
+                continue
+            results.append(obj)
+        return results
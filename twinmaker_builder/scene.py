@@ -57,7 +57,7 @@ class SceneNode:
                 self.components.append(
                     {
                         "type": "ModelRef",
-                        "uri": f"s3://{parent.s3_bucket_name}/{uri}",
+                        "uri": parent.asset_uri(uri),
                         "modelType": "GLB",
                     }
                 )
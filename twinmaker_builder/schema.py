@@ -0,0 +1,127 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import copy
+from typing import List
+
+_MISSING = object()
+
+
+class ModelValidationError(Exception):
+    """Raised when the description of a model does not match the field schemas of its classes.
+
+    All the errors of the model are reported at once, each prefixed with the path of the item.
+    """
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} error(s) in the model description:\n  "
+            + "\n  ".join(errors)
+        )
+
+
+class Field:
+    """Declaration of a field of a domain class, read from the item description
+
+    Parameters
+    ----------
+        type: type or tuple of types, optional
+            The accepted types of the value, ints are accepted for floats
+
+        default: optional
+            The value of a missing field, list and dict defaults are copied for each object
+
+        required: bool, optional
+            Whether the description must provide the field
+
+        choices: tuple, optional
+            The accepted values
+
+    Examples
+    --------
+        class TurbineGroup(TwinMakerObject):
+            shape = Field(str, choices=("rectangle", "circle"))
+            width = Field(int, default=1)
+    """
+
+    __slots__ = ("type", "default", "required", "choices", "name")
+
+    def __init__(self, type=None, default=None, required=False, choices=None):
+        if type is float:
+            type = (float, int)
+        self.type = type
+        self.default = default
+        self.required = required
+        self.choices = choices
+        self.name = None
+
+    def read(self, description: dict, errors: List[str]):
+        """Return the value of the field in description, append the problems found to errors"""
+        value = description.get(self.name, _MISSING)
+        if value is _MISSING or value is None:
+            if self.required:
+                errors.append(f"missing required field '{self.name}'")
+            default = self.default
+            return copy.copy(default) if isinstance(default, (list, dict)) else default
+
+        if self.type is not None and (
+            not isinstance(value, self.type)
+            # YAML booleans are not numbers
+            or (isinstance(value, bool) and not _accepts_bool(self.type))
+        ):
+            errors.append(
+                f"field '{self.name}' expects {_type_name(self.type)}, got {type(value).__name__} {value!r}"
+            )
+        elif self.choices is not None and value not in self.choices:
+            errors.append(
+                f"field '{self.name}' must be one of {list(self.choices)}, got {value!r}"
+            )
+        return value
+
+
+def _accepts_bool(expected) -> bool:
+    types = expected if isinstance(expected, tuple) else (expected,)
+    return bool in types or object in types
+
+
+def _type_name(expected) -> str:
+    types = expected if isinstance(expected, tuple) else (expected,)
+    return " or ".join(t.__name__ for t in types)
+
+
+class SchemaMeta(type):
+    """Metaclass of the domain classes: the Field attributes of a class make up its schema.
+
+    A class declaring fields gets __slots__ for them (instead of a __dict__ per object), the
+    schema of a class includes the fields of its bases.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = {}
+        for attribute, value in list(namespace.items()):
+            if isinstance(value, Field):
+                value.name = attribute
+                fields[attribute] = value
+                del namespace[attribute]
+        if fields and "__slots__" not in namespace:
+            namespace["__slots__"] = tuple(fields)
+
+        cls = super().__new__(mcs, name, bases, namespace)
+        schema = {}
+        for base in reversed(cls.__mro__[1:]):
+            schema.update(base.__dict__.get("_schema", {}))
+        schema.update(fields)
+        cls._schema = schema
+        return cls
+
+
+def slot_names(klass) -> tuple:
+    """Return the names of the slots of a class and of its bases"""
+    names = []
+    for base in reversed(klass.__mro__):
+        slots = base.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(s for s in slots if s not in ("__dict__", "__weakref__"))
+    return tuple(names)
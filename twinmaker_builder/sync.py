@@ -0,0 +1,498 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path, replace
+from typing import Dict, List
+
+LOGGER = logging.getLogger()
+
+# ---------------------------------------------------------------------------
+#   Synchronization of a domain model with a TwinMaker workspace through the TwinMaker API
+#
+#   An alternative to the CfnEntity resources of TwinMakerCDKVisitor for models with thousands of entities:
+#   every object of the model is an entity (entity ID = URN) with the components bound to its type.
+#
+#   The engine compares the model with the entities it applied during its previous runs, as recorded in a
+#   state file, then:
+#       - creates and updates entities level by level, parents before children
+#       - deletes the entities that are no longer in the model, children before parents
+#   Operations of a level run concurrently on a bounded pool of workers, they share a token bucket limiting
+#   the request rate and are retried with exponential backoff on throttling and transient errors.
+#   The state file is saved after every level and every checkpoint_every operations within a level: an
+#   interrupted run resumes where it stopped. Operations applied after the last save are applied again,
+#   entities found already created (or already deleted) are then updated (or skipped).
+#
+#   The client is a boto3 "iottwinmaker" client, or any object with the same methods.
+# ---------------------------------------------------------------------------
+
+# Error codes of the TwinMaker API worth retrying
+RETRYABLE_ERRORS = (
+    "ThrottlingException",
+    "InternalServerException",
+    "ServiceUnavailableException",
+)
+
+# TwinMaker parent of the entities at the root of a workspace
+_ROOT_PARENT = "$ROOT"
+
+
+class TokenBucket:
+    """Thread-safe token bucket, acquire() blocks until a token is available"""
+
+    def __init__(
+        self, rate: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep
+    ):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def _camel_case(name: str) -> str:
+    first, *others = name.split("_")
+    return first + "".join(part[:1].upper() + part[1:] for part in others)
+
+
+def to_api_data_value(value: dict) -> dict:
+    """Convert the snake_case fields of a data value of the model to the syntax of the TwinMaker API
+
+    Examples
+    --------
+        assert to_api_data_value({"double_value": 50}) == {"doubleValue": 50}
+    """
+    data_value = {}
+    for field, field_value in value.items():
+        if field == "list_value":
+            field_value = [to_api_data_value(item) for item in field_value]
+        elif field == "map_value":
+            field_value = {
+                key: to_api_data_value(item) for key, item in field_value.items()
+            }
+        elif field == "relationship_value":
+            field_value = {_camel_case(k): v for k, v in field_value.items()}
+        data_value[_camel_case(field)] = field_value
+    return data_value
+
+
+def _error_code(error: Exception):
+    # botocore ClientError
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+
+class SyncReport:
+    """Counts of the operations applied by a sync"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.retries = 0
+
+    def __repr__(self):
+        return (
+            f"SyncReport(created={self.created}, updated={self.updated}, deleted={self.deleted}, "
+            f"unchanged={self.unchanged}, retries={self.retries})"
+        )
+
+
+class TwinMakerSync:
+    """Apply a domain model to a TwinMaker workspace through the TwinMaker API.
+
+    Parameters
+    ----------
+        client: required
+            A boto3 iottwinmaker client
+
+        workspace_id: string, required
+            The workspace holding the entities
+
+        state_file: string, optional
+            Path of the JSON file recording the applied entities. Without a state file, the
+            existing entities of the workspace are listed at the start of every sync.
+
+        max_workers: int, optional
+            Number of concurrent API calls
+
+        rate: float, optional
+            Maximum number of API calls per second
+
+        max_attempts: int, optional
+            Attempts per operation before the sync fails
+
+        checkpoint_every: int, optional
+            Number of operations of a level between two saves of the state file
+
+    Examples
+    --------
+        farm = TwinMakerRoot.load_from_yaml("wind_farm/farm.yaml", WindFarm)
+        sync = TwinMakerSync(
+            boto3.client("iottwinmaker"), "windfarm-sample", state_file="windfarm.sync.json"
+        )
+        report = sync.sync(farm)
+    """
+
+    def __init__(
+        self,
+        client,
+        workspace_id: str,
+        state_file: str = None,
+        max_workers: int = 8,
+        rate: float = 10,
+        max_attempts: int = 6,
+        backoff_base: float = 0.2,
+        backoff_max: float = 20,
+        checkpoint_every: int = 500,
+        sleep=time.sleep,
+        clock=time.monotonic,
+    ):
+        self.client = client
+        self.workspace_id = workspace_id
+        self.state_file = state_file
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint_every = checkpoint_every
+        self._sleep = sleep
+        self._bucket = TokenBucket(rate, burst=max_workers, clock=clock, sleep=sleep)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    # --- desired entities
+
+    def desired_entities(self, root) -> Dict[str, dict]:
+        """Return the entities of a model by entity ID, parents before children
+
+        Each entity holds its level in the hierarchy, its parent, the components (as in the
+        TwinMaker API) and a digest of all of them.
+        """
+        entities = {}
+        pending = [(root, 0)]
+        while pending:
+            obj, level = pending.pop()
+            components = {
+                name: {
+                    "componentTypeId": binding.component_type_id,
+                    "properties": {
+                        property_name: to_api_data_value(value)
+                        for property_name, value in binding.properties.items()
+                    },
+                }
+                for name, binding in obj.component_bindings().items()
+            }
+            entity = {
+                "name": obj.name,
+                "parent": obj.parent.urn.fqn if obj.parent else None,
+                "level": level,
+                "components": components,
+            }
+            payload = json.dumps(entity, sort_keys=True).encode("utf-8")
+            entity["digest"] = hashlib.blake2b(payload, digest_size=16).hexdigest()
+            entities[obj.urn.fqn] = entity
+            pending.extend((item, level + 1) for item in reversed(obj.items))
+        return entities
+
+    # --- state
+
+    def _load_state(self) -> Dict[str, dict]:
+        if self.state_file and path.exists(self.state_file):
+            with open(self.state_file) as file:
+                state = json.load(file)
+            if state["workspace_id"] != self.workspace_id:
+                raise Exception(
+                    f"State file {self.state_file} belongs to workspace {state['workspace_id']}"
+                )
+            return state["entities"]
+        return self._list_entities()
+
+    def _list_entities(self) -> Dict[str, dict]:
+        """The entities of the workspace, their content is unknown"""
+        entities = {}
+        next_token = None
+        while True:
+            kwargs = {"workspaceId": self.workspace_id}
+            if next_token:
+                kwargs["nextToken"] = next_token
+            response = self._call(self.client.list_entities, **kwargs)
+            for summary in response.get("entitySummaries", []):
+                parent = summary.get("parentEntityId")
+                entities[summary["entityId"]] = {
+                    "digest": None,
+                    "parent": None if parent == _ROOT_PARENT else parent,
+                    "level": None,
+                    "components": None,
+                }
+            next_token = response.get("nextToken")
+            if not next_token:
+                break
+
+        # levels from the parent links, so that children are deleted before their parents
+        def level(entity_id, seen=()):
+            entity = entities[entity_id]
+            if entity["level"] is None:
+                parent = entity["parent"]
+                if parent in entities and parent not in seen:
+                    entity["level"] = level(parent, seen + (entity_id,)) + 1
+                else:
+                    entity["level"] = 0
+            return entity["level"]
+
+        for entity_id in entities:
+            level(entity_id)
+        return entities
+
+    def _save_state(self, applied: Dict[str, dict]):
+        if not self.state_file:
+            return
+        # saves of the workers of a level do not interleave
+        with self._state_lock:
+            with self._lock:
+                content = json.dumps(
+                    {"workspace_id": self.workspace_id, "entities": applied}
+                )
+            with open(self.state_file + ".tmp", "w") as file:
+                file.write(content)
+            replace(self.state_file + ".tmp", self.state_file)
+
+    # --- API calls
+
+    def _call(self, method, **kwargs):
+        """Call the API with rate limiting, retrying throttling and transient errors"""
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            try:
+                return method(**kwargs)
+            except Exception as e:
+                attempt += 1
+                if (
+                    _error_code(e) not in RETRYABLE_ERRORS
+                    or attempt >= self.max_attempts
+                ):
+                    raise
+                with self._lock:
+                    self._report.retries += 1
+                # exponential backoff with full jitter
+                delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+                self._sleep(self._random.uniform(0, delay))
+
+    def _create(self, entity_id: str, entity: dict) -> bool:
+        """Create an entity, or update it when it already exists (applied by an interrupted run)
+
+        Returns
+        -------
+            Whether the entity was created
+        """
+        kwargs = {
+            "workspaceId": self.workspace_id,
+            "entityId": entity_id,
+            "entityName": entity["name"],
+            "components": {
+                name: {
+                    "componentTypeId": component["componentTypeId"],
+                    "properties": {
+                        property_name: {"value": value}
+                        for property_name, value in component["properties"].items()
+                    },
+                }
+                for name, component in entity["components"].items()
+            },
+        }
+        if entity["parent"]:
+            kwargs["parentEntityId"] = entity["parent"]
+        try:
+            self._call(self.client.create_entity, **kwargs)
+        except Exception as e:
+            if _error_code(e) != "ConflictException":
+                raise
+            LOGGER.info(f"Entity {entity_id} already exists, updating it")
+            self._update(entity_id, entity, {"components": None, "parent": None})
+            return False
+        return True
+
+    def _update(self, entity_id: str, entity: dict, previous: dict):
+        previous_components = previous["components"]
+        previous_parent = previous["parent"]
+        if previous_components is None:
+            # unknown content, read the entity
+            response = self._call(
+                self.client.get_entity,
+                workspaceId=self.workspace_id,
+                entityId=entity_id,
+            )
+            previous_components = {
+                name: list(component.get("properties", {}))
+                for name, component in response.get("components", {}).items()
+            }
+            previous_parent = response.get("parentEntityId")
+            if previous_parent == _ROOT_PARENT:
+                previous_parent = None
+
+        updates = {}
+        for name, component in entity["components"].items():
+            property_updates = {
+                property_name: {"value": value, "updateType": "UPDATE"}
+                for property_name, value in component["properties"].items()
+            }
+            if name in previous_components:
+                for property_name in previous_components[name]:
+                    if property_name not in property_updates:
+                        property_updates[property_name] = {"updateType": "RESET_VALUE"}
+            updates[name] = {
+                "updateType": "UPDATE" if name in previous_components else "CREATE",
+                "componentTypeId": component["componentTypeId"],
+                "propertyUpdates": property_updates,
+            }
+        for name in previous_components:
+            if name not in entity["components"]:
+                updates[name] = {"updateType": "DELETE"}
+
+        kwargs = {
+            "workspaceId": self.workspace_id,
+            "entityId": entity_id,
+            "entityName": entity["name"],
+            "componentUpdates": updates,
+        }
+        if entity["parent"] != previous_parent:
+            if entity["parent"]:
+                kwargs["parentEntityUpdate"] = {
+                    "updateType": "UPDATE",
+                    "parentEntityId": entity["parent"],
+                }
+            else:
+                # moved to the root of the workspace
+                kwargs["parentEntityUpdate"] = {"updateType": "DELETE"}
+        self._call(self.client.update_entity, **kwargs)
+
+    def _delete(self, entity_id: str):
+        try:
+            self._call(
+                self.client.delete_entity,
+                workspaceId=self.workspace_id,
+                entityId=entity_id,
+                isRecursive=False,
+            )
+        except Exception as e:
+            # deleted by an interrupted run
+            if _error_code(e) != "ResourceNotFoundException":
+                raise
+
+    # --- sync
+
+    def _run_level(self, operations: List, applied: Dict[str, dict]):
+        """Run the operations of a level concurrently, the state is saved even if some of them failed"""
+        failures = []
+        done = [0]
+
+        def run(operation):
+            kind, entity_id, entity = operation
+            try:
+                if kind == "create":
+                    if not self._create(entity_id, entity):
+                        kind = "update"
+                elif kind == "update":
+                    self._update(entity_id, entity, applied[entity_id])
+                else:
+                    self._delete(entity_id)
+            except Exception as e:
+                LOGGER.error(f"Unable to {kind} entity {entity_id}: {e}")
+                with self._lock:
+                    failures.append((kind, entity_id, e))
+                return
+            with self._lock:
+                if kind == "delete":
+                    del applied[entity_id]
+                    self._report.deleted += 1
+                else:
+                    applied[entity_id] = {
+                        "digest": entity["digest"],
+                        "parent": entity["parent"],
+                        "level": entity["level"],
+                        "components": {
+                            name: list(component["properties"])
+                            for name, component in entity["components"].items()
+                        },
+                    }
+                    if kind == "create":
+                        self._report.created += 1
+                    else:
+                        self._report.updated += 1
+                done[0] += 1
+                checkpoint = done[0] % self.checkpoint_every == 0
+            if checkpoint:
+                self._save_state(applied)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(run, operations))
+        self._save_state(applied)
+
+        if failures:
+            kind, entity_id, error = failures[0]
+            raise Exception(
+                f"{len(failures)} operations failed, first one: {kind} {entity_id}: {error}"
+            ) from error
+
+    def sync(self, root) -> SyncReport:
+        """Apply a model to the workspace
+
+        Returns
+        -------
+            A SyncReport with the number of entities created, updated, deleted and unchanged
+        """
+        self._report = SyncReport()
+        desired = self.desired_entities(root)
+        applied = self._load_state()
+
+        levels = {}
+        for entity_id, entity in desired.items():
+            previous = applied.get(entity_id)
+            if previous is None:
+                operation = ("create", entity_id, entity)
+            elif previous["digest"] != entity["digest"]:
+                operation = ("update", entity_id, entity)
+            else:
+                self._report.unchanged += 1
+                continue
+            levels.setdefault(entity["level"], []).append(operation)
+
+        # children of the deleted entities are either deleted before them or moved by the updates
+        deletions = {}
+        for entity_id, previous in applied.items():
+            if entity_id not in desired:
+                deletions.setdefault(previous["level"], []).append(
+                    ("delete", entity_id, None)
+                )
+
+        for level in sorted(levels):
+            self._run_level(levels[level], applied)
+        for level in sorted(deletions, reverse=True):
+            self._run_level(deletions[level], applied)
+
+        LOGGER.info(f"TwinMaker sync of workspace {self.workspace_id}: {self._report}")
+        return self._report
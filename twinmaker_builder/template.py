@@ -0,0 +1,266 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import ast
+import re
+from functools import lru_cache
+from typing import Iterator, Tuple
+
+from .schema import ModelValidationError
+
+# Keys of an item description that are expanded later, with the scope of the item
+_DEFERRED = frozenset(("items", "repeat"))
+
+_PLACEHOLDER = re.compile(r"\$\{([^}]*)\}")
+
+# No power operator: ${9**9**9} would never finish
+_OPERATORS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.USub,
+    ast.UAdd,
+)
+
+# Functions available in the expressions
+_FUNCTIONS = {
+    "abs": abs,
+    "float": float,
+    "int": int,
+    "max": max,
+    "min": min,
+    "round": round,
+    "str": str,
+}
+
+# Longest string or list a repetition may build: ${'x' * 9999999999} would exhaust the memory of the synth
+MAX_REPEAT_LENGTH = 100_000
+
+
+def _multiply(left, right):
+    for sequence, count in ((left, right), (right, left)):
+        if (
+            isinstance(sequence, (str, list, tuple))
+            and isinstance(count, int)
+            and len(sequence) * count > MAX_REPEAT_LENGTH
+        ):
+            raise ValueError(f"repetition longer than {MAX_REPEAT_LENGTH}")
+    return left * right
+
+
+class _GuardMultiplications(ast.NodeTransformer):
+    """Evaluate the multiplications with _multiply, operands are only known at evaluation time"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult):
+            return node
+        call = ast.Call(
+            func=ast.Name(id="_multiply", ctx=ast.Load()),
+            args=[node.left, node.right],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+
+# Builtins of the evaluation, _multiply is only reached through the rewritten multiplications: the names
+# of the expressions are validated before
+_BUILTINS = dict(_FUNCTIONS, _multiply=_multiply)
+
+
+def _compile_expression(expression: str):
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise ModelValidationError([f"invalid expression '{expression}'"]) from None
+
+    # arithmetic on numbers, strings and variables only
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+                raise ModelValidationError(
+                    [f"unsupported function in expression '{expression}'"]
+                )
+        elif not isinstance(
+            node,
+            (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Name, ast.Load) + _OPERATORS,
+        ) and not (
+            isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str))
+        ):
+            raise ModelValidationError(
+                [f"unsupported syntax in expression '{expression}'"]
+            )
+    tree = ast.fix_missing_locations(_GuardMultiplications().visit(tree))
+    return compile(tree, "<template>", "eval")
+
+
+def _evaluate(code, expression: str, scope: dict):
+    try:
+        return eval(code, {"__builtins__": _BUILTINS}, scope)
+    except NameError as e:
+        raise ModelValidationError(
+            [f"unknown variable in expression '{expression}': {e}"]
+        ) from None
+    except Exception as e:
+        raise ModelValidationError(
+            [f"unable to evaluate expression '{expression}': {e}"]
+        ) from None
+
+
+class _Template:
+    """A string with ${expression} or ${expression:format_spec} placeholders"""
+
+    __slots__ = ("parts", "single")
+
+    def __init__(self, parts, single):
+        # (literal, expression, code, format_spec) tuples
+        self.parts = parts
+        # a string made of a single placeholder keeps the type of its value
+        self.single = single
+
+    def render(self, scope: dict):
+        if self.single:
+            _, expression, code, _ = self.parts[0]
+            return _evaluate(code, expression, scope)
+        rendered = []
+        for literal, expression, code, format_spec in self.parts:
+            rendered.append(literal)
+            if code is not None:
+                rendered.append(format(_evaluate(code, expression, scope), format_spec))
+        return "".join(rendered)
+
+
+@lru_cache(maxsize=4096)
+def _compile_template(value: str):
+    """Return the _Template of a string, None if it has no placeholder"""
+    if "${" not in value:
+        return None
+    parts = []
+    end = 0
+    for match in _PLACEHOLDER.finditer(value):
+        expression, _, format_spec = match.group(1).partition(":")
+        parts.append(
+            (
+                value[end : match.start()],
+                expression,
+                _compile_expression(expression),
+                format_spec,
+            )
+        )
+        end = match.end()
+    if end < len(value):
+        parts.append((value[end:], None, None, ""))
+    single = (
+        len(parts) == 1
+        and parts[0][2] is not None
+        and not parts[0][0]
+        and not parts[0][3]
+    )
+    return _Template(parts, single)
+
+
+def substitute(value, scope: dict):
+    """Return value with the ${expression} placeholders of its strings evaluated in scope
+
+    The items and repeat sections of the descriptions are left as is: they are expanded with the scope
+    of their own item. Values without placeholders are returned as is (not copied).
+
+    Examples
+    --------
+        assert substitute({"name": "turbine_${i}", "x": "${i * 300}"}, {"i": 2}) == {
+            "name": "turbine_2",
+            "x": 600,
+        }
+    """
+    if isinstance(value, str):
+        template = _compile_template(value)
+        return value if template is None else template.render(scope)
+    if isinstance(value, dict):
+        result = {}
+        changed = False
+        for key, item in value.items():
+            new = item if key in _DEFERRED else substitute(item, scope)
+            changed = changed or new is not item
+            result[key] = new
+        return result if changed else value
+    if isinstance(value, list):
+        result = [substitute(item, scope) for item in value]
+        return (
+            result if any(new is not old for new, old in zip(result, value)) else value
+        )
+    return value
+
+
+def _repeat_values(repeat, scope: dict) -> Tuple[str, Iterator]:
+    """Return the name of the index variable of a repeat section and its values"""
+    if not isinstance(repeat, dict):
+        repeat = {"count": repeat}
+    repeat = substitute(repeat, scope)
+    index = repeat.get("index", "index")
+
+    if "values" in repeat:
+        values = repeat["values"]
+        if not isinstance(values, list):
+            raise ModelValidationError(["'repeat.values' must be a list"])
+        return index, iter(values)
+
+    bounds = {}
+    for key in ("count", "start", "stop", "step"):
+        bound = repeat.get(key)
+        if bound is not None and (
+            not isinstance(bound, int) or isinstance(bound, bool)
+        ):
+            raise ModelValidationError(
+                [f"'repeat.{key}' expects int, got {type(bound).__name__} {bound!r}"]
+            )
+        bounds[key] = bound
+    start = bounds["start"] or 0
+    step = bounds["step"] or 1
+    if bounds["count"] is not None:
+        stop = start + bounds["count"] * step
+    elif bounds["stop"] is not None:
+        stop = bounds["stop"]
+    else:
+        raise ModelValidationError(["'repeat' needs a count, a stop or values"])
+    return index, iter(range(start, stop, step))
+
+
+def expand(description: dict, scope: dict) -> Iterator[Tuple[dict, dict]]:
+    """Expand an item description in the items section of a model
+
+    A description with a `repeat` section is a template: it is expanded once per value of its index
+    variable. The index is `index` unless named otherwise, its values are given as a count (from 0),
+    a start, stop and step range or a list of values.
+
+    Strings of the descriptions can hold ${expression} placeholders: arithmetic on the parameters of
+    the model and on the indexes of the enclosing repeat sections. A format spec can be added, like in
+    ${index:03d}. A string made of a single placeholder keeps the type of its value (e.g. a number).
+
+    Returns
+    -------
+        An iterator on the (description, scope) of the items, the scope holds the variables available
+        to the sub-items
+
+    Examples
+    --------
+        - type: Turbine
+          repeat: {index: t, start: 1, count: 200}
+          name: turbine_${t}
+          device_code: "0x${t:04x}"
+          model:
+            position: {x: "${t * spacing}", y: 0, z: 0}
+    """
+    repeat = description.get("repeat")
+    if repeat is None:
+        yield substitute(description, scope), scope
+        return
+
+    index, values = _repeat_values(repeat, scope)
+    template = {key: value for key, value in description.items() if key != "repeat"}
+    for value in values:
+        item_scope = dict(scope)
+        item_scope[index] = value
+        yield substitute(template, item_scope), item_scope
@@ -17,14 +17,103 @@ from constructs import Construct
 from os import path
 
 
+# Prefix of the names of the Lambda function and its role
+DEFAULT_PREFIX = "windfarm-sample"
+
+
+def create_random_function(scope: Construct, prefix: str = None) -> PythonFunction:
+    """Create the Lambda function (and its role) implementing the random component type in scope"""
+    prefix = prefix or DEFAULT_PREFIX
+    region = Stack.of(scope).region
+    account = Stack.of(scope).account
+
+    # Role needed to access TimeStream DB
+    lambda_name = RandomTwinMakerComponent.lambda_name(prefix)
+    lambda_role = iam.Role(
+        scope,
+        "RandomComponentLambdaRole",
+        role_name=f"{prefix}-random-component-lambda-role",
+        assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+        inline_policies={
+            "timeStreamReadOnly": iam.PolicyDocument(
+                statements=[
+                    iam.PolicyStatement(
+                        actions=[
+                            "logs:CreateLogGroup",
+                            "logs:CreateLogStream",
+                            "logs:PutLogEvents",
+                        ],
+                        resources=[
+                            f"arn:aws:logs:{region}:{account}:log-group:/aws/lambda/{lambda_name}:*",
+                            f"arn:aws:logs:{region}:{account}:log-group:/aws/lambda/{lambda_name}",
+                        ],
+                        effect=iam.Effect.ALLOW,
+                    ),
+                ]
+            )
+        },
+    )
+
+    NagSuppressions.add_resource_suppressions(
+        lambda_role,
+        suppressions=[
+            NagPackSuppression(
+                id="AwsSolutions-IAM5",
+                reason="Lambda role policy requires wildcard to match all log objects.",
+                applies_to=[
+                    {"regex": "/Resource::(.*)\\/*/g"},
+                ],
+            )
+        ],
+    )
+
+    dir_path = path.dirname(path.realpath(__file__))
+    return PythonFunction(
+        scope,
+        "RandomComponentLambda",
+        function_name=lambda_name,
+        entry=path.join(dir_path, "lambda_code"),
+        layers=[
+            PythonLayerVersion(
+                scope,
+                "udq_utils_layers",
+                entry=path.join(dir_path, "udq_helper_utils"),
+                compatible_runtimes=[lambda_.Runtime.PYTHON_3_9],
+            )
+        ],
+        runtime=lambda_.Runtime.PYTHON_3_9,
+        index="handler.py",
+        handler="lambda_handler",
+        memory_size=256,
+        role=lambda_role,
+        timeout=Duration.minutes(15),
+        log_retention=logs.RetentionDays.ONE_DAY,
+        environment={"LOG_LEVEL": "INFO"},
+    )
+
+
+class RandomComponentFunction(Construct):
+    """Construct that deploys the Lambda function of the random component type alone, to be shared
+    by the component types of several workspaces"""
+
+    def __init__(self, scope: Construct, id: str, *, prefix=None):
+        super().__init__(scope, id)
+        self.prefix = prefix or DEFAULT_PREFIX
+        self.function = create_random_function(self, self.prefix)
+
+
 class RandomTwinMakerComponent(Construct):
-    """Construct that deploys a component type that generates random values"""
+    """Construct that deploys a component type that generates random values
+
+    The component type is implemented by the Lambda function of `function` (a RandomComponentFunction)
+    when given, by a Lambda function deployed with the construct otherwise.
+    """
 
     TYPE = "com.aws.sample.component.random"
 
-    def lambda_name():
-        # TODO do not hardcode this name
-        return "windfarm-sample-random-read"
+    @staticmethod
+    def lambda_name(prefix: str = None):
+        return f"{prefix or DEFAULT_PREFIX}-random-read"
 
     def __init__(
         self,
@@ -33,75 +122,14 @@ class RandomTwinMakerComponent(Construct):
         workspace_id: str,
         *,
         prefix=None,
+        function: RandomComponentFunction = None,
     ):
         super().__init__(scope, id)
 
-        region = Stack.of(self).region
-        account = Stack.of(self).account
-
-        # Role needed to access TimeStream DB
-        lambda_name = RandomTwinMakerComponent.lambda_name()
-        lambda_role = iam.Role(
-            self,
-            "RandomComponentLambdaRole",
-            role_name="windfarm-sample-random-component-lambda-role",
-            assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
-            inline_policies={
-                "timeStreamReadOnly": iam.PolicyDocument(
-                    statements=[
-                        iam.PolicyStatement(
-                            actions=[
-                                "logs:CreateLogGroup",
-                                "logs:CreateLogStream",
-                                "logs:PutLogEvents",
-                            ],
-                            resources=[
-                                f"arn:aws:logs:{region}:{account}:log-group:/aws/lambda/{lambda_name}:*",
-                                f"arn:aws:logs:{region}:{account}:log-group:/aws/lambda/{lambda_name}",
-                            ],
-                            effect=iam.Effect.ALLOW,
-                        ),
-                    ]
-                )
-            },
-        )
-
-        NagSuppressions.add_resource_suppressions(
-            lambda_role,
-            suppressions=[
-                NagPackSuppression(
-                    id="AwsSolutions-IAM5",
-                    reason="Lambda role policy requires wildcard to match all log objects.",
-                    applies_to=[
-                        {"regex": "/Resource::(.*)\\/*/g"},
-                    ],
-                )
-            ],
-        )
-
-        dir_path = path.dirname(path.realpath(__file__))
-        lambda_data_read = PythonFunction(
-            self,
-            "RandomComponentLambda",
-            function_name=RandomTwinMakerComponent.lambda_name(),
-            entry=path.join(dir_path, "lambda_code"),
-            layers=[
-                PythonLayerVersion(
-                    self,
-                    "udq_utils_layers",
-                    entry=path.join(dir_path, "udq_helper_utils"),
-                    compatible_runtimes=[lambda_.Runtime.PYTHON_3_9],
-                )
-            ],
-            runtime=lambda_.Runtime.PYTHON_3_9,
-            index="handler.py",
-            handler="lambda_handler",
-            memory_size=256,
-            role=lambda_role,
-            timeout=Duration.minutes(15),
-            log_retention=logs.RetentionDays.ONE_DAY,
-            environment={},
-        )
+        if function is None:
+            lambda_data_read = create_random_function(self, prefix)
+        else:
+            lambda_data_read = function.function
 
         twinmaker.CfnComponentType(
             self,
@@ -2,8 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
-from random import seed
-from random import randint
+import os
+from random import Random
 import hashlib
 
 from udq_utils.udq import (
@@ -16,9 +16,10 @@ from udq_utils.udq_models import (
     IoTTwinMakerReference,
     EntityComponentPropertyRef,
 )
+from udq_utils.udq_cache import UdqResultCache
 
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
 # ---------------------------------------------------------------------------
 #   Sample implementation of an AWS IoT TwinMaker UDQ Connector against AWS Timestream
@@ -33,6 +34,9 @@ class RandomReader(SingleEntityReader):
     read from Timestream and convert the results into a IoTTwinMakerUdqResponse object
     """
 
+    # values only depend on the request, scene viewers polling the same window are served from the container cache
+    result_cache = UdqResultCache(max_bytes=8 * 1024 * 1024, ttl_seconds=60)
+
     def __init__(self):
         pass
 
@@ -46,28 +50,24 @@ class RandomReader(SingleEntityReader):
         telemetryAssetId and telemetryAssetType passed in. We are selecting all entries matching the passed in
         telemetryAssetType, telemetryAssetId and additional filters
         """
-        LOGGER.info("RandomReader entity_query")
+        LOGGER.debug("RandomReader entity_query")
 
-        selected_property = request.selected_properties[0]
-
-        min = int(
-            float(request.udq_context["properties"]["min"]["value"]["doubleValue"])
-        )
-        max = int(
-            float(request.udq_context["properties"]["max"]["value"]["doubleValue"])
-        )
+        min = int(request.property_definitions["min"].value)
+        max = int(request.property_definitions["max"].value)
 
         timestamp = request.start_time
 
-        s = f"{timestamp}{request.entity_id}{request.component_name}{selected_property}"
+        rows = []
+        for selected_property in request.selected_properties:
+            s = f"{timestamp}{request.entity_id}{request.component_name}{selected_property}"
 
-        # This trick allows having coherent value for a given measure at a given time.
-        # https://stackoverflow.com/questions/16008670/how-to-hash-a-string-into-8-digits
-        seed_number = int(hashlib.sha256(s.encode("utf-8")).hexdigest(), 16) % 10**4
-        seed(seed_number)
+            # This trick allows having coherent value for a given measure at a given time.
+            # https://stackoverflow.com/questions/16008670/how-to-hash-a-string-into-8-digits
+            seed_number = (
+                int(hashlib.sha256(s.encode("utf-8")).hexdigest(), 16) % 10**4
+            )
 
-        return IoTTwinMakerUdqResponse(
-            [
+            rows.append(
                 RandomDataRow(
                     timestamp,
                     request.entity_id,
@@ -75,10 +75,21 @@ class RandomReader(SingleEntityReader):
                     selected_property,
                     min,
                     max,
+                    seed_number,
+                    self._data_type(request, selected_property),
                 )
-            ]
+            )
+
+        # do not return the values the propertyFilters of the request would drop
+        return IoTTwinMakerUdqResponse(
+            request.compiled_property_filters.filter_rows(rows)
         )
 
+    @staticmethod
+    def _data_type(request, property_name):
+        definition = request.property_definitions.get(property_name)
+        return definition.data_type if definition else None
+
 
 class RandomDataRow(IoTTwinMakerDataRow):
     """
@@ -98,6 +109,8 @@ class RandomDataRow(IoTTwinMakerDataRow):
         selected_property=None,
         min=0,
         max=100,
+        seed_number=None,
+        data_type=None,
     ):
         self._timestamp = timestamp
         self._entity_id = entity_id
@@ -105,6 +118,24 @@ class RandomDataRow(IoTTwinMakerDataRow):
         self._selected_property = selected_property
         self._min = min
         self._max = max
+        # drawn once so that filtering and marshalling the row see the same value, from a generator of its own
+        # so that the rows of a request do not depend on each other
+        self._value = self._typed(
+            Random(seed_number).randint(self._min, self._max), data_type
+        )
+
+    @staticmethod
+    def _typed(value, data_type):
+        """
+        The random value as the python type of the declared IoT TwinMaker type of the property
+        """
+        if data_type in ("INTEGER", "LONG"):
+            return value
+        elif data_type == "BOOLEAN":
+            return value % 2 == 1
+        elif data_type == "STRING":
+            return str(value)
+        return float(value)
 
     # overrides IoTTwinMakerDataRow.get_iottwinmaker_reference abstractmethod
     def get_iottwinmaker_reference(self) -> IoTTwinMakerReference:
@@ -124,16 +155,23 @@ class RandomDataRow(IoTTwinMakerDataRow):
 
     # overrides IoTTwinMakerDataRow.get_value abstractmethod
     def get_value(self):
-        return float(randint(self._min, self._max))
+        return self._value
+
 
+# The reader is stateless: build it once per Lambda container and reuse it across warm invocations
+RANDOM_READER = RandomReader()
 
-# Main Lambda invocation entry point, use the TimestreamReader to process events
+
+# Main Lambda invocation entry point, use the RandomReader to process events
 # noinspection PyUnusedLocal
 def lambda_handler(event, context):
-    LOGGER.info("Event: %s", event)
+    # events and results can be large, only pay for their formatting when debugging
+    LOGGER.debug("Event: %s", event)
 
-    RANDOM_READER = RandomReader()
     result = RANDOM_READER.process_query(event)
-    LOGGER.info("result:")
-    LOGGER.info(result)
+
+    LOGGER.debug("result: %s", result)
+    # the arguments are evaluated even when the record is dropped
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug("result cache: %s", RANDOM_READER.result_cache.stats())
     return result
@@ -0,0 +1,244 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import mmap
+from array import array
+from bisect import bisect_right
+from os import makedirs, path, replace
+from typing import Dict, Sequence, Tuple
+from urllib.parse import quote
+
+from udq_utils.udq import (
+    SingleEntityReader,
+    MultiEntityReader,
+    IoTTwinMakerDataSeries,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_models import (
+    IoTTwinMakerUDQEntityRequest,
+    IoTTwinMakerUDQComponentTypeRequest,
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+    OrderBy,
+)
+
+# ---------------------------------------------------------------------------
+#   Memory-mapped columnar time-series store, used to replay recorded telemetry through the UDQ interface
+#
+#   Layout of a store directory:
+#       manifest.json                                   entities and value types of the properties, by
+#                                                       component type
+#       <entity>/<component>/<property>.time            int64 timestamps (nanoseconds since epoch), sorted
+#       <entity>/<component>/<property>.values          float64 ('d') or int64 ('q') values
+#
+#   Arrays are stored in native byte order. The reader maps the files on first use and answers a time range
+#   with two binary searches over the timestamp array, the response then references memoryview slices of the
+#   mapped files: only the pages covering the range are ever read. Closing the reader unmaps the files once
+#   the last response referencing them is gone.
+# ---------------------------------------------------------------------------
+
+MANIFEST = "manifest.json"
+VALUE_TYPES = ("d", "q")
+
+
+def _series_path(
+    root: str, entity_id: str, component_name: str, property_name: str
+) -> str:
+    return path.join(
+        root,
+        quote(entity_id, safe=""),
+        quote(component_name, safe=""),
+        quote(property_name, safe=""),
+    )
+
+
+class ColumnarStoreWriter:
+    """
+    Writes series into a columnar store directory, the manifest is written by close()
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        manifest_path = path.join(root, MANIFEST)
+        if path.exists(manifest_path):
+            with open(manifest_path) as file:
+                self._manifest = json.load(file)
+        else:
+            self._manifest = {"componentTypes": {}, "valueTypes": {}}
+
+    def write_series(
+        self,
+        component_type_id: str,
+        entity_id: str,
+        component_name: str,
+        property_name: str,
+        timestamps: Sequence[int],
+        values: Sequence,
+        value_type: str = "d",
+    ):
+        """Write (replace) the series of a property, points are sorted by timestamp
+
+        :param value_type: 'd' for float64 values, 'q' for int64 values
+        """
+        if value_type not in VALUE_TYPES:
+            raise Exception(f"Unsupported value type [{value_type}]")
+        if len(timestamps) != len(values):
+            raise Exception(
+                "timestamps and values of a series must have the same length"
+            )
+
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        base = _series_path(self.root, entity_id, component_name, property_name)
+        makedirs(path.dirname(base), exist_ok=True)
+        with open(base + ".time", "wb") as file:
+            array("q", (timestamps[i] for i in order)).tofile(file)
+        with open(base + ".values", "wb") as file:
+            array(value_type, (values[i] for i in order)).tofile(file)
+
+        entities = self._manifest["componentTypes"].setdefault(component_type_id, [])
+        if [entity_id, component_name] not in entities:
+            entities.append([entity_id, component_name])
+        # properties of different component types may share a name, not a type
+        self._manifest["valueTypes"].setdefault(component_type_id, {})[
+            property_name
+        ] = value_type
+
+    def close(self):
+        manifest_path = path.join(self.root, MANIFEST)
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump(self._manifest, file)
+        replace(manifest_path + ".tmp", manifest_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _MappedSeries:
+    """The mapped timestamp and value arrays of one property"""
+
+    __slots__ = ("_maps", "timestamps", "values")
+
+    def __init__(self, base: str, value_type: str):
+        self._maps = []
+        self.timestamps = self._map(base + ".time", "q")
+        self.values = self._map(base + ".values", value_type)
+
+    def _map(self, file_path: str, typecode: str) -> memoryview:
+        if path.getsize(file_path) == 0:
+            return memoryview(array(typecode))
+        # the mapping keeps its own descriptor, the file can be closed right away
+        with open(file_path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        with memoryview(mapped) as raw:
+            return raw.cast(typecode)
+
+    def close(self):
+        for view in (self.timestamps, self.values):
+            view.release()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # slices are still referenced by responses (e.g. in the result cache of the handler),
+                # the mapping is closed when the last of them is released
+                pass
+        self._maps = []
+
+
+class ColumnarStoreReader(SingleEntityReader, MultiEntityReader):
+    """
+    The UDQ Connector implementation for a memory-mapped columnar store
+    It supports both single-entity queries and multi-entity queries and returns zero-copy data series,
+    pagination is left to the UDQ framework
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(path.join(root, MANIFEST)) as file:
+            manifest = json.load(file)
+        self._component_types = manifest["componentTypes"]
+        self._value_types = manifest["valueTypes"]
+        # component type of the components, the value types of the properties depend on it
+        self._component_type_of = {
+            (entity_id, component_name): component_type_id
+            for component_type_id, entities in self._component_types.items()
+            for entity_id, component_name in entities
+        }
+        self._series: Dict[Tuple[str, str, str], _MappedSeries] = {}
+
+    def close(self):
+        for series in self._series.values():
+            series.close()
+        self._series = {}
+
+    def _mapped(self, entity_id, component_name, property_name) -> _MappedSeries:
+        key = (entity_id, component_name, property_name)
+        series = self._series.get(key)
+        if series is None:
+            base = _series_path(self.root, entity_id, component_name, property_name)
+            if not path.exists(base + ".time"):
+                return None
+            component_type_id = self._component_type_of.get((entity_id, component_name))
+            value_type = self._value_types.get(component_type_id, {}).get(
+                property_name, "d"
+            )
+            series = _MappedSeries(base, value_type)
+            self._series[key] = series
+        return series
+
+    def _slice(self, request, entity_id, component_name, property_name):
+        mapped = self._mapped(entity_id, component_name, property_name)
+        if mapped is None:
+            return None
+        # time range found by binary search over the sorted timestamps, the start time is exclusive
+        first = bisect_right(mapped.timestamps, request.start_time_ns)
+        last = bisect_right(mapped.timestamps, request.end_time_ns)
+        timestamps = mapped.timestamps[first:last]
+        values = mapped.values[first:last]
+        if request.order_by == OrderBy.DESCENDING:
+            timestamps = timestamps[::-1]
+            values = values[::-1]
+
+        filters = request.compiled_property_filters
+        if filters.applies_to(property_name):
+            timestamps, values = filters.filter_series(
+                property_name, timestamps, values
+            )
+
+        return IoTTwinMakerDataSeries(
+            IoTTwinMakerReference(
+                ecp=EntityComponentPropertyRef(entity_id, component_name, property_name)
+            ),
+            timestamps,
+            values,
+        )
+
+    def _query(self, request, entities):
+        series = []
+        for entity_id, component_name in entities:
+            for property_name in request.selected_properties:
+                entity_series = self._slice(
+                    request, entity_id, component_name, property_name
+                )
+                if entity_series is not None and len(entity_series):
+                    series.append(entity_series)
+        return IoTTwinMakerUdqResponse([], series=series)
+
+    # overrides SingleEntityReader.entity_query abstractmethod
+    def entity_query(
+        self, request: IoTTwinMakerUDQEntityRequest
+    ) -> IoTTwinMakerUdqResponse:
+        return self._query(request, [(request.entity_id, request.component_name)])
+
+    # overrides MultiEntityReader.component_type_query abstractmethod
+    def component_type_query(
+        self, request: IoTTwinMakerUDQComponentTypeRequest
+    ) -> IoTTwinMakerUdqResponse:
+        return self._query(
+            request, self._component_types.get(request.component_type_id, [])
+        )
@@ -0,0 +1,235 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import math
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List
+
+from udq_utils.sql_detector import SQLDetector
+from udq_utils.udq_time import epoch_ns_to_iso8601, iso8601_to_epoch_ns
+
+# ---------------------------------------------------------------------------
+#   Parameterized query templates
+#
+#   Connectors register statements with typed placeholders, e.g.
+#
+#       registry = QueryTemplateRegistry()
+#       registry.register(
+#           "history",
+#           "SELECT time, value FROM {table:ident} WHERE entity_id = {entity_id:str} "
+#           "AND property_name IN ({properties:str[]}) AND time > {start:timestamp}",
+#       )
+#       query = registry.render("history", table="telemetry", entity_id=..., properties=[...], start=...)
+#
+#   Values are bound and escaped according to their type. For each placeholder signature (lengths of the
+#   list placeholders and signs of the scalar numbers) a query plan is compiled once, the last 256 plans of a
+#   template are kept: the literal segments of the statement and the token context of a sample rendering,
+#   checked with the SQLDetector. A rendered statement is only parsed again when one of its values could not
+#   be trusted lexically, and then exactly once.
+#
+#   Supported types: str, int, float, bool, timestamp (ISO8601 string or epoch nanoseconds, rendered as an
+#   ISO8601 string literal), ident (plain identifier such as a table name) and list variants such as str[].
+# ---------------------------------------------------------------------------
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*):([a-z]+)(\[\])?\}")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+# string content that cannot end or escape a literal once single quotes are doubled
+_TRUSTED_STRING = re.compile(r"[^\\\r\n]*\Z")
+
+TYPES = ("str", "int", "float", "bool", "timestamp", "ident")
+
+
+class Placeholder:
+    __slots__ = ("name", "type", "is_list")
+
+    def __init__(self, name: str, type: str, is_list: bool):
+        if type not in TYPES:
+            raise Exception(f"Unsupported placeholder type [{type}] for {name}")
+        self.name = name
+        self.type = type
+        self.is_list = is_list
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _bind_scalar(placeholder: Placeholder, value):
+    """Render a single value, returns the SQL text and whether it is trusted without parsing"""
+    kind = placeholder.type
+    if kind == "str":
+        value = str(value)
+        return _quote(value), _TRUSTED_STRING.match(value) is not None
+    elif kind == "int":
+        if type(value) is bool or not isinstance(value, int):
+            value = int(value)
+        return str(value), True
+    elif kind == "float":
+        value = float(value)
+        if not math.isfinite(value):
+            raise Exception(f"Value of {placeholder.name} must be a finite number")
+        # plain decimal notation, exponents would change the token shape
+        return format(Decimal(repr(value)), "f"), True
+    elif kind == "bool":
+        if type(value) is not bool:
+            raise Exception(f"Value of {placeholder.name} must be a boolean")
+        return ("TRUE" if value else "FALSE"), True
+    elif kind == "timestamp":
+        epoch_ns = value if isinstance(value, int) else iso8601_to_epoch_ns(value)
+        return _quote(epoch_ns_to_iso8601(epoch_ns)), True
+    else:
+        value = str(value)
+        if not _IDENTIFIER.match(value):
+            raise Exception(f"Value of {placeholder.name} is not a valid identifier")
+        return value, True
+
+
+# sample values used to compute the token shape of a plan, per type and sign
+_SAMPLES = {
+    "str": "'abc'",
+    "int": "0",
+    "float": "0.0",
+    "bool": "TRUE",
+    "timestamp": "'1970-01-01T00:00:00.000Z'",
+    "ident": "abc",
+}
+_NEGATIVE_SAMPLES = {"int": "-1", "float": "-1.0"}
+
+
+def _signature_part(placeholder: Placeholder, value):
+    """Part of the plan signature contributed by a placeholder value"""
+    if placeholder.is_list:
+        # the length only: per-item signs would multiply the plans, and a sign does not change the
+        # token kinds of the SQLDetector
+        return len(value)
+    return _is_negative(placeholder, value)
+
+
+def _is_negative(placeholder: Placeholder, value) -> bool:
+    return placeholder.type in _NEGATIVE_SAMPLES and float(value) < 0
+
+
+class QueryPlan:
+    """
+    A template compiled for one placeholder signature: the literal segments and the expected token shape
+    """
+
+    __slots__ = ("segments", "sample_query", "token_context")
+
+    def __init__(self, segments: List[str], placeholders: List[Placeholder], signature):
+        self.segments = segments
+        samples = []
+        for placeholder, part in zip(placeholders, signature):
+            if placeholder.is_list:
+                samples.append(
+                    ", ".join([self._sample(placeholder, False)] * part)
+                    if part
+                    else "NULL"
+                )
+            else:
+                samples.append(self._sample(placeholder, part))
+        self.sample_query = self.assemble(samples)
+        self.token_context = SQLDetector().getSampleQueryContext(self.sample_query)
+
+    @staticmethod
+    def _sample(placeholder: Placeholder, negative: bool) -> str:
+        if negative:
+            return _NEGATIVE_SAMPLES[placeholder.type]
+        return _SAMPLES[placeholder.type]
+
+    def assemble(self, rendered_values: List[str]) -> str:
+        parts = [self.segments[0]]
+        for rendered, segment in zip(rendered_values, self.segments[1:]):
+            parts.append(rendered)
+            parts.append(segment)
+        return "".join(parts)
+
+
+class QueryTemplate:
+    """
+    A SQL statement with typed placeholders, see the module documentation for the syntax
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.placeholders: List[Placeholder] = []
+        self.segments: List[str] = []
+
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            self.segments.append(text[position : match.start()])
+            self.placeholders.append(
+                Placeholder(match.group(1), match.group(2), bool(match.group(3)))
+            )
+            position = match.end()
+        self.segments.append(text[position:])
+
+        self.plan = lru_cache(maxsize=256)(self._compile)
+
+    def _compile(self, signature: tuple) -> QueryPlan:
+        """The query plan for a placeholder signature, use plan() which caches it"""
+        return QueryPlan(self.segments, self.placeholders, signature)
+
+    def _bind(self, values: dict):
+        """Render the values, returns them with the plan signature and whether they are all trusted"""
+        signature = []
+        rendered_values = []
+        trusted = True
+        for placeholder in self.placeholders:
+            if placeholder.name not in values:
+                raise Exception(
+                    f"Missing value for placeholder {placeholder.name} of query {self.name}"
+                )
+            value = values[placeholder.name]
+            if placeholder.is_list:
+                value = list(value)
+                bound = [_bind_scalar(placeholder, v) for v in value]
+                rendered_values.append(
+                    ", ".join(text for text, _ in bound) if bound else "NULL"
+                )
+                trusted = trusted and all(ok for _, ok in bound)
+            else:
+                text, ok = _bind_scalar(placeholder, value)
+                rendered_values.append(text)
+                trusted = trusted and ok
+            signature.append(_signature_part(placeholder, value))
+        return rendered_values, tuple(signature), trusted
+
+    def render(self, **values) -> str:
+        """Bind the values and return the statement, raise an Exception if it deviates from the template shape"""
+        rendered_values, signature, trusted = self._bind(values)
+        plan = self.plan(signature)
+        query = plan.assemble(rendered_values)
+
+        # values that could alter the statement structure are verified against the cached token shape
+        if (
+            not trusted
+            and tuple(SQLDetector().getQueryContext(query)) != plan.token_context
+        ):
+            raise Exception(f"Detected potential injection from query: {query}")
+        return query
+
+
+class QueryTemplateRegistry:
+    """
+    Named query templates of a connector
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, QueryTemplate] = {}
+
+    def register(self, name: str, text: str) -> QueryTemplate:
+        template = QueryTemplate(name, text)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> QueryTemplate:
+        if name not in self._templates:
+            raise Exception(f"Unknown query template: {name}")
+        return self._templates[name]
+
+    def render(self, name: str, **values) -> str:
+        return self.get(name).render(**values)
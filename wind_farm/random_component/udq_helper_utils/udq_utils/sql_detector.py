@@ -1,8 +1,22 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
 # SPDX-License-Identifier: Apache-2.0
 
+import re
+from functools import lru_cache
+from os.path import commonprefix
+
 import sqlparse
 
+# characters that cannot end or escape a single-quoted SQL string literal
+_SAFE_LITERAL_CONTENT = re.compile(r"[^'\\\r\n]*\Z")
+
+# constructs that make counting single quotes meaningless: quoted identifiers, comments, escapes, dollar quoting
+_AMBIGUOUS_QUOTING = re.compile(r"[\"`\\$]|--|/\*")
+
+# values that can be inlined anywhere in a statement without changing its token structure: no quote,
+# whitespace or comment ("--", "/*" cannot be written without "*")
+_SAFE_PARAMETER_VALUE = re.compile(r"(?!.*--)[A-Za-z0-9_\-.:@/+]*\Z")
+
 
 class SQLDetector:
     def getSubTokenCount(self, token):
@@ -19,9 +33,48 @@ class SQLDetector:
                 tokenContext.append(self.getSubTokenCount(token))
         return tokenContext
 
+    def getSampleQueryContext(self, sampleQuery):
+        """Token context of a sample query, sample queries are fixed strings so their context is computed once
+        and cached as a template for all subsequent detections.
+        """
+        return _cachedQueryContext(sampleQuery)
+
+    @staticmethod
+    def isSafeParameterValue(value):
+        """Cheap lexical check for parameter values that cannot alter the structure of a statement,
+        such as identifiers, numbers or ISO8601 timestamps.
+        """
+        return _SAFE_PARAMETER_VALUE.match(str(value)) is not None
+
+    @staticmethod
+    def isSafeLiteralSubstitution(sampleQuery, query):
+        """Lexical pre-check: True when query only differs from sampleQuery inside a single-quoted string literal,
+        with content that can neither close nor escape the literal. Both queries then have the same token
+        context and the full sqlparse pass can be skipped.
+        """
+        prefixLength = len(commonprefix([sampleQuery, query]))
+        maxSuffixLength = min(len(sampleQuery), len(query)) - prefixLength
+        suffixLength = min(
+            len(commonprefix([sampleQuery[::-1], query[::-1]])), maxSuffixLength
+        )
+
+        prefix = sampleQuery[:prefixLength]
+        if prefix.count("'") % 2 == 0 or _AMBIGUOUS_QUOTING.search(prefix):
+            return False
+
+        sampleDiff = sampleQuery[prefixLength : len(sampleQuery) - suffixLength]
+        queryDiff = query[prefixLength : len(query) - suffixLength]
+        return (
+            _SAFE_LITERAL_CONTENT.match(sampleDiff) is not None
+            and _SAFE_LITERAL_CONTENT.match(queryDiff) is not None
+        )
+
     def detectInjection(self, sampleQuery, query):
         """Detection potential SQL Injection by comparing token context of sample query and real time query.
 
+        The token context of the sample query is cached, and queries that only differ from the sample inside a
+        string literal (the common case of a substituted parameter value) are accepted without being parsed.
+
         Parameters
         ----------
             sampleQuery: string, required
@@ -45,7 +98,16 @@ class SQLDetector:
             query_injected = "SELECT * FROM users WHERE userId = 'abc' OR 1=1"
             detector.detectInjection(sample_query, query_injected) # Exception throws!
         """
-        sampleTokenContext = self.getQueryContext(sampleQuery)
+        if sampleQuery == query or SQLDetector.isSafeLiteralSubstitution(
+            sampleQuery, query
+        ):
+            return
+        sampleTokenContext = self.getSampleQueryContext(sampleQuery)
         tokenContext = self.getQueryContext(query)
-        if not sampleTokenContext == tokenContext:
+        if not list(sampleTokenContext) == tokenContext:
             raise Exception(f"Detected potential injection from query: {query}")
+
+
+@lru_cache(maxsize=256)
+def _cachedQueryContext(query):
+    return tuple(SQLDetector().getQueryContext(query))
@@ -0,0 +1,267 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import base64
+import json
+import sqlite3
+from typing import Iterable, Tuple
+
+from udq_utils.query_template import QueryTemplateRegistry
+from udq_utils.udq import (
+    SingleEntityReader,
+    MultiEntityReader,
+    IoTTwinMakerDataRow,
+    IoTTwinMakerUdqResponse,
+)
+from udq_utils.udq_models import (
+    IoTTwinMakerUDQEntityRequest,
+    IoTTwinMakerUDQComponentTypeRequest,
+    IoTTwinMakerReference,
+    EntityComponentPropertyRef,
+    OrderBy,
+)
+from udq_utils.udq_time import epoch_ns_to_iso8601
+
+# ---------------------------------------------------------------------------
+#   Reference implementation of an AWS IoT TwinMaker UDQ Connector backed by a local SQLite database
+#
+#   Telemetry is stored in a single table clustered on (entity, component, property, time) with a secondary
+#   index for component type queries. Statements are rendered through udq_utils.query_template and results
+#   are paginated with a keyset: the nextToken holds the key of the last returned row. Property filters are
+#   applied to the fetched rows, more rows are fetched until the page is full or the range is exhausted.
+#   It is a local stand-in for a time-series store such as Amazon Timestream.
+# ---------------------------------------------------------------------------
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS telemetry (
+        entity_id TEXT NOT NULL,
+        component_name TEXT NOT NULL,
+        component_type_id TEXT NOT NULL,
+        property_name TEXT NOT NULL,
+        time_ns INTEGER NOT NULL,
+        value,
+        PRIMARY KEY (entity_id, component_name, property_name, time_ns)
+    ) WITHOUT ROWID""",
+    """CREATE INDEX IF NOT EXISTS telemetry_by_component_type
+        ON telemetry (component_type_id, property_name, entity_id, component_name, time_ns)""",
+]
+
+# the key of a row, in the pagination order of each query type
+ENTITY_KEY = ("property_name",)
+COMPONENT_TYPE_KEY = ("property_name", "entity_id", "component_name")
+
+
+def _keyset_condition(key_columns, order_by: OrderBy) -> str:
+    """Condition selecting the rows after the last returned one, rows are ordered by key then time"""
+    columns = ", ".join(key_columns)
+    placeholders = ", ".join(f"{{after_{column}:str}}" for column in key_columns)
+    time_operator = ">" if order_by == OrderBy.ASCENDING else "<"
+    return (
+        f"(({columns}) > ({placeholders}) OR "
+        f"(({columns}) = ({placeholders}) AND time_ns {time_operator} {{after_time:int}}))"
+    )
+
+
+def _select(key_columns, where: str, order_by: OrderBy) -> str:
+    direction = "ASC" if order_by == OrderBy.ASCENDING else "DESC"
+    return (
+        "SELECT entity_id, component_name, property_name, time_ns, value FROM telemetry "
+        f"WHERE {where} AND property_name IN ({{properties:str[]}}) "
+        "AND time_ns > {start:int} AND time_ns <= {end:int} "
+        f"AND {_keyset_condition(key_columns, order_by)} "
+        f"ORDER BY {', '.join(key_columns)}, time_ns {direction} LIMIT {{limit:int}}"
+    )
+
+
+QUERIES = QueryTemplateRegistry()
+for _order_by in OrderBy:
+    QUERIES.register(
+        f"entity_{_order_by.name}",
+        _select(
+            ENTITY_KEY,
+            "entity_id = {entity_id:str} AND component_name = {component_name:str}",
+            _order_by,
+        ),
+    )
+    QUERIES.register(
+        f"component_type_{_order_by.name}",
+        _select(
+            COMPONENT_TYPE_KEY, "component_type_id = {component_type_id:str}", _order_by
+        ),
+    )
+
+
+class SQLiteReader(SingleEntityReader, MultiEntityReader):
+    """
+    The UDQ Connector implementation for a local SQLite database
+    It supports both single-entity queries and multi-entity queries
+    """
+
+    # number of rows returned by a page when the request has no maxResults
+    page_size = 10000
+
+    def __init__(self, database: str = ":memory:"):
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+
+    def close(self):
+        self._connection.close()
+
+    def ingest(
+        self,
+        component_type_id: str,
+        rows: Iterable[Tuple[str, str, str, int, object]],
+    ) -> int:
+        """Bulk insert (entity_id, component_name, property_name, time_ns, value) rows in a single transaction
+
+        Returns the number of rows written, existing points are replaced
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR REPLACE INTO telemetry "
+                "(component_type_id, entity_id, component_name, property_name, time_ns, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((component_type_id,) + tuple(row) for row in rows),
+            )
+            return cursor.rowcount
+
+    # overrides SingleEntityReader.entity_query abstractmethod
+    def entity_query(
+        self, request: IoTTwinMakerUDQEntityRequest
+    ) -> IoTTwinMakerUdqResponse:
+        return self._query(
+            request,
+            f"entity_{request.order_by.name}",
+            ENTITY_KEY,
+            entity_id=request.entity_id,
+            component_name=request.component_name,
+        )
+
+    # overrides MultiEntityReader.component_type_query abstractmethod
+    def component_type_query(
+        self, request: IoTTwinMakerUDQComponentTypeRequest
+    ) -> IoTTwinMakerUdqResponse:
+        return self._query(
+            request,
+            f"component_type_{request.order_by.name}",
+            COMPONENT_TYPE_KEY,
+            component_type_id=request.component_type_id,
+        )
+
+    def _query(self, request, template_name, key_columns, **values):
+        limit = request.max_rows or self.page_size
+        after_key, after_time = self._decode_token(request, key_columns)
+        filters = request.compiled_property_filters
+
+        records = []
+        while True:
+            for column, value in zip(key_columns, after_key):
+                values[f"after_{column}"] = value
+            query = QUERIES.render(
+                template_name,
+                properties=request.selected_properties,
+                start=request.start_time_ns,
+                end=request.end_time_ns,
+                after_time=after_time,
+                # one more row tells whether there is a next page
+                limit=limit + 1,
+                **values,
+            )
+            batch = self._connection.execute(query).fetchall()
+            if filters:
+                # (entity_id, component_name, property_name, time_ns, value) records
+                batch_records = [r for r in batch if filters.matches(r[2], r[4])]
+            else:
+                batch_records = batch
+            records.extend(batch_records)
+            # stop on a full page or at the end of the range, rows filtered out leave room for more
+            if len(records) > limit or len(batch) <= limit:
+                break
+            after_key, after_time = self._record_key(batch[-1], key_columns)
+
+        next_token = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_token = self._encode_token(records[-1], key_columns)
+
+        return IoTTwinMakerUdqResponse(
+            [SQLiteDataRow(*record) for record in records], next_token
+        )
+
+    @staticmethod
+    def _decode_token(request, key_columns):
+        if not request.next_token:
+            # sorts before any property name, the time condition is then never used
+            return [""] * len(key_columns), 0
+        try:
+            key, time_ns = json.loads(base64.urlsafe_b64decode(request.next_token))
+        except Exception:
+            raise Exception(f"Invalid nextToken: {request.next_token}")
+        if len(key) != len(key_columns):
+            raise Exception(f"Invalid nextToken: {request.next_token}")
+        return key, int(time_ns)
+
+    @staticmethod
+    def _record_key(record, key_columns):
+        """The keyset position of a record: its key columns and its time"""
+        entity_id, component_name, property_name, time_ns, _ = record
+        columns = {
+            "entity_id": entity_id,
+            "component_name": component_name,
+            "property_name": property_name,
+        }
+        return [columns[column] for column in key_columns], time_ns
+
+    @staticmethod
+    def _encode_token(record, key_columns) -> str:
+        key, time_ns = SQLiteReader._record_key(record, key_columns)
+        return base64.urlsafe_b64encode(
+            json.dumps([key, time_ns]).encode("utf-8")
+        ).decode("ascii")
+
+
+class SQLiteDataRow(IoTTwinMakerDataRow):
+    """
+    The AWS IoT TwinMaker data row implementation for a row of the telemetry table
+    """
+
+    def __init__(self, entity_id, component_name, property_name, time_ns, value):
+        self._entity_id = entity_id
+        self._component_name = component_name
+        self._property_name = property_name
+        self._time_ns = time_ns
+        self._value = value
+
+    # overrides IoTTwinMakerDataRow.get_iottwinmaker_reference abstractmethod
+    def get_iottwinmaker_reference(self) -> IoTTwinMakerReference:
+        return IoTTwinMakerReference(
+            ecp=EntityComponentPropertyRef(
+                self._entity_id, self._component_name, self._property_name
+            )
+        )
+
+    # overrides IoTTwinMakerDataRow.get_timestamp_ns, the framework formats the timestamps
+    def get_timestamp_ns(self) -> int:
+        return self._time_ns
+
+    # overrides IoTTwinMakerDataRow.get_iso8601_timestamp abstractmethod
+    def get_iso8601_timestamp(self) -> str:
+        return epoch_ns_to_iso8601(self._time_ns)
+
+    # overrides IoTTwinMakerDataRow.get_value abstractmethod
+    def get_value(self):
+        return self._value
+
+    def __str__(self):
+        return str(
+            (
+                self._entity_id,
+                self._component_name,
+                self._property_name,
+                self._time_ns,
+                self._value,
+            )
+        )
@@ -1,12 +1,14 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List
+from typing import List, Sequence, Tuple
 
 from udq_utils.udq_models import (
     IoTTwinMakerReference,
+    IoTTwinMakerUdqRequest,
     IoTTwinMakerUnifiedDataQuery,
     IoTTwinMakerUDQEntityRequest,
     IoTTwinMakerUDQComponentTypeRequest,
@@ -27,6 +29,13 @@ from udq_utils.udq_models import (
 #   3. Invoke process_query(lambda_event) in your lambda handler on your connector implementation
 #      this will invoke IoTTwinMakerUnifiedDataQuery.process_query() which will handle JSON payload marshalling/unmarshalling and
 #      invoke your above implementations to fetch and process the query results
+#      responses are bounded by the framework (see IoTTwinMakerUnifiedDataQuery.max_response_bytes), a truncated
+#      response gets a nextToken that resumes from the last returned row, so your reader must return the same rows
+#      for the same request and nextToken
+#
+#   Connectors reading an asynchronous data source (aiobotocore, aiohttp, ...) can extend AsyncSingleEntityReader and
+#   AsyncMultiEntityReader instead and implement the property_query coroutine: the framework then reads the selected
+#   properties of every entity concurrently
 # ---------------------------------------------------------------------------
 
 
@@ -68,6 +77,15 @@ class IoTTwinMakerDataRow(ABC):
         """
         raise NotImplementedError("get_timestamp not implemented")
 
+    def get_timestamp_ns(self) -> int:
+        """
+        Optional, preferred by the framework when implemented: rows whose source stores epoch times avoid any
+        timestamp parsing and the framework formats all the timestamps of a response in bulk
+
+        :return: the timestamp for this row as nanoseconds since the epoch, or None
+        """
+        return None
+
     @abstractmethod
     def get_iso8601_timestamp(self) -> str:
         """
@@ -86,22 +104,66 @@ class IoTTwinMakerDataRow(ABC):
         return str(self.__dict__)
 
 
+class IoTTwinMakerDataSeries:
+    """
+    Columnar alternative to IoTTwinMakerDataRow: all the values of a single property
+
+    Connectors reading columnar data can return series instead of one row object per data point, timestamps
+    and values are parallel sequences (lists, arrays or memoryview slices) that are read without being copied
+    """
+
+    __slots__ = ("reference", "timestamps", "values")
+
+    def __init__(
+        self,
+        reference: IoTTwinMakerReference,
+        timestamps: Sequence[int],
+        values: Sequence,
+    ):
+        """
+        :param reference: the AWS IoT TwinMaker property reference of the series
+        :param timestamps: the timestamps of the values as nanoseconds since the epoch
+        :param values: the data values as python-native types
+        """
+        if len(timestamps) != len(values):
+            raise Exception(
+                "timestamps and values of a series must have the same length"
+            )
+        self.reference = reference
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+
 class IoTTwinMakerUdqResponse:
     """
     IoTTwinMakerUdqResponse models the return from the UDQ Lambda
 
     The UDQ framework will handle marshalling this IoTTwinMakerUdqResponse object into the JSON payload expected by IoT TwinMaker
-    It consists of a List of Connector Author implemented IoTTwinMakerDataRow and optional nextToken for pagination
+    It consists of a List of Connector Author implemented IoTTwinMakerDataRow, an optional List of
+    IoTTwinMakerDataSeries for columnar data and optional nextToken for pagination
     """
 
-    def __init__(self, rows: List[IoTTwinMakerDataRow], next_token: str = None):
+    def __init__(
+        self,
+        rows: List[IoTTwinMakerDataRow],
+        next_token: str = None,
+        series: List[IoTTwinMakerDataSeries] = None,
+    ):
         self._rows = rows
         self._next_token = next_token
+        self._series = series or []
 
     @property
     def rows(self):
         return self._rows
 
+    @property
+    def series(self):
+        return self._series
+
     @property
     def next_token(self):
         return self._next_token
@@ -136,3 +198,115 @@ class MultiEntityReader(IoTTwinMakerUnifiedDataQuery, ABC):
         self, request: IoTTwinMakerUDQComponentTypeRequest
     ) -> IoTTwinMakerUdqResponse:
         raise NotImplementedError("component_type_query not implemented")
+
+
+class _AsyncPropertyReader(IoTTwinMakerUnifiedDataQuery, ABC):
+    """
+    Fan-out of a UDQ request into concurrent per (entity, property) reads, shared by the asynchronous readers
+
+    The reads run on an event loop owned by the reader, which is kept across warm invocations so that connectors
+    can reuse their asynchronous clients. At most max_concurrency reads are in flight at a time and their responses
+    are merged in request order. Each read must return all the values of its property: the framework paginates
+    the merged response.
+    """
+
+    # maximum number of concurrent reads against the data source
+    max_concurrency = 8
+
+    _loop = None
+
+    @abstractmethod
+    async def property_query(
+        self,
+        request: IoTTwinMakerUdqRequest,
+        entity_id: str,
+        component_name: str,
+        property_name: str,
+    ) -> IoTTwinMakerUdqResponse:
+        raise NotImplementedError("property_query not implemented")
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def _run_concurrently(
+        self, request, entities: List[Tuple[str, str]]
+    ) -> IoTTwinMakerUdqResponse:
+        """
+        Read the selected properties of the (entityId, componentName) pairs and merge the responses
+        """
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def read(entity_id, component_name, property_name):
+                # the connector coroutine only starts once one of the max_concurrency slots is free
+                async with semaphore:
+                    return await self.property_query(
+                        request, entity_id, component_name, property_name
+                    )
+
+            return await asyncio.gather(
+                *(
+                    read(entity_id, component_name, property_name)
+                    for entity_id, component_name in entities
+                    for property_name in request.selected_properties
+                )
+            )
+
+        rows = []
+        series = []
+        for response in self._event_loop().run_until_complete(run_all()):
+            if response.next_token:
+                raise Exception(
+                    f"{self.__class__.__name__}.property_query must not paginate its responses"
+                )
+            rows.extend(response.rows)
+            series.extend(response.series)
+        return IoTTwinMakerUdqResponse(rows, series=series)
+
+
+class AsyncSingleEntityReader(_AsyncPropertyReader, SingleEntityReader, ABC):
+    """
+    Interface for an AWS IoT TwinMaker UDQ connector that supports single-entity queries against an asynchronous
+    data source
+
+    Connector authors must implement the property_query coroutine, the selected properties are read concurrently
+    """
+
+    # overrides SingleEntityReader.entity_query abstractmethod
+    def entity_query(
+        self, request: IoTTwinMakerUDQEntityRequest
+    ) -> IoTTwinMakerUdqResponse:
+        return self._run_concurrently(
+            request, [(request.entity_id, request.component_name)]
+        )
+
+
+class AsyncMultiEntityReader(_AsyncPropertyReader, MultiEntityReader, ABC):
+    """
+    Interface for an AWS IoT TwinMaker UDQ connector that supports multi-entity queries against an asynchronous
+    data source
+
+    Connector authors must implement the component_type_entities and property_query coroutines, the selected
+    properties of every entity are read concurrently
+    """
+
+    @abstractmethod
+    async def component_type_entities(
+        self, request: IoTTwinMakerUDQComponentTypeRequest
+    ) -> List[Tuple[str, str]]:
+        """
+        :return: the (entityId, componentName) pairs of the component type of the request
+        """
+        raise NotImplementedError("component_type_entities not implemented")
+
+    # overrides MultiEntityReader.component_type_query abstractmethod
+    def component_type_query(
+        self, request: IoTTwinMakerUDQComponentTypeRequest
+    ) -> IoTTwinMakerUdqResponse:
+        entities = self._event_loop().run_until_complete(
+            self.component_type_entities(request)
+        )
+        return self._run_concurrently(request, entities)
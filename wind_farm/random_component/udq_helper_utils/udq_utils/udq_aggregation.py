@@ -0,0 +1,243 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+from udq_utils.udq import IoTTwinMakerDataSeries, IoTTwinMakerUdqResponse
+from udq_utils.udq_models import OrderBy, row_timestamp_ns
+
+# ---------------------------------------------------------------------------
+#   Downsampling of UDQ responses
+#
+#   Long time windows can hold far more points than a dashboard panel is able to draw. Readers opt into this stage
+#   with IoTTwinMakerUnifiedDataQuery.downsample_target_points: every property series of the reader response holding
+#   more points than the target is reduced to at most that many points before pagination.
+#
+#   Methods:
+#       min, max, avg   one point per time bin, the window of the request is split in target_points bins of equal
+#                       width and each point is stamped with the start of its bin
+#       last            the last point of each time bin, with its own timestamp
+#       lttb            Largest-Triangle-Three-Buckets, keeps the points that preserve the visual shape of the series
+#
+#   Bins are located with binary searches over the sorted timestamps and reduced with the builtins over slices of the
+#   value column, so the cost is driven by the number of bins rather than by the number of raw points.
+#   Only numeric series are aggregated, other rows are returned untouched.
+# ---------------------------------------------------------------------------
+
+AGGREGATIONS = ("min", "max", "avg", "last", "lttb")
+
+# memoryview formats of numeric columns, as produced by array.array and the columnar store
+_NUMERIC_FORMATS = ("d", "f", "q", "l", "i")
+
+
+def _is_numeric(values: Sequence) -> bool:
+    if isinstance(values, memoryview):
+        return values.format in _NUMERIC_FORMATS
+    return all(type(value) in (int, float) for value in values)
+
+
+def aggregate_bins(
+    timestamps: Sequence[int],
+    values: Sequence,
+    start_ns: int,
+    end_ns: int,
+    target_points: int,
+    method: str,
+) -> Tuple[List[int], List]:
+    """
+    Reduce an ascending series to at most target_points points, one per time bin of [start_ns, end_ns]
+    """
+    width = max(1, -(-(end_ns - start_ns) // target_points))
+    reduce = _REDUCERS[method]
+    out_timestamps = []
+    out_values = []
+    count = len(timestamps)
+    first = 0
+    while first < count:
+        bin_index = min((timestamps[first] - start_ns) // width, target_points - 1)
+        bin_start = start_ns + bin_index * width
+        if bin_index == target_points - 1:
+            # the last bin is closed, it also holds a point at end_ns
+            last = count
+        else:
+            last = bisect_left(timestamps, bin_start + width, first)
+        if method == "last":
+            out_timestamps.append(timestamps[last - 1])
+            out_values.append(values[last - 1])
+        else:
+            out_timestamps.append(bin_start)
+            out_values.append(reduce(values[first:last]))
+        first = last
+    return out_timestamps, out_values
+
+
+def _avg(values: Sequence) -> float:
+    return sum(values) / len(values)
+
+
+_REDUCERS = {"min": min, "max": max, "avg": _avg, "last": None}
+
+
+def lttb(
+    timestamps: Sequence[int], values: Sequence, target_points: int
+) -> Tuple[List[int], List]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of an ascending series
+    (https://skemman.is/bitstream/1946/15343/3/SS_MSthesis.pdf)
+    """
+    count = len(timestamps)
+    if target_points >= count:
+        return list(timestamps), list(values)
+    if target_points < 3:
+        raise Exception("lttb downsampling needs a target of at least 3 points")
+
+    # the first and last points are always kept, the others are split in target_points - 2 buckets
+    bucket_size = (count - 2) / (target_points - 2)
+    out_timestamps = [timestamps[0]]
+    out_values = [values[0]]
+    selected = 0
+    for bucket in range(target_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # average point of the next bucket, the last point for the last bucket
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_timestamps = timestamps[end:next_end]
+        next_values = values[end:next_end]
+        average_time = sum(next_timestamps) / len(next_timestamps)
+        average_value = sum(next_values) / len(next_values)
+
+        selected_time = timestamps[selected]
+        selected_value = values[selected]
+        best_area = -1.0
+        best = start
+        for index in range(start, end):
+            area = abs(
+                (selected_time - average_time) * (values[index] - selected_value)
+                - (selected_time - timestamps[index]) * (average_value - selected_value)
+            )
+            if area > best_area:
+                best_area = area
+                best = index
+        out_timestamps.append(timestamps[best])
+        out_values.append(values[best])
+        selected = best
+
+    out_timestamps.append(timestamps[count - 1])
+    out_values.append(values[count - 1])
+    return out_timestamps, out_values
+
+
+def downsample_series(
+    series: IoTTwinMakerDataSeries,
+    start_ns: int,
+    end_ns: int,
+    target_points: int,
+    method: str,
+    order_by: OrderBy = OrderBy.ASCENDING,
+) -> IoTTwinMakerDataSeries:
+    """
+    Downsample a series ordered according to order_by, series that are small enough are returned as is
+    """
+    if len(series) <= target_points or not _is_numeric(series.values):
+        return series
+    timestamps = series.timestamps
+    values = series.values
+    if order_by == OrderBy.DESCENDING:
+        timestamps = timestamps[::-1]
+        values = values[::-1]
+
+    if method == "lttb":
+        timestamps, values = lttb(timestamps, values, target_points)
+    else:
+        timestamps, values = aggregate_bins(
+            timestamps, values, start_ns, end_ns, target_points, method
+        )
+
+    if order_by == OrderBy.DESCENDING:
+        timestamps.reverse()
+        values.reverse()
+    return IoTTwinMakerDataSeries(series.reference, timestamps, values)
+
+
+def _group_rows(rows, property_filters):
+    """
+    Group numeric rows into ascending series per reference, other rows are returned as they are
+    """
+    groups = {}
+    others = []
+    for row in rows:
+        value = row.get_value()
+        ref = row.get_iottwinmaker_reference()
+        if property_filters and not property_filters.matches(ref.property_name, value):
+            continue
+        if type(value) not in (int, float):
+            others.append(row)
+            continue
+        groups.setdefault(ref, []).append((row_timestamp_ns(row), value))
+
+    series = []
+    for ref, points in groups.items():
+        points.sort(key=lambda point: point[0])
+        series.append(
+            IoTTwinMakerDataSeries(
+                ref, [point[0] for point in points], [point[1] for point in points]
+            )
+        )
+    return series, others
+
+
+def downsample_response(
+    request,
+    udq_response: IoTTwinMakerUdqResponse,
+    target_points: int,
+    method: str,
+    property_filters=None,
+) -> IoTTwinMakerUdqResponse:
+    """
+    Downsample the rows and series of a reader response, the property filters (if any) apply to the raw values
+
+    Numeric rows are turned into series, which the framework marshals after the remaining rows
+    """
+    if method not in AGGREGATIONS:
+        raise Exception(f"Unsupported downsampling method [{method}]")
+
+    row_series, rows = _group_rows(udq_response.rows, property_filters)
+
+    reader_series = []
+    for entity_series in udq_response.series:
+        property_name = entity_series.reference.property_name
+        if property_filters and property_filters.applies_to(property_name):
+            timestamps, values = property_filters.filter_series(
+                property_name, entity_series.timestamps, entity_series.values
+            )
+            entity_series = IoTTwinMakerDataSeries(
+                entity_series.reference, timestamps, values
+            )
+        reader_series.append(entity_series)
+
+    def downsample(entity_series, order_by):
+        return downsample_series(
+            entity_series,
+            request.start_time_ns,
+            request.end_time_ns,
+            target_points,
+            method,
+            order_by,
+        )
+
+    series = []
+    for entity_series in row_series:
+        # grouped rows are ascending, they are put back in the requested order once reduced
+        entity_series = downsample(entity_series, OrderBy.ASCENDING)
+        if request.order_by == OrderBy.DESCENDING:
+            entity_series = IoTTwinMakerDataSeries(
+                entity_series.reference,
+                entity_series.timestamps[::-1],
+                entity_series.values[::-1],
+            )
+        series.append(entity_series)
+    for entity_series in reader_series:
+        series.append(downsample(entity_series, request.order_by))
+    return IoTTwinMakerUdqResponse(rows, udq_response.next_token, series=series)
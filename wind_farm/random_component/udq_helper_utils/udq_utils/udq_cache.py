@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# ---------------------------------------------------------------------------
+#   In-process cache of UDQ reader responses
+#
+#   Scene viewers and dashboard panels poll the same properties over the same time window every few seconds.
+#   A reader opts into caching by setting IoTTwinMakerUnifiedDataQuery.result_cache, the cache is usually created
+#   at module level so that it is shared by the warm invocations of a Lambda container.
+#
+#   Entries are keyed by a fingerprint of the normalized request, expire after a TTL and are evicted in least
+#   recently used order once the estimated size of the cached responses exceeds max_bytes.
+#   With result_cache_align_ns, the time window sent to the reader is widened to multiples of that duration: close
+#   windows then share a single cached reader response, which the framework trims to the requested window.
+# ---------------------------------------------------------------------------
+
+# rough in-memory cost of a cached row object and of a point of a data series
+ROW_SIZE_ESTIMATE = 200
+SERIES_POINT_SIZE_ESTIMATE = 16
+
+
+def align_window(start_ns: int, end_ns: int, align_ns: int):
+    """
+    Widen [start_ns, end_ns] to the enclosing multiples of align_ns
+    """
+    return start_ns // align_ns * align_ns, -(-end_ns // align_ns) * align_ns
+
+
+def request_fingerprint(request, start_ns: int, end_ns: int) -> str:
+    """
+    Fingerprint of everything in a UDQ request that can change the reader response, for the given time window
+
+    Selected properties are order insensitive, the property definitions (and values) and filters are included as
+    readers may depend on them
+    """
+    normalized = [
+        request.workspace_id,
+        request.entity_id,
+        request.component_name,
+        request.component_type_id,
+        sorted(request.selected_properties),
+        start_ns,
+        end_ns,
+        request.next_token,
+        request.max_rows,
+        request.order_by.name,
+        request.property_filters,
+        request.udq_context["properties"],
+    ]
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def estimate_response_size(udq_response) -> int:
+    """
+    Estimated memory footprint of an IoTTwinMakerUdqResponse
+    """
+    return len(udq_response.rows) * ROW_SIZE_ESTIMATE + sum(
+        len(series) * SERIES_POINT_SIZE_ESTIMATE for series in udq_response.series
+    )
+
+
+class UdqResultCache:
+    """
+    TTL and byte-bounded LRU cache, with hit/miss counters
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 30,
+        clock=time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        """
+        The cached value of key, None when it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.size -= size
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value, size: int):
+        """
+        Cache value under key, values larger than the whole cache are not stored
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (self._clock() + self.ttl_seconds, size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,158 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import operator
+from itertools import compress, repeat
+from typing import Callable, Dict, List, Sequence
+
+from udq_utils.udq_values import decode_data_value
+
+# ---------------------------------------------------------------------------
+#   Property filter evaluation
+#
+#   The propertyFilters of a UDQ request are compiled once per request into per-property predicates.
+#   Readers can evaluate them over whole value arrays (mask / filter_series) to push the filters down
+#   before building rows, or fall back to a row predicate (matches / filter_rows)
+# ---------------------------------------------------------------------------
+
+
+def _is_in(value, operand):
+    return value in operand
+
+
+def _is_not_in(value, operand):
+    return value not in operand
+
+
+OPERATORS = {
+    "EQUAL": operator.eq,
+    "NOT_EQUAL": operator.ne,
+    "LESS_THAN": operator.lt,
+    "LESS_THAN_EQUAL": operator.le,
+    "GREATER_THAN": operator.gt,
+    "GREATER_THAN_EQUAL": operator.ge,
+    "IN": _is_in,
+    "NOT_IN": _is_not_in,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class PropertyFilterClause:
+    """
+    A single compiled filter: the operator function and its operand decoded as a python-native value
+    """
+
+    __slots__ = ("property_name", "operator_name", "function", "operand")
+
+    def __init__(self, property_filter: dict):
+        try:
+            self.property_name = property_filter["propertyName"]
+            self.operator_name = property_filter["operator"]
+        except KeyError as e:
+            raise Exception(f"Invalid property filter {property_filter}: missing {e}")
+        self.function = OPERATORS.get(self.operator_name.upper())
+        if self.function is None:
+            raise Exception(
+                f"Unsupported property filter operator: [{self.operator_name}]"
+            )
+        self.operand = decode_data_value(property_filter.get("value"))
+        if self.function in (_is_in, _is_not_in):
+            self.operand = frozenset(self.operand or [])
+
+    def evaluate(self, value) -> bool:
+        try:
+            return bool(self.function(value, self.operand))
+        except TypeError:
+            # incomparable types (e.g. a string against a number) never match
+            return False
+
+    def evaluate_all(self, values: Sequence) -> List[bool]:
+        try:
+            return list(map(self.function, values, repeat(self.operand)))
+        except TypeError:
+            return [self.evaluate(value) for value in values]
+
+
+class CompiledPropertyFilters:
+    """
+    The propertyFilters of a request compiled into per-property predicates
+
+    Filters on the same property are combined with AND. Filters only apply to the values of the property they
+    name, values of properties without filters always match.
+    """
+
+    def __init__(self, property_filters: List[dict]):
+        self._clauses: Dict[str, List[PropertyFilterClause]] = {}
+        for property_filter in property_filters or []:
+            clause = PropertyFilterClause(property_filter)
+            self._clauses.setdefault(clause.property_name, []).append(clause)
+
+    def __bool__(self):
+        return bool(self._clauses)
+
+    @property
+    def property_names(self):
+        """
+        Names of the properties having at least one filter
+        """
+        return self._clauses.keys()
+
+    def applies_to(self, property_name: str) -> bool:
+        return property_name in self._clauses
+
+    def matches(self, property_name: str, value) -> bool:
+        """
+        Row predicate: whether a single value of the given property passes the filters
+        """
+        for clause in self._clauses.get(property_name, ()):
+            if not clause.evaluate(value):
+                return False
+        return True
+
+    def mask(self, property_name: str, values: Sequence) -> List[bool]:
+        """
+        Evaluate the filters over a whole array of values of the given property
+        Returns one boolean per value, True when the value passes the filters
+        """
+        clauses = self._clauses.get(property_name)
+        if not clauses:
+            return [True] * len(values)
+        mask = clauses[0].evaluate_all(values)
+        for clause in clauses[1:]:
+            mask = list(map(operator.and_, mask, clause.evaluate_all(values)))
+        return mask
+
+    def filter_series(self, property_name: str, timestamps: Sequence, values: Sequence):
+        """
+        Filter parallel timestamp and value arrays of the given property
+        Returns the (timestamps, values) lists of the values passing the filters
+        """
+        if not self.applies_to(property_name):
+            return timestamps, values
+        mask = self.mask(property_name, values)
+        return list(compress(timestamps, mask)), list(compress(values, mask))
+
+    def row_predicate(self) -> Callable:
+        """
+        Fallback for readers producing IoTTwinMakerDataRow objects: a predicate over rows
+        """
+
+        def predicate(row):
+            property_name = row.get_iottwinmaker_reference().property_name
+            return self.matches(property_name, row.get_value())
+
+        return predicate
+
+    def filter_rows(self, rows):
+        """
+        Filter a list of IoTTwinMakerDataRow objects
+        """
+        if not self:
+            return rows
+        return list(filter(self.row_predicate(), rows))
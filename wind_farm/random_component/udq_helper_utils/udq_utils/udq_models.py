@@ -1,28 +1,99 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
 # SPDX-License-Identifier: Apache-2.0
 
+import base64
+import copy
 import json
 from abc import ABC
 from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import Dict, List
+
+from udq_utils.udq_cache import (
+    align_window,
+    estimate_response_size,
+    request_fingerprint,
+)
+from udq_utils.udq_time import (
+    NANOS_PER_SECOND,
+    Iso8601Formatter,
+    datetime_to_epoch_ns,
+    epoch_ns_to_iso8601,
+    iso8601_to_epoch_ns,
+)
+from udq_utils.udq_filters import CompiledPropertyFilters
+from udq_utils.udq_values import decode_data_value, encode_data_value, value_encoder
+
+
+# ---------------------------------------------------------------------------
+#   Property references are immutable and interned: constructing a reference that already exists returns the
+#   existing object, with its hash computed once and its serialized form built once. Readers can therefore create
+#   references per row while the framework groups rows by identity-fast dict lookups.
+#   The intern tables are bounded, they are reset when they grow past MAX_INTERNED_REFERENCES.
+# ---------------------------------------------------------------------------
+
+MAX_INTERNED_REFERENCES = 100_000
+
+
+class _InternedReference:
+    """
+    Base of the immutable, interned reference types
+    """
+
+    __slots__ = ("_hash",)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __hash__(self):
+        return self._hash
 
+    @classmethod
+    def _store(cls, key, reference):
+        if len(cls._interned) >= MAX_INTERNED_REFERENCES:
+            cls._interned.clear()
+        cls._interned[key] = reference
+        return reference
 
-class EntityComponentPropertyRef:
+
+class EntityComponentPropertyRef(_InternedReference):
     """
     Represents an entity-component-property reference that uniquely identifies an AWS IoT TwinMaker property
     Consists of an entityId, componentName, and propertyName
     """
 
-    def __init__(self, entity_id: str, component_name: str, property_name: str):
-        self.entity_id = entity_id
-        self.component_name = component_name
-        self.property_name = property_name
+    __slots__ = ("entity_id", "component_name", "property_name")
+
+    _interned = {}
+
+    def __new__(cls, entity_id: str, component_name: str, property_name: str):
+        key = (entity_id, component_name, property_name)
+        ref = cls._interned.get(key)
+        if ref is None:
+            ref = object.__new__(cls)
+            object.__setattr__(ref, "entity_id", entity_id)
+            object.__setattr__(ref, "component_name", component_name)
+            object.__setattr__(ref, "property_name", property_name)
+            object.__setattr__(ref, "_hash", hash(key))
+            cls._store(key, ref)
+        return ref
+
+    def __reduce__(self):
+        return EntityComponentPropertyRef, (
+            self.entity_id,
+            self.component_name,
+            self.property_name,
+        )
 
-    def __hash__(self):
-        return hash((self.entity_id, self.component_name, self.property_name))
+    # defining __eq__ resets __hash__, keep the precomputed one
+    __hash__ = _InternedReference.__hash__
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (self.entity_id, self.component_name, self.property_name) == (
             other.entity_id,
             other.component_name,
@@ -30,54 +101,203 @@ class EntityComponentPropertyRef:
         )
 
 
-class ExternalIdPropertyRef:
+def _freeze(value):
+    """
+    Hashable form of a JSON-like value, scalars are paired with their type: 1, 1.0 and True are equal
+    in Python but not the same JSON value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return type(value), value
+
+
+class ExternalIdPropertyRef(_InternedReference):
     """
     Represents an externalIdProperty reference that uniquely identifies an AWS IoT TwinMaker property across entities
     Consists of a key-value map externalIdProperty and propertyName
+
+    The externalIdProperty map is copied and must not be modified
     """
 
-    def __init__(self, external_id_property: dict, property_name: str):
-        self.external_id_property = external_id_property
-        self.property_name = property_name
+    __slots__ = ("external_id_property", "property_name", "_key")
 
-    def __hash__(self):
-        return hash((json.dumps(self.external_id_property), self.property_name))
+    _interned = {}
+
+    def __new__(cls, external_id_property: dict, property_name: str):
+        # readers build their maps the same way every time: look the map up as is before canonicalizing it
+        try:
+            fast_key = (
+                tuple((k, type(v), v) for k, v in external_id_property.items()),
+                property_name,
+            )
+            ref = cls._interned.get(fast_key)
+        except TypeError:
+            fast_key = None
+            ref = None
+        if ref is None:
+            key = (_freeze(external_id_property), property_name)
+            ref = cls._interned.get(key)
+            if ref is None:
+                ref = object.__new__(cls)
+                object.__setattr__(
+                    ref, "external_id_property", dict(external_id_property)
+                )
+                object.__setattr__(ref, "property_name", property_name)
+                object.__setattr__(ref, "_key", key)
+                object.__setattr__(ref, "_hash", hash(key))
+                cls._store(key, ref)
+            if fast_key is not None:
+                cls._store(fast_key, ref)
+        return ref
+
+    def __reduce__(self):
+        return ExternalIdPropertyRef, (self.external_id_property, self.property_name)
+
+    # defining __eq__ resets __hash__, keep the precomputed one
+    __hash__ = _InternedReference.__hash__
 
     def __eq__(self, other):
-        return (self.external_id_property, self.property_name) == (
-            other.external_id_property,
-            other.property_name,
-        )
+        if self is other:
+            return True
+        return self._key == other._key
 
 
-class IoTTwinMakerReference:
+class IoTTwinMakerReference(_InternedReference):
     """
     Represents a unique reference to a property in AWS IoT TwinMaker
     May include an EntityComponentPropertyRef or an ExternalIdPropertyRef
     """
 
-    def __init__(
-        self, ecp: EntityComponentPropertyRef = None, eip: ExternalIdPropertyRef = None
-    ):
-        self.ecp = ecp
-        self.eip = eip
+    __slots__ = ("ecp", "eip", "_serialized")
 
-    def __hash__(self):
-        return hash((self.ecp, self.eip))
+    _interned = {}
+
+    def __new__(
+        cls, ecp: EntityComponentPropertyRef = None, eip: ExternalIdPropertyRef = None
+    ):
+        key = (ecp, eip)
+        ref = cls._interned.get(key)
+        if ref is None:
+            ref = object.__new__(cls)
+            object.__setattr__(ref, "ecp", ecp)
+            object.__setattr__(ref, "eip", eip)
+            object.__setattr__(ref, "_serialized", None)
+            object.__setattr__(ref, "_hash", hash(key))
+            cls._store(key, ref)
+        return ref
+
+    def __reduce__(self):
+        return IoTTwinMakerReference, (self.ecp, self.eip)
+
+    # defining __eq__ resets __hash__, keep the precomputed one
+    __hash__ = _InternedReference.__hash__
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (self.ecp, self.eip) == (other.ecp, other.eip)
 
+    @property
+    def property_name(self) -> str:
+        return self.ecp.property_name if self.ecp else self.eip.property_name
+
     def serialize(self):
-        ret = {}
-        if self.ecp:
-            ret["entityId"] = self.ecp.entity_id
-            ret["componentName"] = self.ecp.component_name
-            ret["propertyName"] = self.ecp.property_name
-        if self.eip:
-            ret["externalIdProperty"] = self.eip.external_id_property
-            ret["propertyName"] = self.eip.property_name
-        return ret
+        """
+        The entityPropertyReference of the reference, built once and shared: it must not be modified
+        """
+        if self._serialized is None:
+            ret = {}
+            if self.ecp:
+                ret["entityId"] = self.ecp.entity_id
+                ret["componentName"] = self.ecp.component_name
+                ret["propertyName"] = self.ecp.property_name
+            if self.eip:
+                ret["externalIdProperty"] = self.eip.external_id_property
+                ret["propertyName"] = self.eip.property_name
+            object.__setattr__(self, "_serialized", ret)
+        return self._serialized
+
+
+def estimate_serialized_size(obj) -> int:
+    """
+    Cheap upper-bound-ish estimate of the length of json.dumps(obj) for the plain structures used in UDQ responses
+    Escaped characters are not accounted for, which is fine as the response budget keeps some headroom
+    """
+    if type(obj) is str:
+        return len(obj) + 2
+    elif type(obj) is dict:
+        # braces, plus ", " between items and ": " plus quotes around each key
+        size = 2 + 2 * max(len(obj) - 1, 0)
+        for key, value in obj.items():
+            size += len(key) + 4 + estimate_serialized_size(value)
+        return size
+    elif type(obj) in (list, tuple):
+        size = 2 + 2 * max(len(obj) - 1, 0)
+        for value in obj:
+            size += estimate_serialized_size(value)
+        return size
+    elif obj is None:
+        return 4
+    else:
+        return len(str(obj))
+
+
+class UdqPaginationToken:
+    """
+    Pagination token issued by the UDQ framework
+
+    It wraps the connector's own nextToken (if any) together with the number of rows of the connector response
+    that were already returned to IoT TwinMaker, so that a truncated response can be resumed on the next call
+    """
+
+    PREFIX = "udq1:"
+
+    def __init__(self, reader_token: str = None, offset: int = 0):
+        self.reader_token = reader_token
+        self.offset = offset
+
+    def encode(self) -> str:
+        payload = json.dumps(
+            {"r": self.reader_token, "o": self.offset}, separators=(",", ":")
+        )
+        return UdqPaginationToken.PREFIX + base64.urlsafe_b64encode(
+            payload.encode("utf-8")
+        ).decode("ascii")
+
+    @staticmethod
+    def decode(token: str):
+        """
+        Decode a nextToken received from IoT TwinMaker
+        Tokens that were not issued by the framework are handed over untouched to the connector
+        """
+        if not token or not token.startswith(UdqPaginationToken.PREFIX):
+            return UdqPaginationToken(token, 0)
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(token[len(UdqPaginationToken.PREFIX) :])
+            )
+            offset = int(payload["o"])
+        except Exception:
+            raise Exception(f"Invalid nextToken: {token}")
+        if offset < 0:
+            raise Exception(f"Invalid nextToken: {token}")
+        return UdqPaginationToken(payload["r"], offset)
+
+
+# udq_utils.udq depends on this module, the reader interfaces are therefore resolved on first use
+# and kept for the lifetime of the container instead of being re-imported on every query
+_reader_interfaces = None
+
+
+def _get_reader_interfaces():
+    global _reader_interfaces
+    if _reader_interfaces is None:
+        from udq_utils.udq import SingleEntityReader, MultiEntityReader
+
+        _reader_interfaces = (SingleEntityReader, MultiEntityReader)
+    return _reader_interfaces
 
 
 class IoTTwinMakerUnifiedDataQuery(ABC):
@@ -85,14 +305,71 @@ class IoTTwinMakerUnifiedDataQuery(ABC):
     main entry point to UDQ wrapper, handles request/response unmarshalling/marshalling
     delegates to the connector author's Reader implementation to retrieve data rows from their data source
     delegates to the connector author's DataRow implementation to extract necessary fields for response construction
+
+    Responses are bounded by the framework: marshalling stops once the estimated response size reaches
+    max_response_bytes, or once max_response_rows (or the request maxResults) values were produced. The position
+    reached in the connector response is then encoded into the returned nextToken, and the following call resumes
+    from it. Connectors must therefore return the same rows for the same request and nextToken.
     """
 
-    def process_query(self, lambda_event):
-        from udq_utils.udq import SingleEntityReader, MultiEntityReader
+    # AWS Lambda rejects synchronous responses larger than 6MB, keep some headroom for the envelope
+    max_response_bytes = 5 * 1024 * 1024
+
+    # optional limit on the number of values returned in a single response, maxResults of the request also applies
+    max_response_rows = None
+
+    # readers that do not push the request propertyFilters down can let the framework drop non-matching rows
+    apply_property_filters = False
 
+    # readers opt into downsampling by setting a maximum number of points per property series,
+    # see udq_utils.udq_aggregation for the supported methods
+    downsample_target_points = None
+    downsample_method = "avg"
+
+    # readers opt into caching their responses with a udq_utils.udq_cache.UdqResultCache, the time window sent
+    # to the reader can be widened to multiples of result_cache_align_ns so that close windows share an entry
+    result_cache = None
+    result_cache_align_ns = None
+
+    def _row_budget(self, request):
+        limits = [
+            limit for limit in (self.max_response_rows, request.max_rows) if limit
+        ]
+        return min(limits) if limits else None
+
+    def process_query(self, lambda_event):
         # parse the raw lambda event into a structured IoTTwinMakerUdqRequest request object
         request = IoTTwinMakerUdqRequest.parse(lambda_event)
 
+        # resume from a framework issued token: the connector only gets to see its own token
+        pagination = UdqPaginationToken.decode(request.next_token)
+        request._nextToken = pagination.reader_token
+
+        property_filters = (
+            request.compiled_property_filters if self.apply_property_filters else None
+        )
+        window = None
+        if self.result_cache is None:
+            udq_response = self._read(request, lambda_event, property_filters)
+        else:
+            udq_response, window = self._cached_read(
+                request, lambda_event, property_filters
+            )
+
+        if self.downsample_target_points:
+            # the filters were applied to the raw values
+            property_filters = None
+
+        return self._marshal_response(
+            request, udq_response, pagination, property_filters, window
+        )
+
+    def _read(self, request, lambda_event, property_filters):
+        """
+        The reader response to a request, downsampled if enabled
+        """
+        SingleEntityReader, MultiEntityReader = _get_reader_interfaces()
+
         # invoke the approriate entity reader function based on the request, or throw error if not supported
         if isinstance(request, IoTTwinMakerUDQEntityRequest):
             if isinstance(self, SingleEntityReader):
@@ -113,62 +390,361 @@ class IoTTwinMakerUnifiedDataQuery(ABC):
                 f"Received unknown UDQ request type: {lambda_event}"
             )
 
-        # inline helper to marshall python native types into common IoT TwinMaker types
-        def serialize_value(val):
-            if type(val) is str:
-                return {"stringValue": val}
-            elif type(val) is float:
-                return {
-                    "doubleValue": str(
-                        val
-                    )  # Note: the UDQ interface expects string value returns instead of JSON-native types
-                }
-            elif type(val) is bool:
-                return {"booleanValue": str(val)}
-            else:
-                assert False
+        if self.downsample_target_points:
+            # imported on first use, udq_utils.udq_aggregation depends on udq_utils.udq
+            from udq_utils.udq_aggregation import downsample_response
 
-        # marshall data rows into property values grouped by entityPropertyReference
-        entity_prop_ref_to_values = {}
-        for row in udq_response.rows:
-            ref = row.get_iottwinmaker_reference()
-            if ref not in entity_prop_ref_to_values:
-                entity_prop_ref_to_values[ref] = []
-            ts = row.get_iso8601_timestamp()
-            if ts is None:
-                ts = row.get_timestamp().strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            entity_prop_ref_to_values[ref].append(
-                {"time": ts, "value": serialize_value(row.get_value())}
+            udq_response = downsample_response(
+                request,
+                udq_response,
+                self.downsample_target_points,
+                self.downsample_method,
+                property_filters,
             )
+        return udq_response
 
-        # marshall the entity_prop_ref_to_values into response propertyValues structure
-        property_values = []
-        for ref in entity_prop_ref_to_values:
-            property_values.append(
-                {
-                    "entityPropertyReference": ref.serialize(),
-                    "values": entity_prop_ref_to_values[ref],
-                }
+    def _cached_read(self, request, lambda_event, property_filters):
+        """
+        The reader response to a request, served from result_cache when possible
+
+        Returns the response and the (start, end) window it must be trimmed to, None when it matches the request
+        """
+        start_ns, end_ns = request.start_time_ns, request.end_time_ns
+        if self.result_cache_align_ns:
+            start_ns, end_ns = align_window(
+                start_ns, end_ns, self.result_cache_align_ns
             )
+        window = (
+            (request.start_time_ns, request.end_time_ns)
+            if (start_ns, end_ns) != (request.start_time_ns, request.end_time_ns)
+            else None
+        )
+
+        key = request_fingerprint(request, start_ns, end_ns)
+        udq_response = self.result_cache.get(key)
+        if udq_response is None:
+            reader_request = (
+                request.with_time_window(start_ns, end_ns) if window else request
+            )
+            udq_response = self._read(reader_request, lambda_event, property_filters)
+            self.result_cache.put(
+                key, udq_response, estimate_response_size(udq_response)
+            )
+        return udq_response, window
+
+    @staticmethod
+    def serialize_value(val):
+        """
+        Marshall python native types into common IoT TwinMaker types
+        Note: the UDQ interface expects string value returns instead of JSON-native types
+        """
+        return encode_data_value(val)
+
+    def _value_encoder(self, request, property_name: str):
+        """
+        The encoder of the values of a property: specialized for the type declared in the request property
+        definitions, unless the connector overrides serialize_value
+        """
+        if (
+            type(self).serialize_value
+            is not IoTTwinMakerUnifiedDataQuery.serialize_value
+        ):
+            return self.serialize_value
+        definition = request.property_definitions.get(property_name)
+        if definition is None:
+            return encode_data_value
+        return definition.encoder
+
+    def _marshal_response(
+        self, request, udq_response, pagination, property_filters=None, window=None
+    ):
+        """
+        Marshall the data rows, then the data series, of the reader response into property values grouped
+        by entityPropertyReference. Values are numbered in that order: marshalling starts at the offset of the
+        pagination token and stops as soon as the response budget is exhausted, remembering where to resume.
+        Values not matching property_filters (if given) or outside of the (start, end) window (if given) are skipped.
+        """
+        builder = _ResponseBuilder(self._row_budget(request), self.max_response_bytes)
+        # one encoder per property, resolved on first use
+        encoders = {}
+        # timestamps of a response are formatted in sequence, sharing their date prefix
+        format_timestamp = Iso8601Formatter()
+        offset = pagination.offset
+        stopped_at = None
+
+        position = 0
+        for row in udq_response.rows:
+            if position < offset:
+                position += 1
+                continue
+            ref = row.get_iottwinmaker_reference()
+            native_value = row.get_value()
+            if property_filters and not property_filters.matches(
+                ref.property_name, native_value
+            ):
+                position += 1
+                continue
+            # epoch times are preferred, ISO8601 strings are passed through as is
+            ts_ns = row.get_timestamp_ns()
+            if ts_ns is None:
+                ts = row.get_iso8601_timestamp()
+                if ts is None:
+                    ts_ns = datetime_to_epoch_ns(row.get_timestamp())
+            if ts_ns is not None:
+                ts = format_timestamp(ts_ns)
+            if window and not (
+                window[0]
+                <= (ts_ns if ts_ns is not None else iso8601_to_epoch_ns(ts))
+                <= window[1]
+            ):
+                position += 1
+                continue
+            encode = encoders.get(ref.property_name)
+            if encode is None:
+                encode = encoders[ref.property_name] = self._value_encoder(
+                    request, ref.property_name
+                )
+            if not builder.add(ref, ts, encode(native_value)):
+                stopped_at = position
+                break
+            position += 1
+
+        if stopped_at is None:
+            for series in udq_response.series:
+                count = len(series.values)
+                if position + count <= offset:
+                    # the whole series was returned by a previous page
+                    position += count
+                    continue
+                first = max(0, offset - position)
+                ref = series.reference
+                timestamps = series.timestamps
+                values = series.values
+                mask = (
+                    property_filters.mask(ref.property_name, values[first:])
+                    if property_filters
+                    and property_filters.applies_to(ref.property_name)
+                    else None
+                )
+                # the values of a series are encoded by the routine of its property type, as they are consumed
+                encoded_values = map(
+                    self._value_encoder(request, ref.property_name), values[first:]
+                )
+                for index, encoded in zip(range(first, count), encoded_values):
+                    if mask is not None and not mask[index - first]:
+                        continue
+                    if window and not window[0] <= timestamps[index] <= window[1]:
+                        continue
+                    if not builder.add(
+                        ref, format_timestamp(timestamps[index]), encoded
+                    ):
+                        stopped_at = position + index
+                        break
+                if stopped_at is not None:
+                    break
+                position += count
+
+        if stopped_at is not None:
+            next_token = UdqPaginationToken(
+                pagination.reader_token, stopped_at
+            ).encode()
+        elif udq_response.next_token:
+            next_token = UdqPaginationToken(udq_response.next_token, 0).encode()
+        else:
+            next_token = None
 
         # marshall propertyValues and nextToken into final UDQ response
         return {
-            "propertyValues": property_values,
-            "nextToken": udq_response.next_token if udq_response.next_token else None,
+            "propertyValues": builder.property_values(),
+            "nextToken": next_token,
         }
 
 
+def row_timestamp_ns(row) -> int:
+    """
+    The timestamp of an IoTTwinMakerDataRow as nanoseconds since the epoch, whichever accessor the row implements
+    """
+    ts_ns = row.get_timestamp_ns()
+    if ts_ns is not None:
+        return ts_ns
+    ts = row.get_iso8601_timestamp()
+    if ts is not None:
+        return iso8601_to_epoch_ns(ts)
+    return datetime_to_epoch_ns(row.get_timestamp())
+
+
+class _ResponseBuilder:
+    """
+    Accumulates marshalled values grouped by IoTTwinMakerReference while tracking the estimated response size
+    """
+
+    # estimated JSON overhead of the response envelope, of a propertyValues entry and of a single value entry
+    RESPONSE_OVERHEAD = len('{"propertyValues": [], "nextToken": ""}') + 512
+    PROPERTY_VALUES_OVERHEAD = len('{"entityPropertyReference": , "values": []}, ')
+    VALUE_OVERHEAD = len('{"time": "", "value": }, ')
+
+    def __init__(self, row_budget: int, byte_budget: int):
+        self.row_budget = row_budget
+        self.byte_budget = byte_budget
+        self.size = self.RESPONSE_OVERHEAD
+        self.emitted = 0
+        self.groups = {}
+
+    def add(self, ref, ts: str, value: dict) -> bool:
+        """
+        Add a value, returns False (and leaves the response untouched) when the budget is exhausted
+        At least one value is always accepted to guarantee progress
+        """
+        entry_size = self.VALUE_OVERHEAD + len(ts) + 2 + estimate_serialized_size(value)
+        values = self.groups.get(ref)
+        if values is None:
+            entry_size += self.PROPERTY_VALUES_OVERHEAD + estimate_serialized_size(
+                ref.serialize()
+            )
+
+        if self.emitted and (
+            (self.row_budget and self.emitted >= self.row_budget)
+            or self.size + entry_size > self.byte_budget
+        ):
+            return False
+
+        if values is None:
+            values = self.groups[ref] = []
+        values.append({"time": ts, "value": value})
+        self.size += entry_size
+        self.emitted += 1
+        return True
+
+    def property_values(self) -> List[dict]:
+        """
+        The response propertyValues structure
+        """
+        return [
+            {"entityPropertyReference": ref.serialize(), "values": values}
+            for ref, values in self.groups.items()
+        ]
+
+
 class OrderBy(Enum):
     ASCENDING = 1
     DESCENDING = 2
 
 
+# marker for lazily parsed fields that were not computed yet
+_UNSET = object()
+
+
+class PropertyDefinition:
+    """
+    Typed view on an entry of the request properties map: the property definition and its value (if any)
+    """
+
+    __slots__ = ("name", "_raw", "_value", "_encoder")
+
+    def __init__(self, name: str, raw: dict):
+        self.name = name
+        self._raw = raw
+        self._value = _UNSET
+        self._encoder = None
+
+    @property
+    def definition(self) -> dict:
+        return self._raw.get("definition") or {}
+
+    @property
+    def data_type(self) -> str:
+        """
+        The IoT TwinMaker type of the property: DOUBLE, INTEGER, LONG, BOOLEAN, STRING, LIST, MAP, ...
+        """
+        return self.definition.get("dataType", {}).get("type")
+
+    @property
+    def nested_type(self) -> str:
+        """
+        The type of the elements for LIST and MAP properties
+        """
+        return self.definition.get("dataType", {}).get("nestedType", {}).get("type")
+
+    @property
+    def is_time_series(self) -> bool:
+        return bool(self.definition.get("isTimeSeries"))
+
+    @property
+    def is_external_id(self) -> bool:
+        return bool(self.definition.get("isExternalId"))
+
+    @property
+    def is_stored_externally(self) -> bool:
+        return bool(self.definition.get("isStoredExternally"))
+
+    @property
+    def is_required_in_entity(self) -> bool:
+        return bool(self.definition.get("isRequiredInEntity"))
+
+    @property
+    def raw_value(self) -> dict:
+        """
+        The value of the property as an IoT TwinMaker DataValue, None when the property has no value
+        """
+        return self._raw.get("value")
+
+    @property
+    def value(self):
+        """
+        The value of the property as a python-native type, None when the property has no value
+        """
+        if self._value is _UNSET:
+            self._value = decode_data_value(self.raw_value)
+        return self._value
+
+    @property
+    def encoder(self):
+        """
+        The routine encoding python-native values of this property into DataValue structures, specialized for
+        its declared type, see udq_utils.udq_values.value_encoder
+        """
+        if self._encoder is None:
+            self._encoder = value_encoder(self.data_type, self.nested_type)
+        return self._encoder
+
+    def __repr__(self):
+        return f"PropertyDefinition({self.name}, {self.data_type})"
+
+
 class IoTTwinMakerUdqRequest:
     """
     Models a UDQ request
     Check fields annotated with @property
+
+    Only the fields required to route and validate the request are read when it is constructed, derived
+    fields (typed property definitions, epoch times, deprecated datetimes) are computed once on first access.
+    The raw event itself is not retained.
     """
 
+    __slots__ = (
+        "_workspaceId",
+        "_properties",
+        "_entityId",
+        "_componentName",
+        "_componentTypeId",
+        "_selectedProperties",
+        "_startDateTimeSeconds",
+        "_endDateTimeSeconds",
+        "_startDateTime",
+        "_endDateTime",
+        "_startTime",
+        "_endTime",
+        "_nextToken",
+        "_maxRows",
+        "_orderBy",
+        "_property_filters",
+        "_udq_context",
+        "_property_definitions",
+        "_startTimeNs",
+        "_endTimeNs",
+        "_compiledPropertyFilters",
+    )
+
     @staticmethod
     def get_required_field(dict, key):
         if key not in dict:
@@ -188,14 +764,10 @@ class IoTTwinMakerUdqRequest:
             )
 
     def __init__(self, event):
-        self._event = event
-
-        self._udq_context = {
-            "workspace_id": IoTTwinMakerUdqRequest.get_required_field(
-                event, "workspaceId"
-            ),
-            "properties": self._event["properties"],
-        }
+        self._workspaceId = IoTTwinMakerUdqRequest.get_required_field(
+            event, "workspaceId"
+        )
+        self._properties = event["properties"]
 
         self._entityId = event.get("entityId")
         self._componentName = event.get("componentName")
@@ -213,54 +785,49 @@ class IoTTwinMakerUdqRequest:
 
         # validate the selected properties
         # verify each selected property is in the properties map from the event
-        allowed_props = self._udq_context["properties"].keys()
         if len(self._selectedProperties) < 1:
             raise Exception(
                 "Unexpected selectedProperties[{}]".format(self._selectedProperties)
             )
         for selectedProperty in self._selectedProperties:
             if (
-                selectedProperty not in allowed_props
+                selectedProperty not in self._properties
                 and selectedProperty != "alarm_status"
             ):
                 raise Exception(
-                    f"selectedProperty: {selectedProperty} not found in entity/component definition. Allowed properties: {allowed_props}"
+                    f"selectedProperty: {selectedProperty} not found in entity/component definition. "
+                    f"Allowed properties: {self._properties.keys()}"
                 )
 
-        # deprecated: only used while startDateTime/endDateTime not yet replaced with startTime/endTime
-        def get_optional_datetime_field(event, field_name):
-            time_in_sec = IoTTwinMakerUdqRequest.get_required_field(event, field_name)
-            try:
-                return datetime.utcfromtimestamp(time_in_sec)
-            except:
-                return None
+        # deprecated: only kept while startDateTime/endDateTime are not yet replaced with startTime/endTime
+        # converted to datetime on first access only
+        self._startDateTimeSeconds = event.get("startDateTime")
+        self._endDateTimeSeconds = event.get("endDateTime")
 
-        # optional since these fields are being replaced with startTime / endTime for better time precision
-        self._startDateTime = get_optional_datetime_field(self._event, "startDateTime")
-        self._endDateTime = get_optional_datetime_field(self._event, "endDateTime")
-
-        self._startTime = IoTTwinMakerUdqRequest.get_required_field(
-            self._event, "startTime"
-        )
-        self._endTime = IoTTwinMakerUdqRequest.get_required_field(
-            self._event, "endTime"
-        )
+        self._startTime = IoTTwinMakerUdqRequest.get_required_field(event, "startTime")
+        self._endTime = IoTTwinMakerUdqRequest.get_required_field(event, "endTime")
 
         self._nextToken = event.get("nextToken")
         self._maxRows = event.get("maxResults")
 
-        def get_order_by(event):
-            orderByTime = event.get("orderByTime")
-            if not orderByTime or orderByTime == "ASCENDING":
-                return OrderBy.ASCENDING
-            elif orderByTime == "DESCENDING":
-                return OrderBy.DESCENDING
-            else:
-                raise Exception(f"Unsupported OrderBy type: [{orderByTime}]")
+        orderByTime = event.get("orderByTime")
+        if not orderByTime or orderByTime == "ASCENDING":
+            self._orderBy = OrderBy.ASCENDING
+        elif orderByTime == "DESCENDING":
+            self._orderBy = OrderBy.DESCENDING
+        else:
+            raise Exception(f"Unsupported OrderBy type: [{orderByTime}]")
 
-        self._orderBy = get_order_by(self._event)
+        self._property_filters = event.get("propertyFilters") or []
 
-        self._property_filters = self._event.get("propertyFilters", [])
+        self._udq_context = None
+        self._property_definitions = None
+        self._startTimeNs = None
+        self._endTimeNs = None
+        self._compiledPropertyFilters = None
+        # None is a valid conversion result (invalid timestamp)
+        self._startDateTime = _UNSET
+        self._endDateTime = _UNSET
 
     @property
     def udq_context(self):
@@ -268,8 +835,32 @@ class IoTTwinMakerUdqRequest:
         Additional context information provided by IoT TwinMaker. Such as the workspace of this request and the property context
         for the entity/component type we are querying (if present)
         """
+        if self._udq_context is None:
+            self._udq_context = {
+                "workspace_id": self._workspaceId,
+                "properties": self._properties,
+            }
         return self._udq_context
 
+    @property
+    def workspace_id(self) -> str:
+        """
+        The IoT TwinMaker workspace of this request
+        """
+        return self._workspaceId
+
+    @property
+    def property_definitions(self) -> Dict[str, PropertyDefinition]:
+        """
+        Typed property definitions (and values) of the entity/component type we are querying, by property name
+        """
+        if self._property_definitions is None:
+            self._property_definitions = {
+                name: PropertyDefinition(name, raw)
+                for name, raw in self._properties.items()
+            }
+        return self._property_definitions
+
     @property
     def entity_id(self) -> str:
         """
@@ -298,12 +889,23 @@ class IoTTwinMakerUdqRequest:
         """
         return self._selectedProperties
 
+    @staticmethod
+    def _to_datetime(seconds_since_epoch):
+        try:
+            return datetime.utcfromtimestamp(seconds_since_epoch)
+        except:
+            return None
+
     # deprecated, used start_time instead, which supports higher precision
     @property
     def start_datetime(self) -> datetime:
         """
         The exclusive start time of the query
         """
+        if self._startDateTime is _UNSET:
+            self._startDateTime = IoTTwinMakerUdqRequest._to_datetime(
+                self._startDateTimeSeconds
+            )
         return self._startDateTime
 
     # deprecated, used end_time instead, which supports higher precision
@@ -312,6 +914,10 @@ class IoTTwinMakerUdqRequest:
         """
         The inclusive end time of the query
         """
+        if self._endDateTime is _UNSET:
+            self._endDateTime = IoTTwinMakerUdqRequest._to_datetime(
+                self._endDateTimeSeconds
+            )
         return self._endDateTime
 
     @property
@@ -328,6 +934,24 @@ class IoTTwinMakerUdqRequest:
         """
         return self._endTime
 
+    @property
+    def start_time_ns(self) -> int:
+        """
+        The exclusive start time of the query as nanoseconds since the epoch
+        """
+        if self._startTimeNs is None:
+            self._startTimeNs = iso8601_to_epoch_ns(self._startTime)
+        return self._startTimeNs
+
+    @property
+    def end_time_ns(self) -> int:
+        """
+        The inclusive end time of the query as nanoseconds since the epoch
+        """
+        if self._endTimeNs is None:
+            self._endTimeNs = iso8601_to_epoch_ns(self._endTime)
+        return self._endTimeNs
+
     @property
     def next_token(self) -> str:
         """
@@ -356,6 +980,32 @@ class IoTTwinMakerUdqRequest:
         """
         return self._property_filters
 
+    @property
+    def compiled_property_filters(self) -> CompiledPropertyFilters:
+        """
+        Property filters compiled into predicates, see udq_utils.udq_filters
+        """
+        if self._compiledPropertyFilters is None:
+            self._compiledPropertyFilters = CompiledPropertyFilters(
+                self._property_filters
+            )
+        return self._compiledPropertyFilters
+
+    def with_time_window(self, start_ns: int, end_ns: int):
+        """
+        A copy of this request over another time window, given as nanoseconds since the epoch
+        """
+        request = copy.copy(self)
+        request._startTimeNs = start_ns
+        request._endTimeNs = end_ns
+        request._startTime = epoch_ns_to_iso8601(start_ns)
+        request._endTime = epoch_ns_to_iso8601(end_ns)
+        request._startDateTimeSeconds = start_ns // NANOS_PER_SECOND
+        request._endDateTimeSeconds = end_ns // NANOS_PER_SECOND
+        request._startDateTime = _UNSET
+        request._endDateTime = _UNSET
+        return request
+
     @staticmethod
     def parse(event):
         if "entityId" in event:
@@ -369,6 +1019,8 @@ class IoTTwinMakerUDQEntityRequest(IoTTwinMakerUdqRequest):
     Models an entity-level request (currently more of a placeholder for specialized fields)
     """
 
+    __slots__ = ()
+
     def __init__(self, event):
         super().__init__(event)
 
@@ -378,5 +1030,7 @@ class IoTTwinMakerUDQComponentTypeRequest(IoTTwinMakerUdqRequest):
     Models an component-type-level request (currently more of a placeholder for specialized fields)
     """
 
+    __slots__ = ()
+
     def __init__(self, event):
         super().__init__(event)
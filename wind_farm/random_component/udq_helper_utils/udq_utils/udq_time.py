@@ -0,0 +1,144 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+from datetime import datetime
+from typing import Iterable, List
+
+# ---------------------------------------------------------------------------
+#   Time helpers for the UDQ pipeline
+#
+#   Times are carried as integer nanoseconds since the unix epoch (UTC), conversions are done
+#   with integer arithmetic so that no datetime object is allocated on the hot path
+# ---------------------------------------------------------------------------
+
+NANOS_PER_SECOND = 1_000_000_000
+SECONDS_PER_DAY = 86400
+
+_ISO8601_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,9}))?(Z|[+-]\d{2}(?::?\d{2})?)?$"
+)
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """
+    Number of days between 1970-01-01 and the given proleptic gregorian date
+    (http://howardhinnant.github.io/date_algorithms.html#days_from_civil)
+    """
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def iso8601_to_epoch_ns(timestamp: str) -> int:
+    """
+    Convert an ISO8601 timestamp as sent by IoT TwinMaker (e.g. 2022-11-15T14:33:02.123Z) into
+    nanoseconds since the epoch. Timestamps without offset are considered as UTC.
+    """
+    match = _ISO8601_PATTERN.match(timestamp)
+    if not match:
+        raise Exception(f"Timestamp[{timestamp}] is not a valid ISO8601 timestamp")
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+
+    seconds = (
+        days_from_civil(int(year), int(month), int(day)) * SECONDS_PER_DAY
+        + int(hour) * 3600
+        + int(minute) * 60
+        + int(second)
+    )
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "+" else 1
+        digits = offset[1:].replace(":", "")
+        seconds += sign * (int(digits[:2]) * 3600 + int(digits[2:4] or 0) * 60)
+
+    nanos = int(fraction.ljust(9, "0")) if fraction else 0
+    return seconds * NANOS_PER_SECOND + nanos
+
+
+def epoch_ns_to_iso8601(epoch_ns: int) -> str:
+    """
+    Convert nanoseconds since the epoch into an ISO8601 UTC timestamp with millisecond precision
+    (e.g. 2022-11-15T14:33:02.123Z)
+    """
+    seconds, nanos = divmod(epoch_ns, NANOS_PER_SECOND)
+    days, seconds_of_day = divmod(seconds, SECONDS_PER_DAY)
+    year, month, day = civil_from_days(days)
+    hour, rest = divmod(seconds_of_day, 3600)
+    minute, second = divmod(rest, 60)
+    return f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}.{nanos // 1_000_000:03d}Z"
+
+
+def civil_from_days(days: int):
+    """
+    Inverse of days_from_civil: the (year, month, day) of a number of days since 1970-01-01
+    """
+    days += 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    day_of_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100
+    )
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = mp + (3 if mp < 10 else -9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def datetime_to_epoch_ns(value: datetime) -> int:
+    """
+    Nanoseconds since the epoch of a datetime, naive datetimes are considered as UTC
+    """
+    seconds = (
+        days_from_civil(value.year, value.month, value.day) * SECONDS_PER_DAY
+        + value.hour * 3600
+        + value.minute * 60
+        + value.second
+    )
+    offset = value.utcoffset()
+    if offset is not None:
+        seconds -= offset.days * SECONDS_PER_DAY + offset.seconds
+    return seconds * NANOS_PER_SECOND + value.microsecond * 1000
+
+
+class Iso8601Formatter:
+    """
+    Formats epoch nanoseconds like epoch_ns_to_iso8601, for many timestamps in a row
+
+    Consecutive timestamps of a series mostly share their day and often their second: the formatted
+    "YYYY-MM-DDTHH:MM:SS." prefix of the previous timestamp is reused, the calendar conversion only runs
+    when the day changes
+    """
+
+    __slots__ = ("_day", "_date_prefix", "_second", "_second_prefix")
+
+    def __init__(self):
+        self._day = None
+        self._date_prefix = None
+        self._second = None
+        self._second_prefix = None
+
+    def __call__(self, epoch_ns: int) -> str:
+        seconds, nanos = divmod(epoch_ns, NANOS_PER_SECOND)
+        if seconds != self._second:
+            days, seconds_of_day = divmod(seconds, SECONDS_PER_DAY)
+            if days != self._day:
+                year, month, day = civil_from_days(days)
+                self._day = days
+                self._date_prefix = f"{year:04d}-{month:02d}-{day:02d}T"
+            hour, rest = divmod(seconds_of_day, 3600)
+            minute, second = divmod(rest, 60)
+            self._second = seconds
+            self._second_prefix = (
+                f"{self._date_prefix}{hour:02d}:{minute:02d}:{second:02d}."
+            )
+        return f"{self._second_prefix}{nanos // 1_000_000:03d}Z"
+
+    def format_many(self, timestamps: Iterable[int]) -> List[str]:
+        return [self(epoch_ns) for epoch_ns in timestamps]
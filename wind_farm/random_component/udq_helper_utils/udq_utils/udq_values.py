@@ -0,0 +1,171 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+import numbers
+
+# ---------------------------------------------------------------------------
+#   Conversions between AWS IoT TwinMaker DataValue structures and python-native values
+# ---------------------------------------------------------------------------
+
+
+def decode_data_value(data_value: dict):
+    """
+    Convert an AWS IoT TwinMaker DataValue (e.g. {"doubleValue": "50"}) into a python-native value
+    """
+    if not data_value:
+        return None
+    if "doubleValue" in data_value:
+        return float(data_value["doubleValue"])
+    if "integerValue" in data_value:
+        return int(data_value["integerValue"])
+    if "longValue" in data_value:
+        return int(data_value["longValue"])
+    if "booleanValue" in data_value:
+        value = data_value["booleanValue"]
+        return value if type(value) is bool else str(value).lower() == "true"
+    if "stringValue" in data_value:
+        return data_value["stringValue"]
+    if "listValue" in data_value:
+        return [decode_data_value(v) for v in data_value["listValue"]]
+    if "mapValue" in data_value:
+        return {k: decode_data_value(v) for k, v in data_value["mapValue"].items()}
+    if "expression" in data_value:
+        return data_value["expression"]
+    return None
+
+
+# ---------------------------------------------------------------------------
+#   Encoding of python-native values into DataValue structures
+#
+#   The UDQ interface expects scalar values as strings, e.g. {"doubleValue": "53.0"}. When the type of a property
+#   is known from its definition, value_encoder returns a routine specialized for that type, so that the values of
+#   a series are converted without inspecting each of them. Values of a compatible python type are coerced to the
+#   declared type (an integral number for a DOUBLE, an integral float for an INTEGER, ...), the other ones are
+#   encoded according to their python type, as encode_data_value does.
+# ---------------------------------------------------------------------------
+
+INT32_MIN = -(2**31)
+INT32_MAX = 2**31 - 1
+
+_SCALAR_TYPES = (str, int, float, bool)
+
+
+def _integral(value):
+    """The int of an integral number (e.g. 3 or 3.0), None for other values"""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        return None
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    value = float(value)
+    return int(value) if value.is_integer() else None
+
+
+def _encode_double(value) -> dict:
+    if type(value) is float:
+        return {"doubleValue": str(value)}
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        try:
+            return {"doubleValue": str(float(value))}
+        except OverflowError:
+            pass
+    return encode_data_value(value)
+
+
+def _encode_integer(value) -> dict:
+    integral = value if type(value) is int else _integral(value)
+    if integral is not None and INT32_MIN <= integral <= INT32_MAX:
+        return {"integerValue": str(integral)}
+    return encode_data_value(value)
+
+
+def _encode_long(value) -> dict:
+    integral = value if type(value) is int else _integral(value)
+    if integral is not None:
+        return {"longValue": str(integral)}
+    return encode_data_value(value)
+
+
+def _encode_boolean(value) -> dict:
+    if type(value) is bool:
+        return {"booleanValue": str(value)}
+    return encode_data_value(value)
+
+
+def _encode_string(value) -> dict:
+    if type(value) is str:
+        return {"stringValue": value}
+    if isinstance(value, _SCALAR_TYPES):
+        return {"stringValue": str(value)}
+    return encode_data_value(value)
+
+
+_SCALAR_ENCODERS = {
+    "DOUBLE": _encode_double,
+    "INTEGER": _encode_integer,
+    "LONG": _encode_long,
+    "BOOLEAN": _encode_boolean,
+    "STRING": _encode_string,
+}
+
+
+def encode_data_value(value) -> dict:
+    """
+    Convert a python-native value into an AWS IoT TwinMaker DataValue, the type is inferred from the value
+    """
+    value_type = type(value)
+    if value_type is float:
+        return {"doubleValue": str(value)}
+    if value_type is str:
+        return {"stringValue": value}
+    if value_type is bool:
+        return {"booleanValue": str(value)}
+    if value_type is int:
+        if INT32_MIN <= value <= INT32_MAX:
+            return {"integerValue": str(value)}
+        return {"longValue": str(value)}
+    if isinstance(value, (list, tuple)):
+        return {"listValue": [encode_data_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {
+            "mapValue": {key: encode_data_value(item) for key, item in value.items()}
+        }
+    raise Exception(f"Unsupported value type [{value_type.__name__}] for {value}")
+
+
+def value_encoder(data_type: str, nested_type: str = None):
+    """
+    The encoding routine for the values of a property of the given IoT TwinMaker type (DOUBLE, INTEGER, LONG,
+    BOOLEAN, STRING, LIST or MAP, with the type of their elements as nested_type)
+    Values of an unknown type, or not compatible with the declared one, are encoded according to their python type
+    """
+    if data_type in _SCALAR_ENCODERS:
+        return _SCALAR_ENCODERS[data_type]
+    element_encoder = _SCALAR_ENCODERS.get(nested_type, encode_data_value)
+    if data_type == "LIST":
+
+        def encode_list(value) -> dict:
+            if isinstance(value, (list, tuple)):
+                return {"listValue": [element_encoder(item) for item in value]}
+            return encode_data_value(value)
+
+        return encode_list
+    if data_type == "MAP":
+
+        def encode_map(value) -> dict:
+            if isinstance(value, dict):
+                return {
+                    "mapValue": {
+                        key: element_encoder(item) for key, item in value.items()
+                    }
+                }
+            return encode_data_value(value)
+
+        return encode_map
+    return encode_data_value
+
+
+def encode_series(values, data_type: str, nested_type: str = None) -> list:
+    """
+    Encode all the values of a series of the given IoT TwinMaker type
+    """
+    return list(map(value_encoder(data_type, nested_type), values))
@@ -0,0 +1,117 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. 2022
+# SPDX-License-Identifier: Apache-2.0
+
+"""Parsing of the site models and generation of their scenes, ahead of the CDK constructs.
+
+The work of each site only involves the domain model and the scene visitor (no CDK call), it can run
+in worker processes: the parsed models are sent back to build the entities of the stacks. Workers are
+spawned (not forked, the CDK app of the parent process runs a JSII node process) and import the CDK
+libraries again, they only pay off for large models on several cores.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from os import path
+from typing import List
+
+from twinmaker_builder import TwinMakerRoot
+from twinmaker_builder.assets import bytes_key
+from wind_farm.wind_farm import WindFarm
+from wind_farm.visitors import WindFarmSceneVisitor
+
+
+class SiteModel:
+    """The parsed model of a site and the content of its scene"""
+
+    def __init__(self, model_path: str, farm: WindFarm, scene_content: str):
+        self.model_path = model_path
+        self.farm = farm
+        self.scene_content = scene_content
+
+    def scene_key(self) -> str:
+        """Return the content-addressed key of the scene"""
+        return bytes_key(self.scene_content.encode("utf-8"), ".json")
+
+
+def site_name(model_path: str) -> str:
+    """Return the name of a site from the path of its model, e.g. "north" for "sites/north.yaml" """
+    return path.splitext(path.basename(model_path))[0]
+
+
+def site_model_paths(sites_dir: str) -> List[str]:
+    """Return the paths of the site models of a directory, sorted"""
+    return sorted(
+        glob(path.join(sites_dir, "*.yaml")) + glob(path.join(sites_dir, "*.yml"))
+    )
+
+
+def load_site(
+    model_path: str, base_file: str, bucket_name: str, asset_keys=None
+) -> SiteModel:
+    """Parse the model of a site and generate its scene
+
+    Parameters
+    ----------
+        model_path: string, required
+            The path to the YAML description of the site
+
+        base_file: string, required
+            The path to the base scene JSON
+
+        bucket_name: string, required
+            The name of the bucket of the workspace, referenced by the scene
+
+        asset_keys: dict, optional
+            The content-addressed keys of the resources referenced by the scene, by path
+    """
+    farm = TwinMakerRoot.load_from_yaml(model_path, WindFarm)
+    visitor = WindFarmSceneVisitor(bucket_name, base_file, asset_keys)
+    farm.visit(visitor)
+    return SiteModel(model_path, farm, visitor.get_content())
+
+
+def _load_site(args) -> SiteModel:
+    return load_site(*args)
+
+
+def load_sites(
+    model_paths: List[str],
+    base_file: str,
+    bucket_names: List[str],
+    max_workers: int = 1,
+    asset_keys=None,
+) -> List[SiteModel]:
+    """Parse the models of several sites and generate their scenes, in this process or in parallel
+    worker processes
+
+    The bucket names can hold CDK tokens (like the account ID), they are copied as is in the scenes
+    and resolved once the scenes are added to the stacks of this process.
+
+    Parameters
+    ----------
+        max_workers: int, optional
+            The number of worker processes, None for one per site, the sites are loaded in this
+            process by default
+
+    Returns
+    -------
+        The SiteModel of each model path, in order
+
+    Examples
+    --------
+        sites = load_sites(site_model_paths("sites"), "wind_farm/base.json", bucket_names)
+    """
+    tasks = [
+        (model_path, base_file, bucket_name, asset_keys)
+        for model_path, bucket_name in zip(model_paths, bucket_names)
+    ]
+    if len(tasks) <= 1 or max_workers == 1:
+        return [_load_site(task) for task in tasks]
+
+    # forking a process with the live pipes and threads of the JSII runtime is unsafe
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers or len(tasks), len(tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        return list(executor.map(_load_site, tasks))
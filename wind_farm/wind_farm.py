@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-from twinmaker_builder import TwinMakerRoot, TwinMakerObject
+from twinmaker_builder import Field, TwinMakerRoot, TwinMakerObject
 
 """Domain Model for the WindFarm sample.
 This should allow to read YAML file like this:
@@ -42,12 +42,10 @@ class WindFarm(TwinMakerRoot):
 
 
 class TurbineGroup(TwinMakerObject):
-    def __init__(self, description: dict, parent=None) -> None:
-        super().__init__(
-            description, parent=parent, fields=["shape", "width", "diameter"]
-        )
+    shape = Field(str, choices=("rectangle", "circle"))
+    width = Field(int)
+    diameter = Field(float)
 
 
 class Turbine(TwinMakerObject):
-    def __init__(self, description: dict, parent=None) -> None:
-        super().__init__(description, parent=parent, fields=["device_code"])
+    device_code = Field(str)
@@ -15,27 +15,168 @@ from cdk_nag import NagPackSuppression, NagSuppressions
 
 from constructs import Construct
 from os import path, makedirs
+from typing import Dict, Tuple
 
 
-from wind_farm.wind_farm import WindFarm, TwinMakerRoot
-from wind_farm.visitors import WindFarmCDKVisitor, WindFarmSceneVisitor
-from .random_component import RandomTwinMakerComponent
+from twinmaker_builder.assets import BUCKET_PLACEHOLDER, render_scene, stage_directory
+from twinmaker_builder.gltf import optimize_resources
+from wind_farm.sites import SiteModel, load_site
+from wind_farm.visitors import WindFarmCDKVisitor
+from .random_component import RandomComponentFunction, RandomTwinMakerComponent
 
 # For security reason S3 logging is enabled by default
 s3_logging = True
 
+DEFAULT_WORKSPACE_ID = "windfarm-sample"
+
+# 3D models and other resources of the workspaces
+RESOURCES_DIR = "twinmaker_resources"
+
+# Resources as deployed (3D models optimized) and the cache of the optimized models
+BUILD_DIR = ".twinmaker_build"
+
+
+def build_resources(optimize: bool = True, lod_ratios=()) -> str:
+    """Return the directory of the resources to deploy, RESOURCES_DIR with its GLB models optimized
+    (see twinmaker_builder.gltf) unless optimize is false"""
+    if not optimize:
+        return RESOURCES_DIR
+    resources_dir = path.join(BUILD_DIR, RESOURCES_DIR)
+    optimize_resources(
+        RESOURCES_DIR,
+        resources_dir,
+        path.join(BUILD_DIR, "glb_cache"),
+        lod_ratios=lod_ratios,
+    )
+    return resources_dir
+
+
+def context_resources(node) -> str:
+    """Return the directory of the resources to deploy from the context of a construct:
+    `-c optimize_models=false` deploys the models as is, `-c model_lods=0.5,0.25` adds LOD variants"""
+    lods = node.try_get_context("model_lods")
+    return build_resources(
+        optimize=str(node.try_get_context("optimize_models")).lower() != "false",
+        lod_ratios=[float(r) for r in str(lods).split(",")] if lods else (),
+    )
+
+
+def content_addressed_resources(node) -> Tuple[str, Dict[str, str]]:
+    """Return the resources to deploy from the context of a construct staged under their content-addressed
+    keys (see twinmaker_builder.assets): the staging directory, and the keys by path relative to the
+    resources"""
+    staging_dir = path.join(BUILD_DIR, "content_addressed")
+    return staging_dir, stage_directory(context_resources(node), staging_dir)
+
+
+def site_bucket_name(workspace_id: str, account: str, region: str) -> str:
+    """Return the name of the bucket of a workspace"""
+    if workspace_id == DEFAULT_WORKSPACE_ID:
+        # name of the bucket of the single site deployments
+        return f"twinmaker-windfarm-{account}-{region}"
+    return f"twinmaker-{workspace_id}-{account}-{region}"
+
+
+class WindFarmSharedStack(Stack):
+    """Resources shared by the stacks of several sites: the Lambda function of the random
+    component type and the source of the 3D models (staged once), under content-addressed keys
+    with `-c content_addressed=true`"""
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        *,
+        prefix: str = None,
+        content_addressed: bool = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        if content_addressed is None:
+            content_addressed = (
+                str(self.node.try_get_context("content_addressed")).lower() == "true"
+            )
+
+        self.random_function = RandomComponentFunction(
+            self, "RandomComponentFunction", prefix=prefix or construct_id
+        )
+        if content_addressed:
+            resources_dir, _ = content_addressed_resources(self.node)
+        else:
+            resources_dir = context_resources(self.node)
+        self.resources = s3deploy.Source.asset(resources_dir)
+
+        NagSuppressions.add_resource_suppressions_by_path(
+            self,
+            path=f"{Stack.of(self).stack_name}/LogRetentionaae0aa3c5b4d4f87b02d85b201efdd8a",
+            suppressions=[
+                {
+                    "id": "AwsSolutions-IAM4",
+                    "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
+                },
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
+                },
+            ],
+            apply_to_children=True,
+        )
+
 
 class WindFarmStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    """The TwinMaker workspace of a wind farm site, with its entities and scene
+
+    Parameters
+    ----------
+        model_path: string, optional
+            The path to the YAML description of the site
+
+        base_file: string, optional
+            The path to the base scene JSON
+
+        workspace_id: string, optional
+            The ID of the workspace, the names of the bucket and roles of the stack derive from it
+
+        site: SiteModel, optional
+            The model and scene of the site, already loaded (see wind_farm.sites.load_sites),
+            model_path and base_file are then ignored
+
+        shared: WindFarmSharedStack, optional
+            The resources shared with the stacks of the other sites, the stack deploys its own otherwise
+            (both must use the same content_addressed mode)
+
+        content_addressed: bool, optional
+            Whether the resources and the scene are stored under content-addressed keys, the resources
+            are then only copied again when one of them changes, defaults to the `content_addressed`
+            context value
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        *,
+        model_path: str = "wind_farm/farm.yaml",
+        base_file: str = "wind_farm/base.json",
+        workspace_id: str = DEFAULT_WORKSPACE_ID,
+        site: SiteModel = None,
+        shared: WindFarmSharedStack = None,
+        content_addressed: bool = None,
+        **kwargs,
+    ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        if content_addressed is None:
+            content_addressed = (
+                str(self.node.try_get_context("content_addressed")).lower() == "true"
+            )
+
         # Save account and region for later use
         account = Stack.of(self).account
         region = Stack.of(self).region
 
-        workspace_id = "windfarm-sample"
-
-        bucket_name = f"twinmaker-windfarm-{account}-{region}"
+        bucket_name = site_bucket_name(workspace_id, account, region)
 
         logging_bucket = (
             s3.Bucket(
@@ -88,11 +229,16 @@ class WindFarmStack(Stack):
         )
 
         # 2. Create a role to be used by the TwinMaker Workspace
-        lambda_name = RandomTwinMakerComponent.lambda_name()
+        if shared is None:
+            lambda_name = RandomTwinMakerComponent.lambda_name(workspace_id)
+        else:
+            lambda_name = RandomTwinMakerComponent.lambda_name(
+                shared.random_function.prefix
+            )
         twinmaker_role = iam.Role(
             self,
             "TwinMakerRoleForS3",
-            role_name="windfarm-sample-twinmaker-role",
+            role_name=f"{workspace_id}-twinmaker-role",
             assumed_by=iam.ServicePrincipal("iottwinmaker.amazonaws.com"),
             inline_policies={
                 "s3_access": iam.PolicyDocument(
@@ -133,7 +279,7 @@ class WindFarmStack(Stack):
         workspace = twinmaker.CfnWorkspace(
             self,
             "TwinMakerWorkspace",
-            workspace_id="windfarm-sample",
+            workspace_id=workspace_id,
             role=twinmaker_role.role_arn,
             s3_location=twinmaker_bucket.bucket_arn,
         )
@@ -142,41 +288,85 @@ class WindFarmStack(Stack):
 
         # 4. Create our custom Random Component
         random_component = RandomTwinMakerComponent(
-            self, "RandomComponent", workspace.workspace_id
+            self,
+            "RandomComponent",
+            workspace.workspace_id,
+            prefix=workspace_id,
+            function=shared.random_function if shared else None,
         )
         random_component.node.add_dependency(workspace)
 
-        # 5. Read the business model
-        farm = TwinMakerRoot.load_from_yaml("wind_farm/farm.yaml", WindFarm)
+        # 5. Read the business model and generate its scene (unless already done for the site)
+        resources_dir = asset_keys = None
+        if content_addressed and (site is None or shared is None):
+            resources_dir, asset_keys = content_addressed_resources(self.node)
+        if site is None:
+            if content_addressed:
+                site = load_site(model_path, base_file, BUCKET_PLACEHOLDER, asset_keys)
+            else:
+                site = load_site(model_path, base_file, bucket_name)
+        farm = site.farm
 
-        # 6. Visit the model with the CDKVisitor
-        visitor = WindFarmCDKVisitor(self, "WindFarm", workspace)
+        # 6. Visit the model with the CDKVisitor, `cdk synth -c raw_entities=true`
+        # emits all the entities at once (faster for large models)
+        visitor = WindFarmCDKVisitor(
+            self,
+            "WindFarm",
+            workspace,
+            raw=str(self.node.try_get_context("raw_entities")).lower() == "true",
+        )
         farm.visit(visitor)
         visitor.node.add_dependency(random_component)
 
-        # 7. Visit the model wiht the SceneVisitor
-        visitor = WindFarmSceneVisitor(bucket_name, "wind_farm/base.json")
-        farm.visit(visitor)
-
-        # 8. Upload the scene JSON to the S3 Bucket
-        deploy = s3deploy.BucketDeployment(
-            self,
-            "DeployTwinMakerModels",
-            sources=[
-                s3deploy.Source.asset("twinmaker_resources"),
-                s3deploy.Source.data("scene/windfarm.json", visitor.get_content()),
-            ],
-            destination_bucket=twinmaker_bucket,
-            prune=False,
-        )
+        # 7. Upload the 3D models and the scene JSON to the S3 Bucket
+        if content_addressed:
+            # two deployments: the resources are only copied again when one of them changes, not when
+            # the scene does
+            scene_key = site.scene_key()
+            deploy_resources = s3deploy.BucketDeployment(
+                self,
+                "DeployTwinMakerResources",
+                sources=[
+                    shared.resources if shared else s3deploy.Source.asset(resources_dir)
+                ],
+                destination_bucket=twinmaker_bucket,
+                prune=False,
+            )
+            deploy = s3deploy.BucketDeployment(
+                self,
+                "DeployTwinMakerScene",
+                sources=[
+                    s3deploy.Source.data(
+                        scene_key,
+                        render_scene(site.scene_content, bucket_name).decode("utf-8"),
+                    )
+                ],
+                destination_bucket=twinmaker_bucket,
+                prune=False,
+            )
+            deploy.node.add_dependency(deploy_resources)
+        else:
+            scene_key = "scene/windfarm.json"
+            deploy = s3deploy.BucketDeployment(
+                self,
+                "DeployTwinMakerModels",
+                sources=[
+                    shared.resources
+                    if shared
+                    else s3deploy.Source.asset(context_resources(self.node)),
+                    s3deploy.Source.data(scene_key, site.scene_content),
+                ],
+                destination_bucket=twinmaker_bucket,
+                prune=False,
+            )
 
-        # 9. Create the scene in the TwinMaker Workspace
+        # 8. Create the scene in the TwinMaker Workspace
         scene = twinmaker.CfnScene(
             self,
             "MainScene",
             scene_id="windfarm",
             workspace_id=workspace_id,
-            content_location=twinmaker_bucket.s3_url_for_object("scene/windfarm.json"),
+            content_location=twinmaker_bucket.s3_url_for_object(scene_key),
         )
 
         scene.node.add_dependency(deploy)
@@ -225,21 +415,22 @@ class WindFarmStack(Stack):
             apply_to_children=True,
         )
 
-        NagSuppressions.add_resource_suppressions_by_path(
-            self,
-            path=f"{Stack.of(self).stack_name}/LogRetentionaae0aa3c5b4d4f87b02d85b201efdd8a",
-            suppressions=[
-                {
-                    "id": "AwsSolutions-IAM4",
-                    "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
-                },
-                {
-                    "id": "AwsSolutions-IAM5",
-                    "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
-                },
-            ],
-            apply_to_children=True,
-        )
+        if shared is None:
+            NagSuppressions.add_resource_suppressions_by_path(
+                self,
+                path=f"{Stack.of(self).stack_name}/LogRetentionaae0aa3c5b4d4f87b02d85b201efdd8a",
+                suppressions=[
+                    {
+                        "id": "AwsSolutions-IAM4",
+                        "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
+                    },
+                    {
+                        "id": "AwsSolutions-IAM5",
+                        "reason": "Usage of external to handle log retention (cf aws_lambda_python_alpha)",
+                    },
+                ],
+                apply_to_children=True,
+            )
 
         NagSuppressions.add_resource_suppressions(
             twinmaker_role,